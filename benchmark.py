@@ -0,0 +1,271 @@
+""" Cargas de trabalho de benchmark para o simulador de sistema de arquivos """
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from bulk_io import export_tree, import_tree
+from cache_manager import DataStore
+from filesystem import FileSystem
+from journal_codec import JournalCodec
+from sharding import ShardedFileSystem
+
+# Configurações de codificação comparadas no relatório
+CODEC_CONFIGS = [
+    ("sem codificação", dict(algorithm='none', delta=False)),
+    ("delta", dict(algorithm='none', delta=True)),
+    ("zlib-1", dict(algorithm='zlib', level=1, delta=False)),
+    ("zlib-6", dict(algorithm='zlib', level=6, delta=False)),
+    ("delta+zlib-1", dict(algorithm='zlib', level=1, delta=True)),
+    ("delta+zlib-6", dict(algorithm='zlib', level=6, delta=True)),
+    ("delta+zlib-9", dict(algorithm='zlib', level=9, delta=True)),
+    ("delta+lzma-6", dict(algorithm='lzma', level=6, delta=True)),
+]
+
+WORDS = ("journal registro arquivo diretório sistema falha recuperação bloco "
+         "cluster volume partição índice atributo segurança usuário").split()
+
+
+def random_text(rng, words):
+    """Gera um texto pseudoaleatório com o número de palavras informado"""
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def workload_edicoes(fs, rng, ops):
+    """Documentos grandes editados repetidamente com pequenas alterações"""
+    docs = [f"/root/docs/doc{i}.txt" for i in range(20)]
+    for path in docs:
+        fs.create_file(path, random_text(rng, 800))
+    for _ in range(ops):
+        path = rng.choice(docs)
+        content = fs.read_file(path)
+        pos = rng.randrange(len(content))
+        fs.write_file(path, content[:pos] + random_text(rng, 3) + content[pos:])
+
+
+def workload_logs(fs, rng, ops):
+    """Arquivos de log que só recebem acréscimos"""
+    logs = [f"/root/logs/servico{i}.log" for i in range(10)]
+    for path in logs:
+        fs.create_file(path, "")
+    for i in range(ops):
+        fs.append_to_file(rng.choice(logs), f"{i} INFO {random_text(rng, 12)}")
+
+
+def workload_misto(fs, rng, ops):
+    """Criações, reescritas completas e exclusões de arquivos médios"""
+    live = []
+    for i in range(ops):
+        choice = rng.random()
+        if choice < 0.4 or not live:
+            path = f"/root/misto/d{i % 16}/arq{i}.txt"
+            fs.create_file(path, random_text(rng, 200))
+            live.append(path)
+        elif choice < 0.8:
+            fs.write_file(rng.choice(live), random_text(rng, 200))
+        else:
+            fs.delete_file(live.pop(rng.randrange(len(live))))
+
+
+WORKLOADS = {
+    'edicoes': workload_edicoes,
+    'logs': workload_logs,
+    'misto': workload_misto,
+}
+
+
+def run_codec_benchmark(ops, seed):
+    """
+    Compara o volume do journal e o custo de CPU de cada configuração de codificação
+    Args:
+        ops (int): Número de operações por carga de trabalho
+        seed (int): Semente do gerador pseudoaleatório
+    """
+
+    for name, workload in WORKLOADS.items():
+        print(f"\n== Carga '{name}' ({ops} operações) ==")
+        print(f"{'codificação':<16}{'journal (KiB)':>15}{'razão':>8}{'CPU cod. (ms)':>15}"
+              f"{'replay (ms)':>13}{'economia (KiB/ms CPU)':>23}")
+        baseline = None
+        for label, options in CODEC_CONFIGS:
+            codec = JournalCodec(**options)
+            fs = FileSystem(journal_codec=codec, verbose=False)
+            workload(fs, random.Random(seed), ops)
+            journal_bytes = fs.journal.next_lsn
+            if baseline is None:
+                baseline = journal_bytes
+
+            start = time.perf_counter()
+            fs.simulate_crash_and_recovery()
+            replay_ms = (time.perf_counter() - start) * 1000
+
+            cpu_ms = codec.encode_time * 1000
+            saved_kib = (baseline - journal_bytes) / 1024
+            efficiency = f"{saved_kib / cpu_ms:.1f}" if cpu_ms > 0 and saved_kib > 0 else "-"
+            print(f"{label:<16}{journal_bytes / 1024:>15.1f}{baseline / journal_bytes:>8.2f}"
+                  f"{cpu_ms:>15.1f}{replay_ms:>13.1f}{efficiency:>23}")
+
+
+def run_bulk_benchmark(host_dir, workers):
+    """
+    Compara a importação arquivo a arquivo com a importação em lote e mede a exportação
+    Args:
+        host_dir (str): Diretório do host usado como carga de trabalho
+        workers (int): Threads de leitura/gravação
+    """
+
+    fs = FileSystem(verbose=False)
+    start = time.perf_counter()
+    files = 0
+    for root, _, names in os.walk(host_dir):
+        relative = os.path.relpath(root, host_dir).replace(os.sep, "/")
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.islink(path) or os.path.getsize(path) > fs.journal.capacity // 8:
+                continue
+            with open(path, 'rb') as source:
+                content = source.read().decode('utf-8', errors='replace')
+            fs.create_file(f"/individual/{relative}/{name}".replace("/./", "/"), content)
+            files += 1
+    elapsed = time.perf_counter() - start
+    print(f"Arquivo a arquivo: {files} arquivos em {elapsed:.2f} s "
+          f"({files / elapsed if elapsed else 0:.0f} arquivos/s, {len(fs.journal)} registros ativos)")
+
+    fs = FileSystem(verbose=False)
+    print(import_tree(fs, host_dir, "/lote", workers=workers).summary())
+    with tempfile.TemporaryDirectory() as target:
+        print(export_tree(fs, target, "/lote", workers=workers).summary())
+
+
+def run_shard_benchmark(shard_counts, clients, ops, batch, seed):
+    """
+    Mede a vazão agregada de vários clientes simultâneos com diferentes números de shards
+    Args:
+        shard_counts (list): Números de shards comparados
+        clients (int): Clientes simultâneos (threads), cada um em seu diretório de primeiro nível
+        ops (int): Operações por cliente
+        batch (int): Operações enviadas por mensagem ao roteador
+        seed (int): Semente do gerador pseudoaleatório
+    """
+
+    print(f"{'shards':>6}{'ops/s':>12}{'recuperação (ms)':>20}")
+    for shards in shard_counts:
+        with ShardedFileSystem(shards) as sfs:
+            def client(index):
+                rng = random.Random(seed + index)
+                paths = [f"/cliente{index}/arq{i}.txt" for i in range(50)]
+                sfs.execute([('create_file', path, random_text(rng, 50)) for path in paths])
+                pending = []
+                for i in range(ops):
+                    path = rng.choice(paths)
+                    if rng.random() < 0.5:
+                        pending.append(('read_file', path))
+                    else:
+                        pending.append(('write_file', path, random_text(rng, 50)))
+                    if len(pending) >= batch:
+                        sfs.execute(pending)
+                        pending = []
+                if pending:
+                    sfs.execute(pending)
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sfs.simulate_crash_and_recovery()
+            recovery_ms = (time.perf_counter() - start) * 1000
+        print(f"{shards:>6}{clients * ops / elapsed:>12.0f}{recovery_ms:>20.1f}")
+
+
+def run_cache_benchmark(ops, budgets, latency, seed):
+    """
+    Compara a gravação síncrona no armazenamento com o cache de escrita adiada (LRU e CLOCK)
+    Args:
+        ops (int): Número de operações (leituras, acréscimos e reescritas)
+        budgets (list): Orçamentos de memória do cache comparados, em KiB
+        latency (float): Atraso simulado de cada gravação no armazenamento, em segundos
+        seed (int): Semente do gerador pseudoaleatório
+    """
+
+    configs = [("síncrona", 'lru', max(budgets), True)]
+    configs += [(f"{policy}-{budget}K", policy, budget, False) for budget in budgets for policy in ('lru', 'clock')]
+    print(f"{'cache':<14}{'ops/s':>10}{'acertos':>10}{'gravações':>11}{'no descarte':>13}"
+          f"{'preguiçosas':>13}{'WAL forçado':>13}")
+    for label, policy, budget, synchronous in configs:
+        rng = random.Random(seed)
+        store = DataStore(write_latency=latency)
+        fs = FileSystem(verbose=False, data_store=store, cache_budget=budget * 1024, cache_policy=policy,
+                        lazy_write_interval=None if synchronous else 0.05)
+        paths = [f"/root/dados/d{i % 8}/arq{i}.txt" for i in range(200)]
+        for path in paths:
+            fs.create_file(path, random_text(rng, 600))
+        fs.cache.flush()
+        # Acesso concentrado: 10% dos arquivos recebem 80% das operações
+        hot = paths[:len(paths) // 10]
+        start = time.perf_counter()
+        for i in range(ops):
+            path = rng.choice(hot) if rng.random() < 0.8 else rng.choice(paths)
+            choice = rng.random()
+            if choice < 0.7:
+                fs.read_file(path)
+                continue
+            if choice < 0.9:
+                fs.append_to_file(path, f"{i} {random_text(rng, 8)}")
+            else:
+                fs.write_file(path, random_text(rng, 600))
+            if synchronous:
+                fs.cache.flush()
+        elapsed = time.perf_counter() - start
+        stats = fs.cache.stats()
+        fs.close()
+        print(f"{label:<14}{ops / elapsed:>10.0f}{stats['hit_rate']:>10.1%}{store.writes:>11}"
+              f"{stats['sync_flushes']:>13}{stats['lazy_flushes']:>13}{fs.journal.forces:>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador NTFS")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    codec_parser = subparsers.add_parser("codec", help="Compressão e delta das cargas do journal")
+    codec_parser.add_argument("--ops", type=int, default=2000, help="Operações por carga de trabalho")
+    codec_parser.add_argument("--seed", type=int, default=42, help="Semente pseudoaleatória")
+
+    bulk_parser = subparsers.add_parser("bulk", help="Importação e exportação em lote de uma árvore do host")
+    bulk_parser.add_argument("dir", help="Diretório do host a importar")
+    bulk_parser.add_argument("--workers", type=int, default=8, help="Threads de leitura/gravação")
+
+    shard_parser = subparsers.add_parser("shards", help="Vazão com o namespace dividido entre processos")
+    shard_parser.add_argument("--shards", default="1,2,4", help="Números de shards comparados (ex: 1,2,4)")
+    shard_parser.add_argument("--clients", type=int, default=16, help="Clientes simultâneos")
+    shard_parser.add_argument("--ops", type=int, default=2000, help="Operações por cliente")
+    shard_parser.add_argument("--batch", type=int, default=50, help="Operações por mensagem")
+    shard_parser.add_argument("--seed", type=int, default=42, help="Semente pseudoaleatória")
+
+    cache_parser = subparsers.add_parser("cache", help="Cache de buffers com escrita adiada")
+    cache_parser.add_argument("--ops", type=int, default=5000, help="Número de operações")
+    cache_parser.add_argument("--budgets", default="64,512", help="Orçamentos do cache em KiB (ex: 64,512)")
+    cache_parser.add_argument("--latency", type=float, default=0.0002,
+                              help="Atraso simulado de cada gravação no armazenamento (s)")
+    cache_parser.add_argument("--seed", type=int, default=42, help="Semente pseudoaleatória")
+
+    args = parser.parse_args()
+    if args.benchmark == "codec":
+        run_codec_benchmark(args.ops, args.seed)
+    elif args.benchmark == "bulk":
+        run_bulk_benchmark(args.dir, args.workers)
+    elif args.benchmark == "shards":
+        run_shard_benchmark([int(n) for n in args.shards.split(",")], args.clients, args.ops,
+                            args.batch, args.seed)
+    elif args.benchmark == "cache":
+        run_cache_benchmark(args.ops, [int(n) for n in args.budgets.split(",")], args.latency, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+""" Importação e exportação em lote entre um diretório do host e o simulador """
+import collections
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TransferReport:
+    """Volume e vazão de uma importação ou exportação"""
+
+    def __init__(self, operation):
+        """
+        Inicializa um relatório vazio
+        Args:
+            operation (str): 'importação' ou 'exportação'
+        """
+
+        self.operation = operation
+        self.files = 0        # Arquivos transferidos
+        self.directories = 0  # Diretórios criados
+        self.bytes = 0        # Bytes de conteúdo transferidos
+        self.batches = 0      # Registros de lote gravados no journal (importação)
+        self.skipped = []     # Caminhos ignorados (ex: grandes demais para o journal ou ilegíveis)
+        self.elapsed = 0.0    # Duração em segundos
+
+    @property
+    def files_per_sec(self):
+        """Arquivos transferidos por segundo"""
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_sec(self):
+        """Megabytes de conteúdo transferidos por segundo"""
+        return self.bytes / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        """
+        Formata o relatório para exibição
+        Returns:
+            str: Texto com volumes e vazão
+        """
+
+        lines = [
+            f"{self.operation.capitalize()}: {self.files} arquivos, {self.directories} diretórios, "
+            f"{self.bytes / (1024 * 1024):.2f} MB em {self.elapsed:.2f} s",
+            f"  vazão: {self.files_per_sec:.0f} arquivos/s, {self.mb_per_sec:.2f} MB/s",
+        ]
+        if self.batches:
+            lines.append(f"  registros de lote no journal: {self.batches}")
+        if self.skipped:
+            lines.append(f"  ignorados: {len(self.skipped)} (ex: {self.skipped[0]})")
+        return "\n".join(lines)
+
+
+def _scan(host_dir):
+    """
+    Percorre a árvore do host com os.scandir, sem seguir links simbólicos
+    Args:
+        host_dir (str): Diretório do host
+    Yields:
+        tuple: (str: 'd', 'f' ou 'e', str: caminho relativo com '/', os.DirEntry: entrada)
+               — cada diretório é gerado antes do seu conteúdo; 'e' indica um
+               subdiretório que não pôde ser listado (entrada None)
+    """
+
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(host_dir, relative) if relative else host_dir)
+        except OSError:
+            if not relative:
+                raise
+            yield 'e', relative, None
+            continue
+        with entries:
+            for entry in entries:
+                child = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    yield 'd', child, entry
+                    stack.append(child)
+                elif entry.is_file(follow_symlinks=False):
+                    yield 'f', child, entry
+
+
+def _read(path):
+    """Lê um arquivo do host como texto (bytes inválidos em UTF-8 são substituídos)"""
+    with open(path, 'rb') as source:
+        data = source.read()
+    return data.decode('utf-8', errors='replace'), len(data)
+
+
+def import_tree(fs, host_dir, dest="/", user='root', workers=8, batch_files=512, batch_bytes=None):
+    """
+    Importa uma árvore do host para o simulador. Os arquivos são lidos em paralelo
+    por um pool de threads e gravados em lotes, cada lote em um único registro do journal
+    Args:
+        fs (FileSystem): Sistema de arquivos de destino
+        host_dir (str): Diretório do host a importar
+        dest (str): Diretório de destino no simulador
+        user (str): Usuário dono dos arquivos importados
+        workers (int): Threads de leitura
+        batch_files (int): Máximo de itens por lote
+        batch_bytes (int): Máximo de bytes por registro de lote, medidos pelos itens já
+                           serializados (padrão: 1/8 da capacidade do journal)
+    Returns:
+        TransferReport: Volume e vazão da importação
+    Raises:
+        NotADirectoryError: Se host_dir não for um diretório
+    """
+
+    if not os.path.isdir(host_dir):
+        raise NotADirectoryError(f"'{host_dir}' não é um diretório")
+    batch_bytes = min(batch_bytes or fs.journal.capacity // 8, fs.batch_capacity(dest, user))
+    report = TransferReport('importação')
+    start = time.perf_counter()
+    if dest.strip("/") and not fs.directory_exists(dest):
+        fs.create_directory(dest)
+
+    batch = []
+    sizes = []         # Bytes de conteúdo de cada item do lote
+    pending_bytes = 0  # Bytes que os itens do lote ocupam no registro do journal
+
+    def commit():
+        nonlocal batch, sizes, pending_bytes
+        if batch:
+            if fs.import_batch(dest, batch, user) is None:
+                # Registro recusado pelo journal: nenhum item do lote foi criado
+                for (kind, relative, _), size in zip(batch, sizes):
+                    if kind == 'd':
+                        report.directories -= 1
+                        report.skipped.append(relative + "/")
+                    else:
+                        report.files -= 1
+                        report.bytes -= size
+                        report.skipped.append(relative)
+            else:
+                report.batches += 1
+            batch = []
+            sizes = []
+            pending_bytes = 0
+
+    def add(item, size):
+        nonlocal pending_bytes
+        record_size = fs.batch_item_size(*item)
+        if record_size > batch_bytes:  # Não cabe nem sozinho em um lote
+            report.skipped.append(item[1])
+            return False
+        if len(batch) >= batch_files or (batch and pending_bytes + record_size > batch_bytes):
+            commit()
+        batch.append(item)
+        sizes.append(size)
+        pending_bytes += record_size
+        return True
+
+    # Janela limitada de leituras em andamento, consumida na ordem da varredura
+    window = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def drain(limit):
+            while len(window) > limit:
+                kind, relative, future = window.popleft()
+                if kind == 'd':
+                    if add(['d', relative, None], 0):
+                        report.directories += 1
+                    continue
+                try:
+                    content, size = future.result()
+                except OSError:  # Arquivo ilegível: ignora só ele, os lotes anteriores já foram aplicados
+                    report.skipped.append(relative)
+                    continue
+                if add(['f', relative, content], size):
+                    report.files += 1
+                    report.bytes += size
+
+        for kind, relative, entry in _scan(host_dir):
+            if kind == 'e':
+                report.skipped.append(relative + "/")
+                continue
+            if kind == 'f':
+                try:
+                    too_big = entry.stat(follow_symlinks=False).st_size > batch_bytes
+                except OSError:  # Removido durante a varredura
+                    too_big = True
+                if too_big:
+                    report.skipped.append(relative)
+                    continue
+                window.append((kind, relative, pool.submit(_read, entry.path)))
+            else:
+                window.append((kind, relative, None))
+            drain(workers * 4)
+        drain(0)
+    commit()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _write(path, content):
+    """Grava o conteúdo de um arquivo no host"""
+    data = content.encode('utf-8')
+    with open(path, 'wb') as target:
+        target.write(data)
+    return len(data)
+
+
+def export_tree(fs, host_dir, source="/", workers=8):
+    """
+    Exporta uma subárvore do simulador para o host. A leitura é feita sobre um
+    snapshot, então a exportação é consistente sem bloquear as escritas
+    Args:
+        fs (FileSystem): Sistema de arquivos de origem
+        host_dir (str): Diretório do host que receberá a árvore
+        source (str): Diretório de origem no simulador
+        workers (int): Threads de gravação
+    Returns:
+        TransferReport: Volume e vazão da exportação, ou None se a origem não existir
+    """
+
+    if not fs.directory_exists(source):
+        return None
+    report = TransferReport('exportação')
+    start = time.perf_counter()
+    snapshot = fs.create_snapshot('exportação')
+    base = source.rstrip("/")
+    window = collections.deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for dir_path, directory in fs.walk(source, snapshot):
+                relative = dir_path[len(base):].strip("/")
+                target_dir = os.path.join(host_dir, *relative.split("/")) if relative else host_dir
+                os.makedirs(target_dir, exist_ok=True)
+                report.directories += 1
+                for file in directory.files:
+                    window.append(pool.submit(_write, os.path.join(target_dir, file.name), file.content))
+                    report.files += 1
+                    while len(window) > workers * 4:
+                        report.bytes += window.popleft().result()
+            while window:
+                report.bytes += window.popleft().result()
+    finally:
+        fs.release_snapshot(snapshot)
+    report.elapsed = time.perf_counter() - start
+    return report
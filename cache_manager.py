@@ -0,0 +1,433 @@
+""" Cache de buffers com escrita adiada (write-back) entre o sistema de arquivos e o armazenamento """
+import collections
+import os
+import threading
+import time
+
+PAGE_SIZE = 4096  # Tamanho das páginas de dados dos arquivos, em bytes
+
+
+class DataStore:
+    """
+    Armazenamento persistente de páginas de dados e registros de metadados.
+
+    Cada item é identificado por uma chave (tupla) e guardado por inteiro. Sem
+    arquivo, os itens ficam em memória (um disco simulado); com arquivo, cada
+    gravação é acrescentada ao final dele e um índice em memória aponta para a
+    versão mais recente. `write_latency` simula o custo de um acesso ao disco.
+    """
+
+    def __init__(self, path=None, write_latency=0.0):
+        """
+        Inicializa o armazenamento
+        Args:
+            path (str): Arquivo onde os itens são gravados (opcional)
+            write_latency (float): Atraso simulado de cada gravação, em segundos
+        """
+
+        self.path = path
+        self.write_latency = write_latency
+        self._items = {}  # Chave -> bytes (em memória) ou (posição, tamanho) no arquivo
+        self._lock = threading.Lock()
+        self._file = open(path, 'w+b') if path is not None else None
+
+        self.reads = 0          # Itens lidos
+        self.writes = 0         # Itens gravados
+        self.deletes = 0        # Itens removidos
+        self.bytes_written = 0  # Bytes gravados
+        self.syncs = 0          # Sincronizações com o disco
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def read(self, key):
+        """
+        Lê um item
+        Args:
+            key (tuple): Chave do item
+        Returns:
+            bytes: Conteúdo do item, ou None se não existir
+        """
+
+        with self._lock:
+            location = self._items.get(key)
+            if location is None:
+                return None
+            self.reads += 1
+            if self._file is None:
+                return location
+            offset, length = location
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def write(self, key, data):
+        """
+        Grava (ou substitui) um item
+        Args:
+            key (tuple): Chave do item
+            data (bytes): Conteúdo do item
+        """
+
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        with self._lock:
+            if self._file is None:
+                self._items[key] = bytes(data)
+            else:
+                offset = self._file.seek(0, os.SEEK_END)
+                self._file.write(data)
+                self._items[key] = (offset, len(data))
+            self.writes += 1
+            self.bytes_written += len(data)
+
+    def delete(self, key):
+        """
+        Remove um item, se existir
+        Args:
+            key (tuple): Chave do item
+        """
+
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        with self._lock:
+            if self._items.pop(key, None) is not None:
+                self.deletes += 1
+
+    def sync(self):
+        """Força a gravação do arquivo em disco"""
+        with self._lock:
+            self.syncs += 1
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Fecha o arquivo, se houver"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        """
+        Retorna as métricas de acesso ao armazenamento
+        Returns:
+            dict: Métricas do armazenamento
+        """
+
+        return {
+            'items': len(self._items),
+            'reads': self.reads,
+            'writes': self.writes,
+            'deletes': self.deletes,
+            'bytes_written': self.bytes_written,
+            'syncs': self.syncs,
+        }
+
+
+class _Buffer:
+    """Item residente no cache"""
+
+    __slots__ = ('data', 'dirty', 'lsn', 'referenced', 'version')
+
+    def __init__(self, data):
+        self.data = data         # Conteúdo (None: remoção pendente)
+        self.dirty = False       # Alterado e ainda não gravado no armazenamento
+        self.lsn = None          # LSN do último registro do journal que alterou o item
+        self.referenced = True   # Bit de referência da política CLOCK
+        self.version = 0         # Incrementada a cada alteração
+
+    @property
+    def size(self):
+        return len(self.data) if self.data is not None else 0
+
+
+class BufferCache:
+    """
+    Cache de buffers com escrita adiada, como o cache manager do Windows.
+
+    As escritas só alteram buffers em memória e os marcam como sujos; um
+    escritor preguiçoso (lazy writer) em segundo plano grava periodicamente
+    uma fração dos buffers sujos mais antigos. Quando o orçamento de memória é
+    excedido, buffers são descartados pela política LRU ou CLOCK (segunda
+    chance); um buffer sujo escolhido para descarte é gravado antes, de forma
+    síncrona. Em qualquer gravação vale a regra do WAL: o registro do journal
+    que sujou o buffer (seu LSN) é forçado para o disco antes dos dados.
+    """
+
+    POLICIES = ('lru', 'clock')
+
+    def __init__(self, store, budget=8 * 1024 * 1024, policy='lru', wal=None,
+                 lazy_write_interval=1.0, lazy_write_fraction=0.125):
+        """
+        Inicializa o cache e inicia o escritor preguiçoso
+        Args:
+            store (DataStore): Armazenamento persistente
+            budget (int): Memória máxima dos buffers residentes, em bytes
+            policy (str): Política de descarte ('lru' ou 'clock')
+            wal (callable): Função chamada com um LSN para torná-lo durável no journal (opcional)
+            lazy_write_interval (float): Intervalo entre passagens do escritor preguiçoso,
+                                         em segundos (None desativa a thread)
+            lazy_write_fraction (float): Fração dos buffers sujos gravada a cada passagem
+        Raises:
+            ValueError: Se a configuração for inválida
+        """
+
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de descarte desconhecida: {policy}")
+        if budget <= 0:
+            raise ValueError("O orçamento de memória do cache deve ser positivo")
+        self.store = store
+        self.budget = budget
+        self.policy = policy
+        self.wal = wal
+        self.lazy_write_fraction = lazy_write_fraction
+        self._buffers = collections.OrderedDict()  # Chave -> _Buffer (ordem de descarte)
+        self._dirty = collections.OrderedDict()    # Chaves sujas, da mais antiga para a mais nova
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()  # Uma gravação em lote por vez, preservando a ordem por chave
+        self._in_flight = set()              # Chaves sendo gravadas fora do bloqueio do cache
+        self.resident_bytes = 0
+        self.dirty_bytes = 0
+
+        # Métricas de acerto e de gravação
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0       # Buffers descartados pelo orçamento de memória
+        self.sync_flushes = 0    # Buffers sujos gravados de forma síncrona no descarte
+        self.lazy_flushes = 0    # Buffers gravados pelo escritor preguiçoso
+        self.flushes = 0         # Total de buffers gravados no armazenamento
+        self.bytes_flushed = 0   # Bytes gravados no armazenamento
+        self.wal_forces = 0      # Vezes em que o journal foi forçado antes de uma gravação
+        self.lazy_passes = 0     # Passagens do escritor preguiçoso
+
+        self._stop = threading.Event()
+        self._writer = None
+        if lazy_write_interval is not None:
+            self._writer = threading.Thread(target=self._lazy_writer, args=(lazy_write_interval,),
+                                            name="lazy-writer", daemon=True)
+            self._writer.start()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    @property
+    def hit_rate(self):
+        """Fração das leituras atendidas pelo cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _touch(self, key, buffer):
+        """Registra um acesso conforme a política de descarte"""
+        if self.policy == 'lru':
+            self._buffers.move_to_end(key)
+        else:
+            buffer.referenced = True
+
+    def read(self, key):
+        """
+        Lê um item pelo cache, buscando no armazenamento em caso de falta
+        Args:
+            key (tuple): Chave do item
+        Returns:
+            bytes: Conteúdo do item, ou None se não existir
+        """
+
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is not None:
+                self.hits += 1
+                self._touch(key, buffer)
+                return buffer.data
+            self.misses += 1
+            data = self.store.read(key)
+            if data is not None:
+                self._insert(key, _Buffer(data))
+            return data
+
+    def write(self, key, data, lsn=None):
+        """
+        Altera um item apenas em memória, marcando-o como sujo
+        Args:
+            key (tuple): Chave do item
+            data (bytes): Novo conteúdo (None remove o item do armazenamento)
+            lsn (int): LSN do registro do journal que descreve a alteração
+        """
+
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = _Buffer(data)
+                self._insert(key, buffer)
+            else:
+                self.resident_bytes += (len(data) if data is not None else 0) - buffer.size
+                if buffer.dirty:
+                    self.dirty_bytes -= buffer.size
+                buffer.data = data
+                self._touch(key, buffer)
+            buffer.version += 1
+            if lsn is not None:
+                buffer.lsn = lsn if buffer.lsn is None else max(buffer.lsn, lsn)
+            if not buffer.dirty:
+                buffer.dirty = True
+                self._dirty[key] = None
+            self.dirty_bytes += buffer.size
+            self._evict()
+
+    def discard(self, key, lsn=None):
+        """Remove um item; a remoção chega ao armazenamento junto com as demais gravações"""
+        self.write(key, None, lsn)
+
+    def _insert(self, key, buffer):
+        """Adiciona um buffer ao cache e aplica o orçamento de memória"""
+        self._buffers[key] = buffer
+        self.resident_bytes += buffer.size
+        self._evict()
+
+    def _evict(self):
+        """Descarta buffers até o cache caber no orçamento (mantendo ao menos um)"""
+        skipped = 0
+        while self.resident_bytes > self.budget and len(self._buffers) > 1 and skipped <= 2 * len(self._buffers):
+            key, buffer = next(iter(self._buffers.items()))
+            if key in self._in_flight or (self.policy == 'clock' and buffer.referenced):
+                # Segunda chance (CLOCK) ou gravação em andamento: o ponteiro avança
+                buffer.referenced = False
+                self._buffers.move_to_end(key)
+                skipped += 1
+                continue
+            if buffer.dirty:
+                self._write_back(key, buffer.data, buffer.lsn)
+                self._mark_clean(key, buffer)
+                self.sync_flushes += 1
+            self._buffers.pop(key, None)
+            self.resident_bytes -= buffer.size
+            self.evictions += 1
+
+    def _write_back(self, key, data, lsn):
+        """Grava um item no armazenamento respeitando a regra do WAL"""
+        if lsn is not None and self.wal is not None:
+            self.wal(lsn)
+            self.wal_forces += 1
+        if data is None:
+            self.store.delete(key)
+        else:
+            self.store.write(key, data)
+        self.flushes += 1
+        self.bytes_flushed += len(data) if data is not None else 0
+
+    def _mark_clean(self, key, buffer):
+        """Marca um buffer como limpo após a gravação"""
+        buffer.dirty = False
+        buffer.lsn = None
+        self.dirty_bytes -= buffer.size
+        del self._dirty[key]
+        if buffer.data is None:  # Remoção concluída: o buffer não tem mais o que guardar
+            self._buffers.pop(key, None)
+
+    def flush_some(self, count=None):
+        """
+        Grava os buffers sujos mais antigos. A gravação no armazenamento acontece
+        fora do bloqueio do cache, então as escritas não esperam por ela; um buffer
+        alterado durante a gravação continua sujo
+        Args:
+            count (int): Buffers a gravar (padrão: todos os sujos)
+        Returns:
+            int: Buffers gravados
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                keys = list(self._dirty)[:count]
+                pending = [(key, self._buffers[key]) for key in keys]
+                pending = [(key, buffer, buffer.version, buffer.data, buffer.lsn) for key, buffer in pending]
+                self._in_flight.update(keys)
+            try:
+                # O journal é forçado uma única vez, até o maior LSN do grupo
+                lsns = [lsn for *_, lsn in pending if lsn is not None]
+                if lsns and self.wal is not None:
+                    self.wal(max(lsns))
+                    self.wal_forces += 1
+                for key, buffer, version, data, _ in pending:
+                    self._write_back(key, data, None)
+                    with self._lock:
+                        self._in_flight.discard(key)
+                        if buffer.dirty and buffer.version == version and self._buffers.get(key) is buffer:
+                            self._mark_clean(key, buffer)
+            finally:
+                with self._lock:
+                    self._in_flight.clear()
+            if pending:
+                self.store.sync()
+            return len(pending)
+
+    def flush(self):
+        """
+        Grava todos os buffers sujos (usado no checkpoint e no fechamento)
+        Returns:
+            int: Buffers gravados
+        """
+
+        written = 0
+        while self._dirty:
+            written += self.flush_some()
+        return written
+
+    def _lazy_writer(self, interval):
+        """Laço do escritor preguiçoso: a cada intervalo grava uma fração dos buffers sujos"""
+        while not self._stop.wait(interval):
+            self.lazy_passes += 1
+            dirty = len(self._dirty)
+            if dirty:
+                self.lazy_flushes += self.flush_some(max(1, int(dirty * self.lazy_write_fraction)))
+
+    def crash(self):
+        """
+        Simula a perda do conteúdo da memória: descarta todos os buffers sem gravá-los
+        Returns:
+            int: Buffers sujos perdidos
+        """
+
+        with self._lock:
+            lost = len(self._dirty)
+            self._buffers.clear()
+            self._dirty.clear()
+            self.resident_bytes = 0
+            self.dirty_bytes = 0
+            return lost
+
+    def close(self):
+        """Para o escritor preguiçoso e grava os buffers sujos"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def stats(self):
+        """
+        Retorna as métricas de acerto e de gravação do cache
+        Returns:
+            dict: Métricas do cache
+        """
+
+        return {
+            'policy': self.policy,
+            'budget_bytes': self.budget,
+            'resident_bytes': self.resident_bytes,
+            'resident_buffers': len(self._buffers),
+            'dirty_bytes': self.dirty_bytes,
+            'dirty_buffers': len(self._dirty),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'sync_flushes': self.sync_flushes,
+            'lazy_flushes': self.lazy_flushes,
+            'lazy_passes': self.lazy_passes,
+            'flushes': self.flushes,
+            'bytes_flushed': self.bytes_flushed,
+            'wal_forces': self.wal_forces,
+        }
@@ -0,0 +1,285 @@
+""" Biblioteca cliente do servidor do simulador, com pipelining e pool de conexões """
+import contextlib
+import itertools
+import queue
+import socket
+import threading
+
+from protocol import HEADER, OPCODES, STATUS_OK, decode_frames, encode_frame
+
+
+class RemoteError(Exception):
+    """Erro ocorrido no servidor ao executar uma operação"""
+
+
+def parse_address(address):
+    """
+    Interpreta um endereço do servidor
+    Args:
+        address (str | tuple): "host:porta", (host, porta) ou caminho de um socket Unix
+    Returns:
+        str | tuple: Caminho do socket Unix ou (host, porta)
+    """
+
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class FileSystemClient:
+    """
+    Conexão com o servidor, com a mesma interface de operações do FileSystem.
+
+    Cada chamada envia um quadro e espera a resposta; `pipeline` envia vários
+    pedidos de uma vez e lê todas as respostas depois, e `batch` agrupa várias
+    operações em um único quadro executado de uma vez no servidor.
+    """
+
+    def __init__(self, address, timeout=30.0):
+        """
+        Conecta ao servidor
+        Args:
+            address (str | tuple): "host:porta", (host, porta) ou caminho de um socket Unix
+            timeout (float): Tempo máximo de espera por uma resposta em segundos
+        """
+
+        address = parse_address(address)
+        family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(address)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._ids = itertools.count(1)
+        self._buffer = bytearray()
+        self._ready = {}  # Id -> (status, valor) de respostas já recebidas
+
+    def close(self):
+        """Fecha a conexão"""
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, requests):
+        """
+        Envia pedidos em uma única escrita
+        Args:
+            requests (list): Tuplas (nome da operação, argumentos)
+        Returns:
+            list: Ids atribuídos aos pedidos
+        """
+
+        ids = []
+        frames = []
+        for name, args in requests:
+            request_id = next(self._ids) & 0xFFFFFFFF
+            ids.append(request_id)
+            frames.append(encode_frame(request_id, OPCODES[name], list(args)))
+        self._sock.sendall(b''.join(frames))
+        return ids
+
+    def _receive(self, request_id):
+        """Lê respostas até obter a do pedido informado"""
+        while request_id not in self._ready:
+            data = self._sock.recv(max(65536, HEADER.size))
+            if not data:
+                raise ConnectionError("Conexão encerrada pelo servidor")
+            self._buffer += data
+            for reply_id, status, value in decode_frames(self._buffer):
+                self._ready[reply_id] = (status, value)
+        status, value = self._ready.pop(request_id)
+        if status != STATUS_OK:
+            raise RemoteError(value)
+        return value
+
+    def call(self, name, *args):
+        """
+        Executa uma operação no servidor
+        Args:
+            name (str): Nome da operação (ex: 'read_file')
+            *args: Argumentos da operação
+        Returns:
+            Resultado da operação
+        Raises:
+            RemoteError: Se a operação falhar no servidor
+        """
+
+        return self._receive(self._send([(name, args)])[0])
+
+    def pipeline(self, requests):
+        """
+        Envia vários pedidos sem esperar as respostas e depois coleta todas
+        Args:
+            requests (list): Tuplas (nome da operação, *argumentos)
+        Returns:
+            list: Resultados na ordem dos pedidos (RemoteError no lugar dos que falharam)
+        """
+
+        ids = self._send([(name, args) for name, *args in requests])
+        results = []
+        for request_id in ids:
+            try:
+                results.append(self._receive(request_id))
+            except RemoteError as e:
+                results.append(e)
+        return results
+
+    def batch(self, requests):
+        """
+        Executa várias operações em um único quadro (uma ida e volta ao servidor)
+        Args:
+            requests (list): Tuplas (nome da operação, *argumentos)
+        Returns:
+            list: Resultados na ordem dos pedidos
+        """
+
+        operations = [[OPCODES[name], list(args)] for name, *args in requests]
+        return self._receive(self._send([('batch', operations)])[0])
+
+    # Operações com a mesma interface do FileSystem
+    def create_file(self, path, content='', user='root'):
+        """Cria um arquivo no servidor"""
+        return self.call('create_file', path, content, user)
+
+    def delete_file(self, path, user='root'):
+        """Remove um arquivo no servidor"""
+        return self.call('delete_file', path, user)
+
+    def read_file(self, path, user='root'):
+        """Lê um arquivo no servidor"""
+        return self.call('read_file', path, user)
+
+    def write_file(self, path, new_content, user='root'):
+        """Sobrescreve um arquivo no servidor"""
+        return self.call('write_file', path, new_content, user)
+
+    def append_to_file(self, path, additional_content, user='root'):
+        """Acrescenta conteúdo a um arquivo no servidor"""
+        return self.call('append_to_file', path, additional_content, user)
+
+    def create_directory(self, path):
+        """Cria um diretório no servidor"""
+        return self.call('create_directory', path)
+
+    def list_directory(self, path):
+        """
+        Lista um diretório no servidor
+        Returns:
+            tuple: (list: subdiretórios, list: arquivos), ou None se não existir
+        """
+
+        listing = self.call('listing', path)
+        return tuple(listing) if listing is not None else None
+
+    def directory_exists(self, path):
+        """Verifica se um diretório existe no servidor"""
+        return self.call('directory_exists', path)
+
+    def access_mask(self, path, user):
+        """Permissão efetiva de um usuário sobre um caminho no servidor"""
+        return self.call('access_mask', path, user)
+
+    def du(self, path="/"):
+        """Uso de espaço de um caminho no servidor"""
+        usage = self.call('du', path)
+        return tuple(usage) if usage is not None else None
+
+    def set_file_permission(self, path, user_alvo, permission, admin='root'):
+        """Altera a ACL de um arquivo no servidor"""
+        return self.call('set_file_permission', path, user_alvo, permission, admin)
+
+    def set_directory_permission(self, path, user_alvo, permission, admin='root'):
+        """Altera a ACL herdável de um diretório no servidor"""
+        return self.call('set_directory_permission', path, user_alvo, permission, admin)
+
+    def checkpoint(self):
+        """Registra um checkpoint no servidor"""
+        return self.call('checkpoint')
+
+
+class ClientPool:
+    """Pool de conexões reutilizáveis, seguro para uso por várias threads"""
+
+    def __init__(self, address, size=16, timeout=30.0):
+        """
+        Inicializa o pool (as conexões são abertas sob demanda)
+        Args:
+            address (str | tuple): Endereço do servidor
+            size (int): Máximo de conexões abertas
+            timeout (float): Tempo máximo de espera por uma resposta em segundos
+        """
+
+        self.address = address
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self.waits = 0  # Vezes em que uma thread esperou por uma conexão livre
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool
+        Yields:
+            FileSystemClient: Conexão exclusiva enquanto o bloco durar
+        """
+
+        client = self._acquire()
+        try:
+            yield client
+        except RemoteError:
+            self._idle.put(client)  # A resposta já foi consumida: a conexão continua sincronizada
+            raise
+        except BaseException:
+            # Falha de rede, de protocolo ou do próprio bloco: a conexão pode ter ficado
+            # no meio de um pedido, então é fechada e a vaga volta a ficar livre
+            client.close()
+            with self._lock:
+                self._opened -= 1
+            raise
+        else:
+            self._idle.put(client)
+
+    def _acquire(self):
+        """Obtém uma conexão livre, abrindo uma nova se o limite permitir"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return FileSystemClient(self.address, self.timeout)
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        with self._lock:
+            self.waits += 1
+        return self._idle.get()
+
+    def call(self, name, *args):
+        """Executa uma operação usando uma conexão do pool"""
+        with self.connection() as client:
+            return client.call(name, *args)
+
+    def close(self):
+        """Fecha as conexões livres do pool"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
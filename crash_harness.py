@@ -0,0 +1,399 @@
+""" Injeção determinística de falhas: recupera o sistema em cada limite de registro e em registros interrompidos """
+import argparse
+import collections
+import random
+import sys
+import time
+
+from benchmark import random_text
+from filesystem import FileSystem
+from merkle import MOD, directory_digest, file_digest
+from permissions import parse_permission
+
+
+def _parent(path):
+    """Caminho do diretório pai ("/" para itens da raiz)"""
+    return path.rpartition("/")[0] or "/"
+
+
+def _name(path):
+    """Nome do item final do caminho"""
+    return path.rpartition("/")[2]
+
+
+class ReferenceModel:
+    """
+    Modelo de referência do sistema de arquivos: apenas dicionários de caminhos,
+    sem árvore, journal, snapshots ou hashes incrementais.
+
+    Cada operação é um gerador que produz (yield) um passo para cada registro
+    que o sistema real grava no journal, de modo que o estado esperado é
+    conhecido em todo limite de registro, inclusive no meio de uma operação
+    que cria diretórios intermediários.
+    """
+
+    def __init__(self):
+        self.dirs = {"/": {}}  # Caminho -> ACL
+        self.files = {}        # Caminho -> (conteúdo, ACL)
+
+    def _exists(self, path):
+        return path in self.dirs or path in self.files
+
+    def _ensure_parents(self, path):
+        """Cria os diretórios intermediários ausentes (um registro 'mkdir' cada)"""
+        parts = path.strip("/").split("/")
+        for depth in range(1, len(parts)):
+            current = "/" + "/".join(parts[:depth])
+            if current not in self.dirs:
+                self.dirs[current] = {}
+                yield
+
+    def create_file(self, path, content='', user='root'):
+        yield from self._ensure_parents(path)
+        if path not in self.files:
+            self.files[path] = (content, {user: parse_permission('rw')})
+            yield
+
+    def create_directory(self, path):
+        yield from self._ensure_parents(path)
+        if path not in self.dirs:
+            self.dirs[path] = {}
+            yield
+
+    def write_file(self, path, new_content, user='root'):
+        if path in self.files:
+            self.files[path] = (new_content, self.files[path][1])
+            yield
+
+    def append_to_file(self, path, additional_content, user='root'):
+        if path in self.files:
+            content, acl = self.files[path]
+            self.files[path] = (content + "\n" + additional_content, acl)
+            yield
+
+    def delete_file(self, path, user='root'):
+        if self.files.pop(path, None) is not None:
+            yield
+
+    def set_file_permission(self, path, user_alvo, permission, admin='admin'):
+        if path in self.files:
+            content, acl = self.files[path]
+            self.files[path] = (content, {**acl, user_alvo: parse_permission(permission)})
+            yield
+
+    def set_directory_permission(self, path, user_alvo, permission, admin='admin'):
+        path = "/" + path.strip("/")
+        if path in self.dirs:
+            self.dirs[path] = {**self.dirs[path], user_alvo: parse_permission(permission)}
+            yield
+
+    def import_batch(self, base, items, user='root'):
+        if base not in self.dirs:
+            yield from self.create_directory(base)
+        prefix = base.rstrip("/")
+        for kind, relative, content in items:
+            path = f"{prefix}/{relative}"
+            if self._exists(path):
+                continue
+            if kind == 'd':
+                self.dirs[path] = {}
+            else:
+                self.files[path] = (content, {user: parse_permission('rw')})
+        yield  # O lote inteiro é um único registro
+
+    def digest(self):
+        """
+        Calcula o hash de Merkle que a árvore real deveria ter neste estado
+        Returns:
+            int: Hash da raiz
+        """
+
+        sums = collections.defaultdict(int)
+        for path, (content, acl) in self.files.items():
+            sums[_parent(path)] += file_digest(_name(path), content, acl)
+        depth = lambda path: 0 if path == "/" else path.count("/")
+        for path in sorted(self.dirs, key=depth, reverse=True):
+            if path == "/":
+                return directory_digest("root", self.dirs[path], sums[path] % MOD)
+            sums[_parent(path)] += directory_digest(_name(path), self.dirs[path], sums[path] % MOD)
+
+    def items(self):
+        """Conjunto comparável de (caminho, é diretório, conteúdo, ACL) do estado"""
+        found = {(path, True, None, tuple(sorted(acl.items()))) for path, acl in self.dirs.items()}
+        found |= {(path, False, content, tuple(sorted(acl.items()))) for path, (content, acl) in self.files.items()}
+        return found
+
+
+def tree_items(fs):
+    """Conjunto comparável de (caminho, é diretório, conteúdo, ACL) da árvore de um sistema de arquivos"""
+    found = set()
+    for dir_path, directory in fs.walk("/"):
+        found.add((dir_path, True, None, tuple(sorted(directory.acl.items()))))
+        prefix = dir_path.rstrip("/")
+        for file in directory.files:
+            found.add((f"{prefix}/{file.name}", False, file.content, tuple(sorted(file.acl.items()))))
+    return found
+
+
+def generate_workload(rng, ops):
+    """
+    Gera uma carga de trabalho determinística sobre um espaço de nomes pequeno, para
+    que as operações colidam (arquivos existentes, ausentes e diretórios intermediários)
+    Args:
+        rng (random.Random): Gerador pseudoaleatório
+        ops (int): Número de operações
+    Returns:
+        list: Tuplas (método do FileSystem, *argumentos)
+    """
+
+    def path():
+        depth = rng.randint(1, 3)
+        parts = [f"d{rng.randrange(3)}", f"s{rng.randrange(3)}"][:depth - 1] + [f"f{rng.randrange(8)}.txt"]
+        return "/" + "/".join(parts)
+
+    workload = []
+    for i in range(ops):
+        choice = rng.random()
+        if choice < 0.25:
+            workload.append(('create_file', path(), random_text(rng, rng.randrange(0, 60))))
+        elif choice < 0.45:
+            workload.append(('write_file', path(), random_text(rng, rng.randrange(0, 60))))
+        elif choice < 0.6:
+            workload.append(('append_to_file', path(), random_text(rng, rng.randrange(1, 10))))
+        elif choice < 0.7:
+            workload.append(('delete_file', path()))
+        elif choice < 0.78:
+            workload.append(('create_directory', f"/d{rng.randrange(3)}/s{rng.randrange(3)}/n{rng.randrange(3)}"))
+        elif choice < 0.86:
+            workload.append(('set_file_permission', path(), rng.choice(['bob', 'equipe']),
+                             rng.choice(['r', 'w', 'rw', 'none']), 'admin'))
+        elif choice < 0.92:
+            workload.append(('set_directory_permission', rng.choice(['/', '/d0', '/d1/s2']),
+                             rng.choice(['bob', 'equipe']), rng.choice(['r', 'rw', 'none']), 'admin'))
+        else:
+            items = [['d', 'sub', None]]
+            items += [['f', f"sub/a{n}.txt" if n % 2 else f"a{n}.txt", random_text(rng, 20)]
+                      for n in range(rng.randint(1, 6))]
+            workload.append(('import_batch', f"/lote{i}", items, 'root'))
+    return workload
+
+
+class CrashReport:
+    """Resultado de uma execução do injetor de falhas"""
+
+    MAX_FAILURES = 20  # Falhas guardadas com detalhes
+
+    def __init__(self):
+        self.operations = 0        # Operações da carga de trabalho
+        self.records = 0           # Registros gravados no journal
+        self.checkpoints = 0       # Checkpoints durante a carga
+        self.forced_checkpoints = 0  # Checkpoints forçados pelo log cheio no meio de uma operação
+        self.boundary_points = 0   # Falhas injetadas em limites de registro
+        self.torn_points = 0       # Falhas injetadas no meio de um registro
+        self.replayed = 0          # Registros reexecutados somando todas as recuperações
+        self.deep_checks = 0       # Recuperações verificadas também com o chkdsk
+        self.failure_count = 0
+        self.failures = []         # (operação, nome, ponto em bytes, descrição)
+        self.elapsed = 0.0
+
+    @property
+    def points(self):
+        """Total de pontos de falha verificados"""
+        return self.boundary_points + self.torn_points
+
+    @property
+    def points_per_sec(self):
+        """Pontos de falha verificados por segundo"""
+        return self.points / self.elapsed if self.elapsed else 0.0
+
+    def fail(self, index, name, point, description):
+        """Registra uma divergência em relação ao modelo de referência"""
+        self.failure_count += 1
+        if len(self.failures) < self.MAX_FAILURES:
+            self.failures.append((index, name, point, description))
+
+    def summary(self):
+        """
+        Formata o relatório para exibição
+        Returns:
+            str: Texto com volumes, vazão e falhas encontradas
+        """
+
+        lines = [
+            f"{self.operations} operações, {self.records} registros, {self.checkpoints} checkpoints "
+            f"({self.forced_checkpoints} forçados)",
+            f"  pontos de falha: {self.points} ({self.boundary_points} em limites de registro, "
+            f"{self.torn_points} em registros interrompidos) em {self.elapsed:.2f} s "
+            f"({self.points_per_sec:.0f}/s)",
+            f"  registros reexecutados: {self.replayed}, verificações com chkdsk: {self.deep_checks}",
+        ]
+        if not self.failure_count:
+            lines.append("  todas as recuperações coincidem com o modelo de referência")
+        else:
+            lines.append(f"  {self.failure_count} divergência(s) em relação ao modelo:")
+            for index, name, point, description in self.failures:
+                lines.append(f"    operação {index} ({name}), byte {point}: {description}")
+        return "\n".join(lines)
+
+
+def run_crash_harness(ops=300, seed=42, checkpoint_every=25, torn_samples=2, every_byte=False,
+                      deep_every=0, log_segment_size=64 * 1024, log_segments=64):
+    """
+    Executa uma carga de trabalho uma única vez e, a cada registro gravado, injeta
+    falhas no limite do registro e no meio dele (registro interrompido: truncado ou
+    seguido de lixo de setores antigos). Cada falha é recuperada em uma cópia (fork)
+    do estado durável, criada em O(1) por copy-on-write, em vez de reexecutar desde
+    o início a parte da carga anterior à falha. Com um log pequeno, os checkpoints
+    forçados no meio das operações também são exercitados: a partir de cada um, o
+    estado durável passa a ser a nova imagem do checkpoint
+    Args:
+        ops (int): Número de operações da carga
+        seed (int): Semente do gerador pseudoaleatório
+        checkpoint_every (int): Operações entre checkpoints (limita o journal reexecutado)
+        torn_samples (int): Posições sorteadas de interrupção dentro de cada registro
+        every_byte (bool): Se True, interrompe cada registro em todas as posições possíveis
+        deep_every (int): A cada quantos pontos verificar também o chkdsk (0 desativa)
+        log_segment_size (int): Tamanho de cada segmento do log em bytes
+        log_segments (int): Segmentos do log (valores pequenos forçam checkpoints)
+    Returns:
+        CrashReport: Pontos verificados e divergências encontradas
+    """
+
+    rng = random.Random(seed)
+    workload = generate_workload(rng, ops)
+    live = FileSystem(verbose=False, log_segment_size=log_segment_size, log_segments=log_segments)
+    model = ReferenceModel()
+    report = CrashReport()
+    report.operations = len(workload)
+    state = model.digest()  # Hash esperado no ponto atual
+    log = bytearray()       # Bytes do log gravados desde o último checkpoint
+    logged = 0              # Registros completos em log
+    appended = []           # Registros da operação em andamento
+    forced = []             # (LSN, estado durável logo após o checkpoint) de cada checkpoint forçado
+    cursor = 0              # LSN a partir do qual os registros da operação ainda não foram coletados
+    start = time.perf_counter()
+
+    pressure = live.journal.on_pressure
+
+    def on_pressure():
+        """Checkpoint forçado: coleta os registros que ele vai liberar e guarda o novo estado durável"""
+        nonlocal cursor
+        appended.extend(live.journal.entries_since(cursor))
+        cursor = live.journal.next_lsn
+        pressure()
+        forced.append((live.journal.checkpoint_lsn, live.fork()))
+
+    live.journal.on_pressure = on_pressure
+
+    def check(base, index, name, data, expected, records):
+        """Recupera uma cópia do estado durável e compara com o modelo"""
+        case = base.fork()
+        point = base.journal.checkpoint_lsn + len(data)
+        try:
+            recovery = case.simulate_crash_and_recovery(log_data=data)
+        except Exception as e:  # Uma recuperação que aborta também é uma divergência
+            report.fail(index, name, point, f"recuperação abortou: {type(e).__name__}: {e}")
+            return
+        else:
+            report.replayed += recovery.entries_done
+            if recovery.entries_done != records:
+                report.fail(index, name, point, f"{recovery.entries_done} registros reexecutados, {records} esperados")
+            elif case.root.digest != expected:
+                report.fail(index, name, point, "árvore recuperada difere do modelo")
+            elif deep_every and report.points % deep_every == 0:
+                report.deep_checks += 1
+                _, problems = case.check_disk()
+                if problems:
+                    report.fail(index, name, point, f"chkdsk: {problems[:3]}")
+        finally:
+            case.close()  # Libera a árvore compartilhada com a origem
+
+    for index, (name, *args) in enumerate(workload):
+        if index and index % checkpoint_every == 0:
+            live.checkpoint()
+            report.checkpoints += 1
+            log.clear()
+            logged = 0
+        base = live.fork()  # Estado durável no início da operação: imagem do checkpoint + log
+        bases = [base]
+        appended.clear()
+        forced.clear()
+        first = cursor = live.journal.next_lsn  # first: ponto informado se a execução divergir do modelo
+        getattr(live, name)(*args)
+        appended.extend(live.journal.entries_since(cursor))
+
+        steps = [state]
+        for _ in getattr(model, name)(*args):
+            steps.append(model.digest())
+        records = list(appended)
+        report.records += len(records)
+        if len(records) != len(steps) - 1:
+            report.fail(index, name, first, f"{len(records)} registros gravados, {len(steps) - 1} esperados pelo modelo")
+        elif live.root.digest != steps[-1]:
+            missing = sorted(model.items() ^ tree_items(live))[:3]
+            report.fail(index, name, first, f"execução difere do modelo: {missing}")
+        else:
+            if not log:  # Falha logo após o checkpoint: log vazio
+                report.boundary_points += 1
+                check(base, index, name, b'', state, 0)
+            for position, entry in enumerate(records):
+                while forced and forced[0][0] <= entry.lsn:
+                    # Checkpoint forçado antes deste registro: nova imagem, log vazio
+                    _, base = forced.pop(0)
+                    bases.append(base)
+                    report.checkpoints += 1
+                    report.forced_checkpoints += 1
+                    log.clear()
+                    logged = 0
+                    report.boundary_points += 1
+                    check(base, index, name, b'', steps[position], 0)
+                data = entry.to_bytes()
+                if every_byte:
+                    cuts = range(1, len(data))
+                else:
+                    cuts = sorted(set(rng.sample(range(1, len(data)), min(torn_samples, len(data) - 1))))
+                for cut in cuts:
+                    report.torn_points += 1
+                    tail = data[:cut]
+                    if report.torn_points % 2:  # Restante do registro com lixo de gravações antigas
+                        tail += bytes(byte ^ rng.randrange(1, 256) for byte in data[cut:])  # Sempre difere do original
+                    check(base, index, name, bytes(log) + tail, steps[position], logged)
+                log += data
+                logged += 1
+                report.boundary_points += 1
+                check(base, index, name, bytes(log), steps[position + 1], logged)
+        for _, forced_base in forced:  # Divergência na execução: os estados não foram verificados
+            bases.append(forced_base)
+        for closed in bases:
+            closed.close()
+        state = model.digest() if len(records) != len(steps) - 1 else steps[-1]
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Injeção de falhas em cada registro do journal")
+    parser.add_argument("--ops", type=int, default=300, help="Operações da carga de trabalho")
+    parser.add_argument("--seed", type=int, default=42, help="Semente pseudoaleatória")
+    parser.add_argument("--checkpoint-every", type=int, default=25, help="Operações entre checkpoints")
+    parser.add_argument("--torn-samples", type=int, default=2,
+                        help="Posições de interrupção sorteadas dentro de cada registro")
+    parser.add_argument("--every-byte", action="store_true",
+                        help="Interrompe cada registro em todas as posições (exaustivo)")
+    parser.add_argument("--deep-every", type=int, default=0,
+                        help="A cada quantos pontos verificar também o chkdsk (0 desativa)")
+    parser.add_argument("--log-segment-size", type=int, default=64 * 1024,
+                        help="Tamanho de cada segmento do log em bytes")
+    parser.add_argument("--log-segments", type=int, default=64,
+                        help="Segmentos do log (ex: --log-segment-size 512 --log-segments 4 "
+                             "força checkpoints no meio das operações)")
+    args = parser.parse_args()
+
+    report = run_crash_harness(args.ops, args.seed, args.checkpoint_every, args.torn_samples,
+                               args.every_byte, args.deep_every, args.log_segment_size, args.log_segments)
+    print(report.summary())
+    sys.exit(1 if report.failure_count else 0)
+
+
+if __name__ == "__main__":
+    main()
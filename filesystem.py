@@ -1,59 +1,166 @@
 """ Sistema de arquivos simulado com journaling para operações de CRUD """
+import copy
+import fnmatch
+import itertools
+import json
+import struct
+import sys
+import time
+import weakref
+import zlib
+
+from cache_manager import PAGE_SIZE, BufferCache
+from journal_codec import JournalCodec, FLAG_DELTA, decode_payload, delta_inserted_length
+from journal_index import JournalIndex
+from logfile import CircularLog
+from merkle import MOD, directory_digest, file_digest, verify_tree
+from metrics import Metrics, timed
+from permissions import PermissionModel, READ, WRITE, parse_permission, format_permission
+from recovery_profiler import RecoveryReport, capture_profile, progress_tracker
+from snapshots import Snapshot, diff_trees
+from usn_journal import (UsnJournal, USN_REASON_DATA_EXTEND, USN_REASON_DATA_OVERWRITE,
+                         USN_REASON_DATA_TRUNCATION, USN_REASON_FILE_CREATE, USN_REASON_FILE_DELETE,
+                         USN_REASON_SECURITY_CHANGE)
+
+_next_ref = itertools.count(1)  # Gerador de números de referência dos nós (como no MFT)
+
+
 class File:
     """Representa um arquivo no sistema de arquivos"""
     
-    def __init__(self, name, content=''):
+    def __init__(self, name, content='', ref=None, gen=0):
         """
         Inicializa um novo arquivo
         Args:
             name (str): Nome do arquivo
             content (str): Conteúdo inicial do arquivo (opcional)
+            ref (int): Número de referência a reutilizar, na recuperação (opcional)
+            gen (int): Geração em que o nó foi criado, para o copy-on-write dos snapshots
         """
         
+        self.ref = ref or next(_next_ref)  # Número de referência do arquivo
         self.name = name
         self.content = content
-        self.acl = {}  # Dicionário de controle de acesso (usuário: permissão)
+        self.acl = {}  # Controle de acesso explícito (usuário ou grupo: máscara de bits)
+        self.gen = gen
+        self.rehash()
+
+    def rehash(self):
+        """Recalcula o hash de Merkle do arquivo (nome, conteúdo e ACL) e seu tamanho em bytes"""
+        self.digest = file_digest(self.name, self.content, self.acl)
+        self.size = len(self.content.encode('utf-8'))
+
+    def usage(self):
+        """
+        Contribuição do arquivo para os agregados do diretório pai
+        Returns:
+            tuple: (int: arquivos, int: diretórios, int: bytes)
+        """
+
+        return 1, 0, self.size
+
+    def clone(self, gen):
+        """
+        Copia o arquivo para alterá-lo sem afetar snapshots (o conteúdo é compartilhado)
+        Args:
+            gen (int): Geração da cópia
+        Returns:
+            File: Cópia com a mesma referência
+        """
+
+        clone = copy.copy(self)
+        clone.acl = dict(self.acl)
+        clone.gen = gen
+        return clone
 
     def set_permission(self, user, permission):
         """
-        Define permissões de acesso para um usuário
+        Define permissões de acesso para um usuário ou grupo
         Args:
-            user (str): Nome do usuário
-            permission (str): Tipo de permissão ('rw', 'r', 'w' ou 'none')
+            user (str): Nome do usuário ou grupo
+            permission (str | int): Permissão ('rw', 'r', 'w' ou 'none') ou máscara de bits
         Raises:
             ValueError: Se a permissão for inválida
         """
         
-        if permission in ['rw', 'r', 'w', 'none']:
-            self.acl[user] = permission
-        else:
-            raise ValueError("Permissão inválida. Use 'rw', 'r', 'w' ou 'none'")
+        self.acl[user] = parse_permission(permission)
 
     def get_permission(self, user):
         """
-        Obtém a permissão de um usuário
+        Obtém a permissão explícita de um usuário ou grupo
         Args:
-            user (str): Nome do usuário
+            user (str): Nome do usuário ou grupo
         Returns:
-            str: Permissão do usuário ou 'none' se não existir
+            int: Máscara de bits da permissão (0 se não existir)
         """
         
-        return self.acl.get(user, 'none')
+        return self.acl.get(user, 0)
 
 
 class Directory:
     """Representa um diretório no sistema de arquivos"""
     
-    def __init__(self, name):
+    def __init__(self, name, ref=None, gen=0):
         """
         Inicializa um novo diretório
         Args:
             name (str): Nome do diretório
+            ref (int): Número de referência a reutilizar, na recuperação (opcional)
+            gen (int): Geração em que o nó foi criado, para o copy-on-write dos snapshots
         """
         
+        self.ref = ref or next(_next_ref)  # Número de referência do diretório
         self.name = name
         self.files = []  # Lista de arquivos no diretório
         self.subdirectories = [] # Lista de subdiretórios
+        self.acl = {}  # ACL herdável pelos itens do diretório (usuário ou grupo: máscara)
+        self.gen = gen
+        self.children_sum = 0  # Soma dos hashes dos filhos (módulo merkle.MOD)
+        self.total_files = 0   # Arquivos na subárvore
+        self.total_dirs = 0    # Subdiretórios na subárvore (sem contar este)
+        self.total_size = 0    # Bytes de conteúdo na subárvore
+        self.rehash()
+
+    def rehash(self):
+        """Recalcula o hash de Merkle do diretório (nome, ACL e soma dos hashes dos filhos)"""
+        self.digest = directory_digest(self.name, self.acl, self.children_sum)
+
+    def usage(self):
+        """
+        Contribuição do diretório (com sua subárvore) para os agregados do diretório pai
+        Returns:
+            tuple: (int: arquivos, int: diretórios, int: bytes)
+        """
+
+        return self.total_files, self.total_dirs + 1, self.total_size
+
+    def clone(self, gen):
+        """
+        Copia o diretório para alterá-lo sem afetar snapshots (os filhos são compartilhados)
+        Args:
+            gen (int): Geração da cópia
+        Returns:
+            Directory: Cópia com a mesma referência
+        """
+
+        clone = copy.copy(self)
+        clone.files = list(self.files)
+        clone.subdirectories = list(self.subdirectories)
+        clone.acl = dict(self.acl)
+        clone.gen = gen
+        return clone
+
+    def set_permission(self, user, permission):
+        """
+        Define a permissão herdável de um usuário ou grupo no diretório
+        Args:
+            user (str): Nome do usuário ou grupo
+            permission (str | int): Permissão ('rw', 'r', 'w' ou 'none') ou máscara de bits
+        Raises:
+            ValueError: Se a permissão for inválida
+        """
+
+        self.acl[user] = parse_permission(permission)
 
     def find_subdir(self, name):
         """
@@ -87,49 +194,684 @@ class Directory:
 class JournalEntry:
     """Registro de uma operação no journal do sistema de arquivos"""
 
-    def __init__(self, action, target, content=None, user=None):
+    # Códigos das ações no formato binário do registro
+    ACTION_CODES = {'create': 1, 'delete': 2, 'write': 3, 'append': 4, 'acl': 5, 'acl_dir': 6, 'mkdir': 7,
+                    'batch': 8}
+    ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+    MAGIC = b'RCRD'
+    _HEADER = struct.Struct('>4sII')  # (assinatura, tamanho do corpo, crc32 do corpo)
+    _BODY = struct.Struct('>BBdQHHI')  # (ação, flags, horário, ref. do nó, tam. alvo, tam. usuário, tam. carga)
+
+    def __init__(self, action, target, content=None, user=None, base=None, codec=None, ref=0):
         """
         Inicializa uma entrada no journal
         Args:
-            action (str): Tipo de operação ('create', 'delete', 'write', 'append')
+            action (str): Tipo de operação ('create', 'delete', 'write', 'append', 'acl', 'acl_dir', 'mkdir', 'batch')
             target (str): Caminho do arquivo/diretório afetado
             content (str): Conteúdo envolvido na operação (opcional)
             user (str): Usuário que realizou a operação (opcional)
+            base (str): Conteúdo anterior do arquivo, para gravar a escrita como delta (opcional)
+            codec (JournalCodec): Codificador da carga (opcional, padrão sem compressão)
+            ref (int): Número de referência do nó criado, para recriá-lo igual na recuperação (opcional)
         """
         
         self.action = action   # Tipo de operação
         self.target = target   # Caminho do alvo  
-        self.content = content # Conteúdo modificado
         self.user = user       # Usuário responsável
+        self.lsn = None        # Posição no log, atribuída ao ser gravada
+        self.timestamp = time.time()  # Horário da operação (epoch em segundos)
+        self.ref = ref         # Referência do nó criado (0 se não se aplica)
+        codec = codec or _PLAIN_CODEC
+        self.flags, self.payload = codec.encode(content, base)  # Conteúdo modificado (codificado)
+
+    @property
+    def content(self):
+        """
+        Conteúdo da operação decodificado
+        Returns:
+            str: Conteúdo original, ou None se a carga for um delta (use decode)
+        """
+
+        if self.flags & FLAG_DELTA:
+            return None
+        return decode_payload(self.flags, self.payload)
+
+    def decode(self, base=None):
+        """
+        Decodifica o conteúdo da operação
+        Args:
+            base (str): Conteúdo anterior do arquivo (necessário para deltas)
+        Returns:
+            str: Conteúdo completo gravado pela operação
+        """
+
+        return decode_payload(self.flags, self.payload, base)
+
+    def preview(self, limit=20):
+        """
+        Gera uma prévia curta do conteúdo para exibição
+        Args:
+            limit (int): Número máximo de caracteres exibidos
+        Returns:
+            str: Prévia do conteúdo
+        """
+
+        if self.flags & FLAG_DELTA:
+            return f"<delta: {delta_inserted_length(self.flags, self.payload)} caracteres novos>"
+        content = self.content
+        if content is not None and len(content) > limit:
+            return content[:limit] + "..."
+        return content
+
+    @property
+    def size(self):
+        """
+        Tamanho do registro serializado em bytes
+        Returns:
+            int: Número de bytes ocupados no journal
+        """
+
+        return (self._HEADER.size + self._BODY.size + len(self.target.encode('utf-8'))
+                + len((self.user or '').encode('utf-8')) + len(self.payload))
+
+    def to_bytes(self):
+        """
+        Serializa a entrada no formato binário do journal
+        Returns:
+            bytes: Registro serializado (cabeçalho + corpo)
+        """
+
+        target = self.target.encode('utf-8')
+        user = (self.user or '').encode('utf-8')
+        body = (self._BODY.pack(self.ACTION_CODES[self.action], self.flags, self.timestamp, self.ref,
+                                len(target), len(user), len(self.payload))
+                + target + user + self.payload)
+        return self._HEADER.pack(self.MAGIC, len(body), zlib.crc32(body)) + body
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """
+        Desserializa uma entrada a partir de bytes do journal
+        Args:
+            data (bytes): Buffer contendo registros serializados
+            offset (int): Posição inicial do registro no buffer
+        Returns:
+            tuple: (JournalEntry: entrada lida, int: posição após o registro)
+        Raises:
+            ValueError: Se o registro estiver incompleto ou corrompido
+        """
+
+        if len(data) - offset < cls._HEADER.size:
+            raise ValueError("Registro do journal incompleto")
+        magic, length, crc = cls._HEADER.unpack_from(data, offset)
+        start = offset + cls._HEADER.size
+        body = bytes(data[start:start + length])
+        if magic != cls.MAGIC or len(body) != length or zlib.crc32(body) != crc:
+            raise ValueError("Registro do journal corrompido")
+        code, flags, timestamp, ref, target_len, user_len, payload_len = cls._BODY.unpack_from(body)
+        pos = cls._BODY.size
+        entry = cls.__new__(cls)
+        entry.action = cls.ACTION_NAMES[code]
+        entry.target = body[pos:pos + target_len].decode('utf-8')
+        pos += target_len
+        entry.user = body[pos:pos + user_len].decode('utf-8') or None
+        pos += user_len
+        entry.flags = flags
+        entry.payload = body[pos:pos + payload_len]
+        entry.lsn = None
+        entry.timestamp = timestamp
+        entry.ref = ref
+        return entry, start + length
+
+    @classmethod
+    def read_log(cls, data, lsn=0):
+        """
+        Lê os registros de um trecho do log até o fim ou até o primeiro registro
+        incompleto ou corrompido (gravação interrompida por uma falha)
+        Args:
+            data (bytes): Bytes do log, começando no início de um registro
+            lsn (int): LSN do primeiro registro
+        Returns:
+            tuple: (list: entradas lidas, com seus LSNs, int: bytes válidos lidos)
+        """
+
+        entries = []
+        offset = 0
+        while offset < len(data):
+            try:
+                entry, end = cls.from_bytes(data, offset)
+            except ValueError:
+                break
+            entry.lsn = lsn + offset
+            entries.append(entry)
+            offset = end
+        return entries, offset
+
+
+# Codificador usado quando nenhum é informado: grava o conteúdo sem alterações
+_PLAIN_CODEC = JournalCodec(algorithm='none', delta=False)
 
 
 class FileSystem:
     """Sistema de arquivos simulado com funcionalidades básicas e journaling"""
 
-    def __init__(self):
-        """Inicializa o sistema de arquivos com diretório raiz e journal vazio"""
+    def __init__(self, journal_codec=None, verbose=True, log_segment_size=64 * 1024,
+                 log_segments=16, log_path=None, permissions=None, metrics=None,
+                 usn_max_records=100_000, data_store=None, cache_budget=8 * 1024 * 1024,
+                 cache_policy='lru', lazy_write_interval=1.0):
+        """
+        Inicializa o sistema de arquivos com diretório raiz e journal vazio
+        Args:
+            journal_codec (JournalCodec): Codificador das cargas do journal (opcional)
+            verbose (bool): Se as operações devem imprimir mensagens
+            log_segment_size (int): Tamanho de cada segmento do log circular em bytes
+            log_segments (int): Número de segmentos do log circular
+            log_path (str): Arquivo de tamanho fixo para gravar o log (opcional)
+            permissions (PermissionModel): Modelo de permissões e grupos (opcional)
+            metrics (Metrics): Registro de métricas das operações (opcional)
+            usn_max_records (int): Retenção do journal de mudanças (USN), em registros
+            data_store (DataStore): Armazenamento onde dados e metadados são persistidos,
+                                    por meio de um cache com escrita adiada (opcional)
+            cache_budget (int): Memória máxima do cache de buffers, em bytes
+            cache_policy (str): Política de descarte do cache ('lru' ou 'clock')
+            lazy_write_interval (float): Intervalo do escritor preguiçoso do cache, em segundos
+        """
         self.root = Directory("root") # Diretório raiz
-        self.journal = []             # Lista de operações registradas
+        self.journal = CircularLog(log_segment_size, log_segments,  # Log circular de operações
+                                   on_pressure=self.checkpoint, path=log_path)
+        self._gen = 0       # Geração atual: nós com gen maior que self._frozen podem ser alterados
+        self._frozen = -1   # Maior geração congelada por algum snapshot (-1 se nenhum)
+        self.snapshots = {}  # Id -> Snapshot criado pelo usuário
+        self._snapshot_ids = itertools.count(1)
+        self._checkpoint_snapshot = None  # Snapshot interno com a imagem do último checkpoint
+        self._fork_pins = {}  # Id -> snapshot interno com a árvore compartilhada com uma cópia (fork)
+        self._fork_ids = itertools.count(1)
+        self._fork_release = None  # Libera o vínculo com o sistema de origem, em cópias criadas por fork
+        self.journal_index = JournalIndex(self.journal.find)  # Índices por usuário, caminho e tempo
+        self.codec = journal_codec or JournalCodec()  # Delta + compressão das cargas
+        self.permissions = permissions or PermissionModel()  # ACLs, grupos e cache
+        self.verbose = verbose
+        self.metrics = metrics or Metrics()  # Contadores e latências das operações
+        self._recovery = None  # Relatório da recuperação em andamento
+        self.usn = UsnJournal(usn_max_records)  # Journal de mudanças para consumidores externos
+        self.cache = None  # Cache de buffers entre a árvore e o armazenamento (se houver)
+        self._unlogged_dirs = []  # Diretórios intermediários recriados na recuperação, a persistir
+        if data_store is not None:
+            self.cache = BufferCache(data_store, cache_budget, cache_policy, wal=self.journal.force,
+                                     lazy_write_interval=lazy_write_interval)
+            self._persist(self.root, None, None)
+        self._register_gauges()
+
+    def _register_gauges(self):
+        """Registra os medidores calculados a partir do estado atual"""
+        gauges = {
+            'journal_records': lambda: len(self.journal),
+            'journal_bytes': lambda: self.journal.used_bytes,
+            'journal_capacity_bytes': lambda: self.journal.capacity,
+            'journal_bytes_written': lambda: self.journal.next_lsn,
+            'journal_forced_checkpoints': lambda: self.journal.forced_checkpoints,
+            'journal_compression_ratio': self.codec.compression_ratio,
+            'tree_nodes': lambda: self.root.total_files + self.root.total_dirs + 1,
+            'permission_cache_hits': lambda: self.permissions.cache_hits,
+            'permission_cache_misses': lambda: self.permissions.cache_misses,
+            'usn_records': lambda: len(self.usn),
+            'usn_next': lambda: self.usn.next_usn,
+            'snapshots': lambda: len(self.snapshots),
+        }
+        if self.cache is not None:
+            gauges.update({
+                'cache_hit_rate': lambda: self.cache.hit_rate,
+                'cache_resident_bytes': lambda: self.cache.resident_bytes,
+                'cache_dirty_bytes': lambda: self.cache.dirty_bytes,
+                'cache_evictions': lambda: self.cache.evictions,
+                'cache_flushes': lambda: self.cache.flushes,
+                'cache_sync_flushes': lambda: self.cache.sync_flushes,
+                'cache_lazy_flushes': lambda: self.cache.lazy_flushes,
+                'journal_wal_forces': lambda: self.journal.forces,
+            })
+        for name, function in gauges.items():
+            self.metrics.register_gauge(name, function)
+        # Percorre a árvore e todo o journal: só é calculado quando pedido explicitamente
+        self.metrics.register_gauge('memory_estimate_bytes',
+                                    lambda: self._tree_stats()[1] + self._journal_memory(), on_demand=True)
+
+    def _tree_stats(self):
+        """
+        Percorre a árvore contando nós e estimando a memória ocupada
+        Returns:
+            tuple: (int: número de nós, int: bytes estimados)
+        """
+
+        nodes = 0
+        memory = 0
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            nodes += 1
+            memory += sys.getsizeof(directory) + sys.getsizeof(directory.__dict__) + \
+                sys.getsizeof(directory.files) + sys.getsizeof(directory.subdirectories)
+            for file in directory.files:
+                nodes += 1
+                memory += sys.getsizeof(file) + sys.getsizeof(file.__dict__) + \
+                    sys.getsizeof(file.content) + sys.getsizeof(file.acl)
+            pending.extend(directory.subdirectories)
+        return nodes, memory
+
+    def _journal_memory(self):
+        """Estima a memória ocupada pelos registros retidos no journal"""
+        return sum(sys.getsizeof(entry) + sys.getsizeof(entry.__dict__) + sys.getsizeof(entry.payload)
+                   for segment in self.journal.segments for entry in segment)
+
+    def _log(self, message):
+        """Imprime uma mensagem de operação, se o modo verboso estiver ativo"""
+        if self.verbose:
+            print(message)
+
+    def _journal_append(self, entry):
+        """
+        Grava um registro no journal e o adiciona aos índices
+        Args:
+            entry (JournalEntry): Registro a ser gravado
+        Returns:
+            int: LSN do registro
+        """
+
+        self.journal.append(entry)
+        self.journal_index.add(entry)
+        return entry.lsn
+
+    def _journal_fits(self, entry, name):
+        """
+        Verifica se um registro cabe no journal antes de aplicar a operação
+        Args:
+            entry (JournalEntry): Registro que seria gravado
+            name (str): Nome do arquivo ou diretório afetado (para a mensagem)
+        Returns:
+            bool: True se o registro cabe; caso contrário a operação é recusada
+        """
+
+        if entry.size <= self.journal.max_record_size:
+            return True
+        self._log(f"Conteúdo de '{name}' ocupa {entry.size} bytes no journal e excede o "
+                  f"limite de {self.journal.max_record_size} bytes por registro.")
+        return False
 
-    def _navigate_to_dir(self, path):
+    def _persist(self, node, parent_dir, lsn, old_content=None):
         """
-        Navega até o diretório pai do caminho especificado
+        Grava no cache de buffers o registro de metadados de um nó e, se for um
+        arquivo, as páginas de dados que mudaram. Nada chega ao armazenamento
+        aqui: o escritor preguiçoso grava depois, após o registro do journal
+        Args:
+            node (File | Directory): Nó criado ou alterado
+            parent_dir (Directory): Diretório pai (None para a raiz)
+            lsn (int): LSN do registro do journal que descreve a mudança
+            old_content (str): Conteúdo anterior do arquivo (None grava todas as páginas)
+        """
+
+        if self.cache is None:
+            return
+        while self._unlogged_dirs:  # Diretórios intermediários recriados pelo registro reexecutado
+            directory, parent = self._unlogged_dirs.pop()
+            self._persist(directory, parent, lsn)
+        record = {'name': node.name, 'parent': parent_dir.ref if parent_dir else 0,
+                  'dir': isinstance(node, Directory), 'acl': node.acl}
+        if isinstance(node, File):
+            record['size'] = node.size
+        self.cache.write(('meta', node.ref), json.dumps(record, ensure_ascii=False).encode('utf-8'), lsn)
+        if isinstance(node, Directory):
+            return
+        data = node.content.encode('utf-8')
+        old = old_content.encode('utf-8') if old_content is not None else None
+        for offset in range(0, len(data), PAGE_SIZE):
+            page = data[offset:offset + PAGE_SIZE]
+            if old is None or old[offset:offset + PAGE_SIZE] != page:
+                self.cache.write(('data', node.ref, offset // PAGE_SIZE), page, lsn)
+        if old is not None:
+            for offset in range(len(data) + (-len(data)) % PAGE_SIZE, len(old), PAGE_SIZE):
+                self.cache.discard(('data', node.ref, offset // PAGE_SIZE), lsn)
+
+    def _unpersist(self, file, lsn):
+        """Remove do armazenamento, pelo cache, o registro e as páginas de um arquivo excluído"""
+        if self.cache is None:
+            return
+        self.cache.discard(('meta', file.ref), lsn)
+        for page in range(-(-file.size // PAGE_SIZE)):
+            self.cache.discard(('data', file.ref, page), lsn)
+
+    def _read_data(self, file):
+        """Lê o conteúdo de um arquivo página a página pelo cache de buffers"""
+        pages = range(-(-file.size // PAGE_SIZE))
+        return b''.join(self.cache.read(('data', file.ref, page)) for page in pages).decode('utf-8')
+
+    def _record_change(self, node, parent_dir, reason):
+        """
+        Registra uma mudança no journal USN (exceto durante a recuperação, que só
+        reconstrói um estado cujas mudanças já foram registradas)
+        Args:
+            node (File | Directory): Item alterado
+            parent_dir (Directory): Diretório pai do item
+            reason (int): Máscara de motivos USN_REASON_*
+        """
+
+        if self._recovery is None:
+            self.usn.record(node.ref, parent_dir.ref, node.name, reason, isinstance(node, Directory))
+
+    def query_journal(self, user=None, path=None, since=None, until=None, offset=0, limit=None,
+                      reverse=False):
+        """
+        Consulta os registros ativos do journal usando os índices secundários
+        Args:
+            user (str): Usuário responsável (opcional)
+            path (str): Prefixo de caminho do alvo (opcional)
+            since (float): Horário inicial, inclusivo, em epoch (opcional)
+            until (float): Horário final, exclusivo, em epoch (opcional)
+            offset (int): Quantidade de registros a pular (paginação)
+            limit (int): Quantidade máxima de registros retornados (opcional)
+            reverse (bool): Se True, retorna do mais recente para o mais antigo
+        Returns:
+            list: Registros (JournalEntry) que atendem aos filtros
+        """
+
+        lsns = self.journal_index.query(user, path, since, until, reverse)
+        stop = None if limit is None else offset + limit
+        return [self.journal.find(lsn) for lsn in itertools.islice(lsns, offset, stop)]
+
+    def _own_dir(self, directory, parent_dir):
+        """
+        Garante que um diretório possa ser alterado, copiando-o se estiver
+        compartilhado com algum snapshot e trocando a cópia no diretório pai
+        Args:
+            directory (Directory): Diretório a alterar
+            parent_dir (Directory): Diretório pai já próprio (None para a raiz)
+        Returns:
+            Directory: O próprio diretório ou sua cópia
+        """
+
+        if directory.gen > self._frozen:
+            return directory
+        clone = directory.clone(self._gen)
+        if parent_dir is None:
+            self.root = clone
+        else:
+            siblings = parent_dir.subdirectories
+            siblings[next(i for i, d in enumerate(siblings) if d is directory)] = clone
+        return clone
+
+    def _own_file(self, file, parent_dir):
+        """
+        Garante que um arquivo possa ser alterado, copiando-o se estiver compartilhado com algum snapshot
+        Args:
+            file (File): Arquivo a alterar
+            parent_dir (Directory): Diretório pai já próprio
+        Returns:
+            File: O próprio arquivo ou sua cópia
+        """
+
+        if file.gen > self._frozen:
+            return file
+        clone = file.clone(self._gen)
+        files = parent_dir.files
+        files[next(i for i, f in enumerate(files) if f is file)] = clone
+        return clone
+
+    def _own_chain(self, chain):
+        """
+        Copia (path copying) os diretórios do caminho compartilhados com snapshots
+        Args:
+            chain (list): Diretórios da raiz até o pai do item a alterar
+        Returns:
+            list: Diretórios do caminho, todos alteráveis
+        """
+
+        owned = []
+        parent_dir = None
+        for directory in chain:
+            parent_dir = self._own_dir(directory, parent_dir)
+            owned.append(parent_dir)
+        return owned
+
+    def _propagate(self, chain, old_digest, new_digest, delta=(0, 0, 0)):
+        """
+        Atualiza os hashes de Merkle e os agregados dos diretórios do caminho após a
+        mudança de um filho, em O(profundidade): cada nível troca o hash antigo do
+        filho pelo novo em sua soma e acumula a variação de arquivos, diretórios e bytes
+        Args:
+            chain (list): Diretórios (já alteráveis) da raiz até o pai do item alterado
+            old_digest (int): Hash anterior do item (0 se foi criado)
+            new_digest (int): Hash atual do item (0 se foi removido)
+            delta (tuple): Variação (arquivos, diretórios, bytes) da subárvore do item
+        """
+
+        files, dirs, size = delta
+        for directory in reversed(chain):
+            if old_digest == new_digest and not (files or dirs or size):
+                return
+            directory.total_files += files
+            directory.total_dirs += dirs
+            directory.total_size += size
+            directory.children_sum = (directory.children_sum - old_digest + new_digest) % MOD
+            old_digest = directory.digest
+            directory.rehash()
+            new_digest = directory.digest
+
+    def _attach(self, chain, node):
+        """Contabiliza um arquivo ou diretório recém-adicionado ao último diretório do caminho"""
+        self._propagate(chain, 0, node.digest, node.usage())
+
+    def _detach(self, chain, node):
+        """Descontabiliza um arquivo ou diretório removido do último diretório do caminho"""
+        files, dirs, size = node.usage()
+        self._propagate(chain, node.digest, 0, (-files, -dirs, -size))
+
+    def _rehash(self, node, chain):
+        """
+        Recalcula o hash (e o tamanho) de um nó alterado e o propaga pelos diretórios do caminho
+        Args:
+            node (File | Directory): Nó cujo nome, conteúdo ou ACL mudou
+            chain (list): Diretórios (já alteráveis) da raiz até o pai do nó
+        """
+
+        old_digest = node.digest
+        old_size = node.usage()[2]
+        node.rehash()
+        self._propagate(chain, old_digest, node.digest, (0, 0, node.usage()[2] - old_size))
+
+    @timed('resolve_path')
+    def _walk(self, path, create=False, root=None):
+        """
+        Percorre o caminho até o diretório pai, guardando os diretórios visitados
         Args:
             path (str): Caminho completo (ex: "/dir1/dir2/arquivo")
+            create (bool): Se True, cria os diretórios intermediários ausentes (registrando
+                           cada um no journal) e deixa o caminho pronto para alteração
+                           (copy-on-write)
+            root (Directory): Raiz a percorrer (padrão: árvore atual; ex: raiz de um snapshot)
         Returns:
-            tuple: (Directory: diretório pai, str: nome do item final)
+            tuple: (list: diretórios da raiz até o pai, ou None se algum não existir,
+                    str: nome do item final)
         """
-        
+
         parts = path.strip("/").split("/")
-        current = self.root
-        for part in parts[:-1]:  # Navega até o penúltimo item
+        if create:
+            current = self._own_dir(self.root, None)
+        else:
+            current = self.root if root is None else root
+        chain = [current]
+        for depth, part in enumerate(parts[:-1], 1):  # Navega até o penúltimo item
             next_dir = current.find_subdir(part)
             if not next_dir:
-                next_dir = Directory(part)  # Cria diretórios intermediários se não existirem
+                if not create:
+                    return None, parts[-1]
+                next_dir = Directory(part, gen=self._gen)  # Cria diretórios intermediários se não existirem
+                if self._recovery is None:
+                    # Registrado com sua referência, para a recuperação recriá-lo idêntico
+                    lsn = self._journal_append(JournalEntry('mkdir', "/" + "/".join(parts[:depth]),
+                                                            codec=self.codec, ref=next_dir.ref))
+                    chain = self._own_chain(chain)  # Um checkpoint forçado pode ter congelado o caminho
+                    current = chain[-1]
                 current.subdirectories.append(next_dir)
+                self._attach(chain, next_dir)
+                self._record_change(next_dir, current, USN_REASON_FILE_CREATE)
+                if self._recovery is None:
+                    self._persist(next_dir, current, lsn)
+                elif self.cache is not None:  # Persistido com o LSN do registro reexecutado
+                    self._unlogged_dirs.append((next_dir, current))
+            elif create:
+                next_dir = self._own_dir(next_dir, current)
             current = next_dir
-        return current, parts[-1]  # Retorna diretório pai e nome do item final
+            chain.append(current)
+        return chain, parts[-1]  # Retorna os diretórios visitados e o nome do item final
+
+    def _snapshot_root(self, snapshot):
+        """
+        Obtém a raiz a ser lida: a árvore atual ou a de um snapshot
+        Args:
+            snapshot (int): Id do snapshot (None para a árvore atual)
+        Returns:
+            Directory: Raiz correspondente, ou None se o snapshot não existir
+        """
+
+        if snapshot is None:
+            return self.root
+        found = self.snapshots.get(snapshot)
+        if found is None:
+            self._log(f"Snapshot '{snapshot}' não encontrado.")
+            return None
+        return found.root
+
+    def _lookup_file(self, path, root=None):
+        """
+        Localiza um arquivo sem alterar a árvore
+        Args:
+            path (str): Caminho do arquivo
+            root (Directory): Raiz a percorrer (padrão: árvore atual)
+        Returns:
+            tuple: (list: diretórios da raiz até o pai ou None, str: nome, File: arquivo ou None)
+        """
+
+        chain, name = self._walk(path, root=root)
+        return chain, name, chain[-1].find_file(name) if chain else None
+
+    def find_file(self, path, snapshot=None):
+        """
+        Localiza um arquivo pelo caminho
+        Args:
+            path (str): Caminho do arquivo
+            snapshot (int): Id do snapshot a consultar (padrão: árvore atual)
+        Returns:
+            File: Arquivo encontrado, ou None
+        """
+
+        root = self._snapshot_root(snapshot)
+        if root is None:
+            return None
+        return self._lookup_file(path, root)[2]
+
+    def find_directory(self, path, snapshot=None):
+        """
+        Localiza um diretório pelo caminho
+        Args:
+            path (str): Caminho do diretório
+            snapshot (int): Id do snapshot a consultar (padrão: árvore atual)
+        Returns:
+            Directory: Diretório encontrado, ou None
+        """
+
+        root = self._snapshot_root(snapshot)
+        if root is None:
+            return None
+        chain, dirname = self._walk(path, root=root)
+        if chain is None:
+            return None
+        return chain[-1].find_subdir(dirname) if dirname else chain[-1]
 
+    def walk(self, path="/", snapshot=None):
+        """
+        Percorre a subárvore em pré-ordem, sob demanda. A memória usada é proporcional
+        à profundidade, não ao tamanho da árvore; para uma visão estável enquanto
+        outras operações alteram a árvore, percorra um snapshot
+        Args:
+            path (str): Diretório inicial
+            snapshot (int): Id do snapshot a percorrer (padrão: árvore atual)
+        Yields:
+            tuple: (str: caminho do diretório, Directory: diretório)
+        """
+
+        top = self.find_directory(path, snapshot)
+        if top is None:
+            return
+        base = "/" + path.strip("/") if path.strip("/") else ""
+        yield base or "/", top
+        stack = [(base, iter(top.subdirectories))]
+        while stack:
+            dir_path, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            child_path = f"{dir_path}/{child.name}"
+            yield child_path, child
+            stack.append((child_path, iter(child.subdirectories)))
+
+    def find(self, pattern, path="/", snapshot=None):
+        """
+        Busca arquivos e diretórios cujo nome corresponde a um padrão (ex: "*.txt")
+        Args:
+            pattern (str): Padrão no estilo do shell (fnmatch)
+            path (str): Diretório inicial da busca
+            snapshot (int): Id do snapshot a consultar (padrão: árvore atual)
+        Yields:
+            tuple: (str: caminho, File | Directory: item encontrado)
+        """
+
+        for dir_path, directory in self.walk(path, snapshot):
+            prefix = dir_path.rstrip("/")
+            for subdir in directory.subdirectories:
+                if fnmatch.fnmatchcase(subdir.name, pattern):
+                    yield f"{prefix}/{subdir.name}", subdir
+            for file in directory.files:
+                if fnmatch.fnmatchcase(file.name, pattern):
+                    yield f"{prefix}/{file.name}", file
+
+    def du(self, path="/", snapshot=None):
+        """
+        Uso de espaço de um arquivo ou subárvore, em O(1) graças aos agregados dos diretórios
+        Args:
+            path (str): Caminho do arquivo ou diretório
+            snapshot (int): Id do snapshot a consultar (padrão: árvore atual)
+        Returns:
+            tuple: (int: arquivos, int: diretórios, int: bytes), ou None se o caminho não existir
+        """
+
+        if self._snapshot_root(snapshot) is None:
+            return None
+        node = self.find_directory(path, snapshot) or self.find_file(path, snapshot)
+        if node is None:
+            return None
+        if isinstance(node, Directory):
+            return node.total_files, node.total_dirs, node.total_size
+        return node.usage()
+
+    def access_mask(self, path, user):
+        """
+        Calcula a permissão efetiva de um usuário sobre um arquivo ou diretório
+        Args:
+            path (str): Caminho do arquivo ou diretório
+            user (str): Nome do usuário
+        Returns:
+            int: Máscara de bits efetiva (0 se o caminho não existir)
+        """
+
+        chain, name = self._walk(path)
+        if chain is None:
+            return 0
+        node = chain[-1].find_file(name) or chain[-1].find_subdir(name)
+        if node is None:
+            return 0
+        return self.permissions.effective(user, node, chain)
+
+    @timed('create_file')
     def create_file(self, path, content='', user='root'):
         """
         Cria um novo arquivo
@@ -139,16 +881,27 @@ class FileSystem:
             user (str): Usuário criador
         """
         
-        parent_dir, filename = self._navigate_to_dir(path)
+        chain, filename = self._walk(path, create=True)
+        parent_dir = chain[-1]
         if parent_dir.find_file(filename):
-            print(f"Arquivo '{filename}' já existe.")
+            self._log(f"Arquivo '{filename}' já existe.")
             return
-        new_file = File(filename, content)
+        new_file = File(filename, content, gen=self._gen)
+        entry = JournalEntry('create', path, content, user, codec=self.codec, ref=new_file.ref)
+        if not self._journal_fits(entry, filename):
+            return
+        lsn = self._journal_append(entry)
+        chain = self._own_chain(chain)  # Um checkpoint forçado pelo registro pode ter congelado o caminho
+        parent_dir = chain[-1]
         new_file.set_permission(user, 'rw')  # Permissão padrão: leitura e escrita
+        new_file.rehash()
         parent_dir.files.append(new_file)
-        self.journal.append(JournalEntry('create', path, content, user))
-        print(f"[{user}] Arquivo '{filename}' criado.")
+        self._attach(chain, new_file)
+        self._persist(new_file, parent_dir, lsn)
+        self._record_change(new_file, parent_dir, USN_REASON_FILE_CREATE)
+        self._log(f"[{user}] Arquivo '{filename}' criado.")
 
+    @timed('delete_file')
     def delete_file(self, path, user='root'):
         """
         Remove um arquivo
@@ -157,37 +910,52 @@ class FileSystem:
             user (str): Usuário solicitante
         """
         
-        parent_dir, filename = self._navigate_to_dir(path)
-        file = parent_dir.find_file(filename)
+        chain, filename, file = self._lookup_file(path)
         if not file:
-            print(f"Arquivo '{filename}' não encontrado.")
+            self._log(f"Arquivo '{filename}' não encontrado.")
             return
-        if file.get_permission(user) not in ['rw', 'w']:
-            print(f"[{user}] Sem permissão para deletar '{filename}'.")
+        if not self.permissions.allowed(user, file, chain, WRITE):
+            self._log(f"[{user}] Sem permissão para deletar '{filename}'.")
             return
+        # A recuperação só precisa do caminho: o conteúdo antigo não é registrado
+        lsn = self._journal_append(JournalEntry('delete', path, user=user, codec=self.codec, ref=file.ref))
+        chain = self._own_chain(chain)
+        parent_dir = chain[-1]
         parent_dir.files.remove(file)
-        self.journal.append(JournalEntry('delete', path, file.content, user))
-        print(f"[{user}] Arquivo '{filename}' deletado.")
+        self._detach(chain, file)
+        self._unpersist(file, lsn)
+        self._record_change(file, parent_dir, USN_REASON_FILE_DELETE)
+        self._log(f"[{user}] Arquivo '{filename}' deletado.")
 
-    def read_file(self, path, user='root'):
+    @timed('read_file')
+    def read_file(self, path, user='root', snapshot=None):
         """
         Lê o conteúdo de um arquivo
         Args:
             path (str): Caminho do arquivo
             user (str): Usuário solicitante
+            snapshot (int): Id do snapshot a ler (padrão: árvore atual)
+        Returns:
+            str: Conteúdo do arquivo, ou None se não encontrado ou sem permissão
         """
         
-        parent_dir, filename = self._navigate_to_dir(path)
-        file = parent_dir.find_file(filename)
+        root = self._snapshot_root(snapshot)
+        if root is None:
+            return
+        chain, filename, file = self._lookup_file(path, root)
         if not file:
-            print(f"Arquivo '{filename}' não encontrado.")
+            self._log(f"Arquivo '{filename}' não encontrado.")
             return
-        perm = file.get_permission(user)
-        if perm in ['r', 'rw']:
-            print(f"[{user}] Conteúdo de '{filename}': {file.content}")
+        if self.permissions.allowed(user, file, chain, READ, cached=snapshot is None):
+            content = file.content
+            if self.cache is not None and snapshot is None:
+                content = self._read_data(file)
+            self._log(f"[{user}] Conteúdo de '{filename}': {content}")
+            return content
         else:
-            print(f"[{user}] Sem permissão para leitura.")
+            self._log(f"[{user}] Sem permissão para leitura.")
 
+    @timed('write_file')
     def write_file(self, path, new_content, user='root'):
         """
         Sobrescreve o conteúdo de um arquivo
@@ -197,19 +965,33 @@ class FileSystem:
             user (str): Usuário solicitante
         """
         
-        parent_dir, filename = self._navigate_to_dir(path)
-        file = parent_dir.find_file(filename)
+        chain, filename, file = self._lookup_file(path)
         if not file:
-            print(f"Arquivo '{filename}' não encontrado.")
+            self._log(f"Arquivo '{filename}' não encontrado.")
             return
-        perm = file.get_permission(user)
-        if perm in ['w', 'rw']:
+        if self.permissions.allowed(user, file, chain, WRITE):
+            entry = JournalEntry('write', path, new_content, user, base=file.content, codec=self.codec)
+            if not self._journal_fits(entry, filename):
+                return
+            lsn = self._journal_append(entry)
+            chain = self._own_chain(chain)
+            parent_dir = chain[-1]
+            file = self._own_file(file, parent_dir)
+            reason = USN_REASON_DATA_OVERWRITE
+            if len(new_content) > len(file.content):
+                reason |= USN_REASON_DATA_EXTEND
+            elif len(new_content) < len(file.content):
+                reason |= USN_REASON_DATA_TRUNCATION
+            old_content = file.content
             file.content = new_content
-            self.journal.append(JournalEntry('write', path, new_content, user))
-            print(f"[{user}] Arquivo '{filename}' atualizado.")
+            self._rehash(file, chain)
+            self._persist(file, parent_dir, lsn, old_content)
+            self._record_change(file, parent_dir, reason)
+            self._log(f"[{user}] Arquivo '{filename}' atualizado.")
         else:
-            print(f"[{user}] Sem permissão para escrita.")
+            self._log(f"[{user}] Sem permissão para escrita.")
 
+    @timed('append_to_file')
     def append_to_file(self, path, additional_content, user='root'):
         """
         Adiciona conteúdo ao final de um arquivo
@@ -219,40 +1001,99 @@ class FileSystem:
             user (str): Usuário solicitante
         """
         
-        parent_dir, filename = self._navigate_to_dir(path)
-        file = parent_dir.find_file(filename)
+        chain, filename, file = self._lookup_file(path)
         if not file:
-            print(f"Arquivo '{filename}' não encontrado.")
+            self._log(f"Arquivo '{filename}' não encontrado.")
             return
-        perm = file.get_permission(user)
-        if perm in ['w', 'rw']:
+        if self.permissions.allowed(user, file, chain, WRITE):
+            entry = JournalEntry('append', path, additional_content, user, codec=self.codec)
+            if not self._journal_fits(entry, filename):
+                return
+            lsn = self._journal_append(entry)
+            chain = self._own_chain(chain)
+            parent_dir = chain[-1]
+            file = self._own_file(file, parent_dir)
+            old_content = file.content
             file.content += "\n" + additional_content
-            self.journal.append(JournalEntry('write', path, additional_content, user))
-            print(f"[{user}] Conteúdo adicionado ao arquivo '{filename}'.")
+            self._rehash(file, chain)
+            self._persist(file, parent_dir, lsn, old_content)
+            self._record_change(file, parent_dir, USN_REASON_DATA_EXTEND)
+            self._log(f"[{user}] Conteúdo adicionado ao arquivo '{filename}'.")
         else:
-            print(f"[{user}] Sem permissão para escrita.")
+            self._log(f"[{user}] Sem permissão para escrita.")
 
     def set_file_permission(self, path, user_alvo, permission, admin='root'):
         """
         Altera permissões de um arquivo (apenas para admin)
         Args:
             path (str): Caminho do arquivo
-            user_alvo (str): Usuário que receberá a permissão
+            user_alvo (str): Usuário ou grupo que receberá a permissão
             permission (str): Nova permissão
             admin (str): Usuário admin que está modificando
         """
         
-        if admin != 'admin':
-            print(f"[{admin}] Sem permissão para alterar permissões.")
+        if admin not in self.permissions.admins:
+            self._log(f"[{admin}] Sem permissão para alterar permissões.")
             return
-        parent_dir, filename = self._navigate_to_dir(path)
-        file = parent_dir.find_file(filename)
+        try:
+            mask = parse_permission(permission)
+        except ValueError as e:
+            self._log(f"[{admin}] {e}")
+            return
+        chain, filename, file = self._lookup_file(path)
         if not file:
-            print(f"Arquivo '{filename}' não encontrado.")
+            self._log(f"Arquivo '{filename}' não encontrado.")
             return
-        file.set_permission(user_alvo, permission)
-        print(f"[{admin}] Permissão '{permission}' atribuída a '{user_alvo}' no arquivo '{filename}'.")
+        lsn = self._journal_append(JournalEntry('acl', path, f"{user_alvo}={format_permission(mask)}",
+                                                admin, codec=self.codec))
+        chain = self._own_chain(chain)
+        parent_dir = chain[-1]
+        file = self._own_file(file, parent_dir)
+        file.set_permission(user_alvo, mask)
+        self._rehash(file, chain)
+        self._persist(file, parent_dir, lsn, file.content)
+        self.permissions.invalidate()
+        self._record_change(file, parent_dir, USN_REASON_SECURITY_CHANGE)
+        self._log(f"[{admin}] Permissão '{permission}' atribuída a '{user_alvo}' no arquivo '{filename}'.")
+
+    def set_directory_permission(self, path, user_alvo, permission, admin='root'):
+        """
+        Altera a ACL herdável de um diretório (apenas para admin)
+        Args:
+            path (str): Caminho do diretório
+            user_alvo (str): Usuário ou grupo que receberá a permissão
+            permission (str): Nova permissão, herdada pelos itens do diretório
+            admin (str): Usuário admin que está modificando
+        """
 
+        if admin not in self.permissions.admins:
+            self._log(f"[{admin}] Sem permissão para alterar permissões.")
+            return
+        try:
+            mask = parse_permission(permission)
+        except ValueError as e:
+            self._log(f"[{admin}] {e}")
+            return
+        chain, dirname = self._walk(path)
+        directory = None
+        if chain is not None:
+            directory = chain[-1].find_subdir(dirname) if dirname else chain[-1]
+        if directory is None:
+            self._log(f"Diretório '{path}' não encontrado.")
+            return
+        lsn = self._journal_append(JournalEntry('acl_dir', path, f"{user_alvo}={format_permission(mask)}",
+                                                admin, codec=self.codec))
+        chain = self._own_chain(chain)
+        parent_dir = chain[-1]
+        directory = self._own_dir(directory, parent_dir) if dirname else parent_dir
+        directory.set_permission(user_alvo, mask)
+        self._rehash(directory, chain if dirname else chain[:-1])
+        self._persist(directory, parent_dir if dirname else None, lsn)
+        self.permissions.invalidate()
+        self._record_change(directory, parent_dir, USN_REASON_SECURITY_CHANGE)
+        self._log(f"[{admin}] Permissão '{permission}' herdável atribuída a '{user_alvo}' no diretório '{directory.name}'.")
+
+    @timed('create_directory')
     def create_directory(self, path):
         """
         Cria um novo diretório
@@ -260,38 +1101,191 @@ class FileSystem:
             path (str): Caminho completo do novo diretório
         """
         
-        parent_dir, dirname = self._navigate_to_dir(path)
+        chain, dirname = self._walk(path, create=True)
+        parent_dir = chain[-1]
         if parent_dir.find_subdir(dirname):
-            print(f"Diretório '{dirname}' já existe.")
+            self._log(f"Diretório '{dirname}' já existe.")
             return
-        new_dir = Directory(dirname)
+        new_dir = Directory(dirname, gen=self._gen)
+        lsn = self._journal_append(JournalEntry('mkdir', path, codec=self.codec, ref=new_dir.ref))
+        chain = self._own_chain(chain)  # Um checkpoint forçado pelo registro pode ter congelado o caminho
+        parent_dir = chain[-1]
         parent_dir.subdirectories.append(new_dir)
-        print(f"Diretório '{dirname}' criado.")
+        self._attach(chain, new_dir)
+        self._persist(new_dir, parent_dir, lsn)
+        self._record_change(new_dir, parent_dir, USN_REASON_FILE_CREATE)
+        self._log(f"Diretório '{dirname}' criado.")
+
+    @timed('import_batch')
+    def import_batch(self, base, items, user='root'):
+        """
+        Cria um lote de diretórios e arquivos gravando um único registro no journal
+        Args:
+            base (str): Diretório de destino do lote
+            items (list): Itens [tipo ('d' ou 'f'), caminho relativo a base, conteúdo],
+                          com cada diretório antes do seu conteúdo
+            user (str): Usuário dono dos arquivos criados
+        Returns:
+            int: Número de itens criados (itens já existentes são ignorados), ou None se
+                 o registro do lote não couber no journal (nenhum item é criado)
+        """
+
+        if not self.directory_exists(base):
+            self.create_directory(base)  # Registrado antes do lote, com sua referência
+        records = [[kind, relative, next(_next_ref), content] for kind, relative, content in items]
+        entry = JournalEntry('batch', base, json.dumps(records, ensure_ascii=False), user, codec=self.codec)
+        if not self._journal_fits(entry, base):
+            return None
+        lsn = self._journal_append(entry)
+        created = self._apply_batch(base, records, user, lsn)
+        self._log(f"[{user}] Lote de {created} itens importado em '{base}'.")
+        return created
+
+    def batch_capacity(self, base, user='root'):
+        """
+        Espaço disponível para os itens no registro de um lote (import_batch)
+        Args:
+            base (str): Diretório de destino do lote
+            user (str): Usuário dono dos arquivos criados
+        Returns:
+            int: Bytes que a soma de batch_item_size dos itens pode ocupar
+        """
+
+        return self.journal.max_record_size - JournalEntry('batch', base, '[]', user).size
+
+    @staticmethod
+    def batch_item_size(kind, relative, content):
+        """
+        Limite superior dos bytes que um item ocupa na carga de um lote: o item em JSON
+        (com os escapes e a maior referência possível) mais o separador; a compressão
+        da carga só pode reduzir esse valor
+        Args:
+            kind (str): 'd' ou 'f'
+            relative (str): Caminho relativo ao diretório do lote
+            content (str): Conteúdo do arquivo (None para diretórios)
+        Returns:
+            int: Tamanho do item em bytes
+        """
+
+        return len(json.dumps([kind, relative, 2 ** 64, content], ensure_ascii=False).encode('utf-8')) + 2
+
+    def _apply_batch(self, base, records, user, lsn=None):
+        """
+        Aplica um lote de criações. Cada diretório pai é resolvido uma única vez e os
+        hashes e agregados são propagados uma vez por diretório alterado, no fim do
+        lote, em vez de uma vez por item
+        Args:
+            base (str): Diretório de destino do lote
+            records (list): Itens [tipo, caminho relativo, referência, conteúdo]
+            user (str): Usuário dono dos arquivos criados
+            lsn (int): LSN do registro do lote no journal
+        Returns:
+            int: Número de itens criados
+        """
+
+        prefix = base.rstrip("/")
+        chains = {}  # Caminho relativo do diretório ('' para base) -> diretórios da raiz até ele
+        names = {}   # Caminho relativo do diretório -> nomes já presentes nele
+        before = {}  # Caminho relativo do diretório alterado -> (hash, agregados) antes do lote
+        levels = {}  # Profundidade -> diretórios alterados nela
+        depth = lambda key: key.count("/") + 1 if key else 0
+
+        def touch(key):
+            if key not in before:
+                directory = chains[key][-1]
+                before[key] = (directory.digest, directory.usage())
+                levels.setdefault(depth(key), []).append(key)
 
-    def list_directory(self, path):
+        created = 0
+        for kind, relative, ref, content in records:
+            parent, _, name = relative.rpartition("/")
+            if parent not in chains:
+                chain, _ = self._walk(f"{prefix}/{relative}", create=True)
+                parts = parent.split("/") if parent else []
+                for i in range(len(parts) + 1):
+                    chains.setdefault("/".join(parts[:i]), chain[:len(chain) - len(parts) + i])
+            if parent not in names:
+                parent_dir = chains[parent][-1]
+                names[parent] = {node.name for node in parent_dir.files + parent_dir.subdirectories}
+            if name in names[parent]:
+                continue
+            names[parent].add(name)
+            touch(parent)
+            parent_dir = chains[parent][-1]
+            if kind == 'd':
+                node = Directory(name, ref=ref, gen=self._gen)
+                parent_dir.subdirectories.append(node)
+                chains[relative] = chains[parent] + [node]
+                names[relative] = set()
+            else:
+                node = File(name, content, ref=ref, gen=self._gen)
+                node.set_permission(user, 'rw')
+                node.rehash()
+                parent_dir.files.append(node)
+            files, dirs, size = node.usage()
+            parent_dir.children_sum = (parent_dir.children_sum + node.digest) % MOD
+            parent_dir.total_files += files
+            parent_dir.total_dirs += dirs
+            parent_dir.total_size += size
+            self._record_change(node, parent_dir, USN_REASON_FILE_CREATE)
+            self._persist(node, parent_dir, lsn)
+            created += 1
+
+        # Propaga hashes e agregados dos diretórios alterados, do mais profundo para a base
+        for level in range(max(levels, default=-1), -1, -1):
+            for key in levels.get(level, []):
+                directory = chains[key][-1]
+                old_digest, old_usage = before[key]
+                directory.rehash()
+                delta = tuple(new - old for new, old in zip(directory.usage(), old_usage))
+                if not key:
+                    self._propagate(chains[key][:-1], old_digest, directory.digest, delta)
+                    continue
+                parent = key.rpartition("/")[0]
+                touch(parent)
+                parent_dir = chains[parent][-1]
+                parent_dir.children_sum = (parent_dir.children_sum - old_digest + directory.digest) % MOD
+                parent_dir.total_files += delta[0]
+                parent_dir.total_dirs += delta[1]
+                parent_dir.total_size += delta[2]
+        return created
+
+    def list_directory(self, path, snapshot=None):
         """
         Lista o conteúdo de um diretório
         Args:
             path (str): Caminho do diretório
+            snapshot (int): Id do snapshot a listar (padrão: árvore atual)
         """
         
-        if path == "/":
-            target_dir = self.root
-        else:
-            parent_dir, dirname = self._navigate_to_dir(path)
-            if dirname == '':
-                target_dir = parent_dir
-            else:
-                target_dir = parent_dir.find_subdir(dirname)
-            if not target_dir:
-                print(f"Diretório '{path}' não encontrado.")
-                return
+        if snapshot is not None and snapshot not in self.snapshots:
+            print(f"Snapshot '{snapshot}' não encontrado.")
+            return
+        target_dir = self.find_directory(path, snapshot)
+        if not target_dir:
+            print(f"Diretório '{path}' não encontrado.")
+            return
         print(f"Conteúdo de '{path}':")
         for d in target_dir.subdirectories:
             print(f"  <DIR> {d.name}")
         for f in target_dir.files:
             print(f"       {f.name}")
 
+    def listing(self, path, snapshot=None):
+        """
+        Nomes do conteúdo de um diretório, em forma serializável
+        Args:
+            path (str): Caminho do diretório
+            snapshot (int): Id do snapshot a consultar (padrão: árvore atual)
+        Returns:
+            tuple: (list: subdiretórios, list: arquivos), ou None se não existir
+        """
+
+        directory = self.find_directory(path, snapshot)
+        if directory is None:
+            return None
+        return [d.name for d in directory.subdirectories], [f.name for f in directory.files]
+
     def directory_exists(self, path):
         """
         Verifica se um diretório existe
@@ -301,61 +1295,318 @@ class FileSystem:
             bool: True se o diretório existe, False caso contrário
         """
         
-        if path == "/":
-            return True
-        parent_dir, dirname = self._navigate_to_dir(path)
-        if dirname == '':
-            return True
-        return parent_dir.find_subdir(dirname) is not None
+        return self.find_directory(path) is not None
+
+    def _refresh_frozen(self):
+        """Recalcula a maior geração ainda congelada por algum snapshot ou cópia (fork)"""
+        snapshots = list(self.snapshots.values()) + list(self._fork_pins.values())
+        if self._checkpoint_snapshot is not None:
+            snapshots.append(self._checkpoint_snapshot)
+        self._frozen = max((snapshot.gen for snapshot in snapshots), default=-1)
+
+    def _freeze(self, snapshot_id, label=None):
+        """
+        Congela a árvore atual em O(1): os nós existentes passam a ser
+        compartilhados e só são copiados quando alterados
+        Args:
+            snapshot_id (int): Id do novo snapshot
+            label (str): Descrição opcional
+        Returns:
+            Snapshot: Snapshot criado
+        """
+
+        snapshot = Snapshot(snapshot_id, self.root, self._gen, label)
+        self._frozen = self._gen
+        self._gen += 1
+        return snapshot
+
+    def create_snapshot(self, label=None):
+        """
+        Cria um snapshot da árvore para leituras em um ponto no tempo, sem bloquear escritas
+        Args:
+            label (str): Descrição opcional do snapshot
+        Returns:
+            int: Id do snapshot criado
+        """
+
+        snapshot = self._freeze(next(self._snapshot_ids), label)
+        self.snapshots[snapshot.id] = snapshot
+        self._log(f"Snapshot {snapshot.id} criado.")
+        return snapshot.id
+
+    def release_snapshot(self, snapshot_id):
+        """
+        Libera um snapshot; os nós que só ele referenciava são descartados pelo coletor
+        Args:
+            snapshot_id (int): Id do snapshot
+        Returns:
+            bool: True se o snapshot existia
+        """
+
+        if self.snapshots.pop(snapshot_id, None) is None:
+            self._log(f"Snapshot '{snapshot_id}' não encontrado.")
+            return False
+        self._refresh_frozen()
+        self._log(f"Snapshot {snapshot_id} liberado.")
+        return True
+
+    def diff_snapshots(self, old_id, new_id=None):
+        """
+        Compara dois snapshots (ou um snapshot e a árvore atual), percorrendo
+        apenas as subárvores que não são compartilhadas entre as versões
+        Args:
+            old_id (int): Id do snapshot mais antigo
+            new_id (int): Id do snapshot mais novo (padrão: árvore atual)
+        Returns:
+            list: Tuplas (mudança, caminho, é diretório) ordenadas por caminho,
+                  ou None se algum snapshot não existir
+        """
+
+        if old_id not in self.snapshots:
+            self._log(f"Snapshot '{old_id}' não encontrado.")
+            return None
+        new_root = self._snapshot_root(new_id)
+        if new_root is None:
+            return None
+        return sorted(diff_trees(self.snapshots[old_id].root, new_root), key=lambda change: change[1])
+
+    def fork(self):
+        """
+        Cria em O(1) uma cópia independente do sistema de arquivos: a árvore atual e a
+        imagem do último checkpoint passam a ser compartilhadas (copy-on-write) e cada
+        lado copia apenas os nós que alterar. A cópia começa com o journal vazio.
+        Enquanto a cópia existir, a origem mantém um snapshot interno da árvore
+        compartilhada; ele é liberado por close() na cópia ou quando ela é descartada
+        Returns:
+            FileSystem: Cópia com a mesma árvore, o mesmo checkpoint e as mesmas permissões
+        """
+
+        clone = FileSystem(journal_codec=self.codec, verbose=self.verbose,
+                           log_segment_size=self.journal.segment_size, log_segments=self.journal.segment_count,
+                           permissions=copy.deepcopy(self.permissions))
+        # Os nós existentes não podem mais ser alterados por nenhum dos dois lados
+        pin = Snapshot(next(self._fork_ids), self.root, self._gen, label='fork')
+        self._fork_pins[pin.id] = pin
+        self._gen += 1
+        self._refresh_frozen()
+        clone.root = self.root
+        clone._checkpoint_snapshot = self._checkpoint_snapshot
+        clone._fork_pins[0] = Snapshot(0, self.root, pin.gen, label='origem')
+        clone._gen = self._gen
+        clone._refresh_frozen()
+        clone.permissions.invalidate()
+        clone._fork_release = weakref.finalize(clone, self._release_fork, pin.id)
+        return clone
+
+    def _release_fork(self, pin_id):
+        """Libera o snapshot interno que mantinha a árvore compartilhada com uma cópia (fork)"""
+        if self._fork_pins.pop(pin_id, None) is not None:
+            self._refresh_frozen()
+
+    def close(self):
+        """
+        Para o escritor preguiçoso, grava os buffers sujos do cache e fecha o log; em uma
+        cópia criada por fork, libera também a árvore que a origem mantinha compartilhada
+        """
+
+        if self.cache is not None:
+            self.cache.close()
+        self.journal.close()
+        if self._fork_release is not None:
+            self._fork_release()
+
+    def check_disk(self):
+        """
+        Verifica a integridade da árvore (como o chkdsk): recalcula todos os
+        hashes de Merkle e compara com os mantidos incrementalmente nos nós
+        Returns:
+            tuple: (int: nós verificados, list: caminhos com hash divergente)
+        """
+
+        return verify_tree(self.root)
+
+    @timed('checkpoint')
+    def checkpoint(self):
+        """
+        Registra um checkpoint: congela a árvore atual em um snapshot interno, grava
+        os buffers sujos do cache e libera os segmentos do log que não são mais
+        necessários para a recuperação
+        """
+
+        self._checkpoint_snapshot = self._freeze(0, 'checkpoint')
+        self._refresh_frozen()
+        if self.cache is not None:  # Os registros liberados não poderão refazer dados não gravados
+            self.cache.flush()
+        self.journal.checkpoint()
+        self.journal_index.prune(self.journal.checkpoint_lsn)
+
+    @timed('recovery')
+    def simulate_crash_and_recovery(self, progress=None, progress_every=1000, profile=None,
+                                    profile_path=None, log_data=None):
+        """
+        Simula uma falha no sistema e recuperação usando o journal
+        Args:
+            progress (callable): Função chamada com um RecoveryProgress durante a recuperação (opcional)
+            progress_every (int): Intervalo, em registros, entre notificações de progresso
+            profile (str): Captura de perfil durante a recuperação ('cprofile' ou 'tracemalloc', opcional)
+            profile_path (str): Arquivo onde o perfil capturado será gravado (opcional)
+            log_data (bytes): Bytes do log que sobreviveram à falha, a partir do último
+                              checkpoint (padrão: os registros em memória). Um registro final
+                              incompleto ou corrompido é descartado
+        Returns:
+            RecoveryReport: Tempos gastos em cada fase da recuperação
+        """
+
+        if log_data is None:
+            entries = self.journal
+            report = RecoveryReport(len(self.journal), self.journal.next_lsn - self.journal.checkpoint_lsn)
+        else:
+            entries, valid = JournalEntry.read_log(log_data, self.journal.checkpoint_lsn)
+            report = RecoveryReport(len(entries), valid)
+            report.torn_bytes = len(log_data) - valid
+        handlers = {
+            'create': self._replay_create,
+            'write': self._replay_write,
+            'append': self._replay_append,
+            'delete': self._replay_delete,
+            'acl': self._replay_acl,
+            'acl_dir': self._replay_acl,
+            'mkdir': self._replay_mkdir,
+            'batch': self._replay_batch,
+        }
+        start = time.perf_counter()
+        lost_root = self.root  # Árvore antes da falha, para verificar a recuperação
+        report.expected_digest = lost_root.digest
+        self._recovery = report
+        try:
+            with capture_profile(report, profile, profile_path):
+                self._log("\n[RECUPERAÇÃO APÓS FALHA]")
+                # Os buffers sujos se perdem; a reexecução do journal volta a sujá-los
+                if self.cache is not None:
+                    report.lost_buffers = self.cache.crash()
+                    self._unlogged_dirs.clear()
+                # Parte da imagem do último checkpoint (ou da estrutura básica)
+                if self._checkpoint_snapshot is not None:
+                    self.root = self._checkpoint_snapshot.root  # Copiada sob demanda (copy-on-write)
+                else:
+                    self.root = Directory("root", ref=lost_root.ref, gen=self._gen)
+                self.permissions.invalidate()
+                report.reset_time = time.perf_counter() - start
+
+                # Reexecuta as operações do journal posteriores ao checkpoint
+                notify = progress_tracker(report, progress, progress_every, start)
+                for entry in entries:
+                    entry_start = time.perf_counter()
+                    chain, name = self._walk(entry.target, create=True)
+                    resolved = time.perf_counter()
+                    handlers[entry.action](entry, chain, name)
+                    report.resolve_time += resolved - entry_start
+                    report.record_action(entry.action, time.perf_counter() - resolved, entry.size)
+                    notify()
+                notify(force=True)
+
+                # Verificação em O(1): as árvores são iguais se os hashes das raízes forem iguais
+                report.recovered_digest = self.root.digest
+                if not report.consistent:
+                    report.differences = sorted(diff_trees(lost_root, self.root), key=lambda change: change[1])
+                self._log("[RECUPERAÇÃO CONCLUÍDA]\n")
+        finally:
+            self._recovery = None
+        report.total_time = time.perf_counter() - start
+        return report
 
-    def simulate_crash_and_recovery(self):
-        """Simula uma falha no sistema e recuperação usando o journal"""
-                
-        print("\n[RECUPERAÇÃO APÓS FALHA]")
-        self.root = Directory("root")  # Recria estrutura básica
-        
-        # Reexecuta todas as operações do journal
-        for entry in self.journal:
-            if entry.action == 'create':
-                self._replay_create(entry)
-            elif entry.action == 'write':
-                self._replay_write(entry)
-            elif entry.action == 'append':
-                self._replay_append(entry)
-            elif entry.action == 'delete':
-                self._replay_delete(entry)
-        print("[RECUPERAÇÃO CONCLUÍDA]\n")
-        
     # Métodos internos para recuperação de falhas
-    def _replay_create(self, entry):
+    def _decode(self, entry, base=None):
+        """Decodifica a carga de um registro, contabilizando o tempo na recuperação em curso"""
+        if self._recovery is None:
+            return entry.decode(base)
+        start = time.perf_counter()
+        content = entry.decode(base)
+        self._recovery.content_time += time.perf_counter() - start
+        return content
+
+    @timed('replay_create')
+    def _replay_create(self, entry, chain, filename):
         """Reexecuta operação de criação durante recuperação"""
-        parent_dir, filename = self._navigate_to_dir(entry.target)
+        parent_dir = chain[-1]
         if not parent_dir.find_file(filename):
-            new_file = File(filename, entry.content)
+            new_file = File(filename, self._decode(entry), ref=entry.ref, gen=self._gen)
             new_file.set_permission(entry.user, 'rw')
+            new_file.rehash()
             parent_dir.files.append(new_file)
-            print(f"(Recuperado) Arquivo '{filename}' criado.")
+            self._attach(chain, new_file)
+            self._persist(new_file, parent_dir, entry.lsn)
+            self._log(f"(Recuperado) Arquivo '{filename}' criado.")
 
-    def _replay_write(self, entry):
+    @timed('replay_write')
+    def _replay_write(self, entry, chain, filename):
         """Reexecuta operação de escrita durante recuperação"""
-        parent_dir, filename = self._navigate_to_dir(entry.target)
-        file = parent_dir.find_file(filename)
+        file = chain[-1].find_file(filename)
         if file:
-            file.content = entry.content
-            print(f"(Recuperado) Arquivo '{filename}' atualizado.")
+            file = self._own_file(file, chain[-1])
+            old_content = file.content
+            file.content = self._decode(entry, old_content)
+            self._rehash(file, chain)
+            self._persist(file, chain[-1], entry.lsn, old_content)
+            self._log(f"(Recuperado) Arquivo '{filename}' atualizado.")
 
-    def _replay_append(self, entry):
+    @timed('replay_append')
+    def _replay_append(self, entry, chain, filename):
         """Reexecuta operação de append durante recuperação"""
-        parent_dir, filename = self._navigate_to_dir(entry.target)
-        file = parent_dir.find_file(filename)
+        file = chain[-1].find_file(filename)
         if file:
-            file.content += "\n" + entry.content
-            print(f"(Recuperado) Conteúdo adicionado ao arquivo '{filename}'.")
+            file = self._own_file(file, chain[-1])
+            old_content = file.content
+            file.content += "\n" + self._decode(entry)
+            self._rehash(file, chain)
+            self._persist(file, chain[-1], entry.lsn, old_content)
+            self._log(f"(Recuperado) Conteúdo adicionado ao arquivo '{filename}'.")
 
-    def _replay_delete(self, entry):
+    @timed('replay_delete')
+    def _replay_delete(self, entry, chain, filename):
         """Reexecuta operação de exclusão durante recuperação"""
-        parent_dir, filename = self._navigate_to_dir(entry.target)
-        file = parent_dir.find_file(filename)
+        file = chain[-1].find_file(filename)
         if file:
-            parent_dir.files.remove(file)
-            print(f"(Recuperado) Arquivo '{filename}' deletado.")
+            chain[-1].files.remove(file)
+            self._detach(chain, file)
+            self._unpersist(file, entry.lsn)
+            self._log(f"(Recuperado) Arquivo '{filename}' deletado.")
+
+    @timed('replay_acl')
+    def _replay_acl(self, entry, chain, name):
+        """Reexecuta alteração de permissão durante recuperação"""
+        principal, _, permission = self._decode(entry).rpartition("=")
+        parent_dir = chain[-1]
+        if entry.action == 'acl':
+            node = parent_dir.find_file(name)
+            if node:
+                node = self._own_file(node, parent_dir)
+        elif name:
+            node = parent_dir.find_subdir(name)
+            if node:
+                node = self._own_dir(node, parent_dir)
+        else:
+            node, chain = parent_dir, chain[:-1]
+        if node:
+            node.set_permission(principal, permission)
+            self._rehash(node, chain)
+            self._persist(node, chain[-1] if chain else None, entry.lsn,
+                          node.content if isinstance(node, File) else None)
+            self._log(f"(Recuperado) Permissão '{permission}' atribuída a '{principal}' em '{node.name}'.")
+
+    @timed('replay_mkdir')
+    def _replay_mkdir(self, entry, chain, dirname):
+        """Reexecuta criação de diretório durante recuperação"""
+        parent_dir = chain[-1]
+        if not parent_dir.find_subdir(dirname):
+            new_dir = Directory(dirname, ref=entry.ref, gen=self._gen)
+            parent_dir.subdirectories.append(new_dir)
+            self._attach(chain, new_dir)
+            self._persist(new_dir, parent_dir, entry.lsn)
+            self._log(f"(Recuperado) Diretório '{dirname}' criado.")
+
+    @timed('replay_batch')
+    def _replay_batch(self, entry, chain, name):
+        """Reexecuta um lote de criações durante recuperação"""
+        created = self._apply_batch(entry.target, json.loads(self._decode(entry)), entry.user, entry.lsn)
+        self._log(f"(Recuperado) Lote de {created} itens importado em '{entry.target}'.")
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, simpledialog
 from filesystem import FileSystem
+from permissions import READ, WRITE, format_permission
+
+JOURNAL_VIEW_LIMIT = 200  # Registros mais recentes exibidos na área do journal
 
 class NTFSJournalingSimulatorGUI:
     """Interface gráfica para o simulador de sistema de arquivos com journaling"""
@@ -76,6 +79,30 @@ class NTFSJournalingSimulatorGUI:
         self.file_tree.bind("<<TreeviewSelect>>", self.on_file_select)
         self.file_tree.bind("<Double-1>", self.on_item_double_click)
 
+        # Painel de estatísticas de desempenho
+        stats_frame = ttk.LabelFrame(self.root, text="Estatísticas")
+        stats_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.stats_var = tk.StringVar()
+        self.memory_var = tk.StringVar(value="Memória estimada: -")
+        ttk.Label(stats_frame, textvariable=self.stats_var, justify=tk.LEFT,
+                  font=("Courier", 9)).pack(fill=tk.X, padx=5)
+        memory_frame = ttk.Frame(stats_frame)
+        memory_frame.pack(fill=tk.X, padx=5)
+        ttk.Label(memory_frame, textvariable=self.memory_var, font=("Courier", 9)).pack(side=tk.LEFT)
+        ttk.Button(memory_frame, text="Medir Memória", command=self.update_memory).pack(side=tk.LEFT, padx=5)
+
+        # Filtros do journal
+        filter_frame = ttk.Frame(self.root)
+        filter_frame.pack(fill=tk.X, padx=10)
+        ttk.Label(filter_frame, text="Journal - usuário:").pack(side=tk.LEFT)
+        self.journal_user_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.journal_user_var, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="caminho:").pack(side=tk.LEFT)
+        self.journal_path_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.journal_path_var, width=30).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="Filtrar", command=self.update_journal).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Limpar", command=self.clear_journal_filter).pack(side=tk.LEFT, padx=5)
+
         # Área de visualização do journal
         self.journal_text = scrolledtext.ScrolledText(self.root, height=10, state=tk.DISABLED)
         self.journal_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -125,11 +152,7 @@ class NTFSJournalingSimulatorGUI:
         self.file_tree.delete(*self.file_tree.get_children())
         
         # Obtém o diretório atual
-        if self.current_path == "/":
-            current_dir = self.fs.root
-        else:
-            parent_dir, dirname = self.fs._navigate_to_dir(self.current_path)
-            current_dir = parent_dir.find_subdir(dirname) if dirname else parent_dir
+        current_dir = self.fs.find_directory(self.current_path)
 
         # Adiciona subdiretórios à lista
         for d in current_dir.subdirectories:
@@ -137,29 +160,25 @@ class NTFSJournalingSimulatorGUI:
         
         # Adiciona arquivos à lista, verificando permissões
         for f in current_dir.files:
-            if self.can_read_file(f):
-                perms = ", ".join([f"{u}:{p}" for u, p in f.acl.items()])
+            if self.can_read_file(f.name):
+                perms = ", ".join([f"{u}:{format_permission(p)}" for u, p in f.acl.items()])
                 self.file_tree.insert("", "end", values=(f.name, "Arquivo", perms))
             else:
                 self.file_tree.insert("", "end", values=(f.name, "Arquivo", "ACESSO NEGADO"), tags=('denied',))
         
         self.file_tree.tag_configure('denied', foreground='gray')
 
-    def can_read_file(self, file):
-        """Verifica se o usuário atual tem permissão de leitura no arquivo"""
+    def can_read_file(self, name):
+        """Verifica se o usuário atual tem permissão de leitura no arquivo do diretório atual"""
         
-        if self.current_user == "admin":
-            return True
-        permission = file.get_permission(self.current_user)
-        return permission in ['r', 'rw']
+        path = f"{self.current_path.rstrip('/')}/{name}"
+        return bool(self.fs.access_mask(path, self.current_user) & READ)
 
-    def can_write_file(self, file):
-        """Verifica se o usuário atual tem permissão de escrita no arquivo"""
+    def can_write_file(self, name):
+        """Verifica se o usuário atual tem permissão de escrita no arquivo do diretório atual"""
 
-        if self.current_user == "admin":
-            return True
-        permission = file.get_permission(self.current_user)
-        return permission in ['w', 'rw']
+        path = f"{self.current_path.rstrip('/')}/{name}"
+        return bool(self.fs.access_mask(path, self.current_user) & WRITE)
 
     def on_file_select(self, event):
         """Manipula a seleção de um item na lista de arquivos"""
@@ -182,17 +201,50 @@ class NTFSJournalingSimulatorGUI:
         self.journal_text.config(state=tk.NORMAL)
         self.journal_text.delete(1.0, tk.END)
         
+        user = self.journal_user_var.get().strip() or None
+        path = self.journal_path_var.get().strip() or None
+        # Consulta os registros mais recentes pelos índices e exibe em ordem cronológica
+        entries = self.fs.query_journal(user=user, path=path, limit=JOURNAL_VIEW_LIMIT, reverse=True)
         if not self.fs.journal:
             self.journal_text.insert(tk.END, "O journal está vazio.")
+        elif not entries:
+            self.journal_text.insert(tk.END, "Nenhum registro encontrado.")
         else:
-            for i, entry in enumerate(self.fs.journal, 1):
-                content_preview = entry.content
-                if content_preview is not None and len(str(content_preview)) > 20:
-                    content_preview = str(content_preview)[:20] + "..."
+            for entry in reversed(entries):
                 self.journal_text.insert(tk.END, 
-                    f"{i}. Ação: {entry.action}, Arquivo: {entry.target}, Usuário: {entry.user}, Conteúdo: {content_preview}\n")
+                    f"LSN {entry.lsn}. Ação: {entry.action}, Arquivo: {entry.target}, Usuário: {entry.user}, Conteúdo: {entry.preview()}\n")
         
         self.journal_text.config(state=tk.DISABLED)
+        self.update_stats()  # Toda operação atualiza o journal, então as métricas acompanham
+
+    def clear_journal_filter(self):
+        """Remove os filtros do journal e volta a exibir os registros mais recentes"""
+
+        self.journal_user_var.set("")
+        self.journal_path_var.set("")
+        self.update_journal()
+
+    def update_stats(self):
+        """Atualiza o painel de estatísticas com as métricas do sistema de arquivos"""
+
+        snapshot = self.fs.metrics.snapshot(on_demand=False)  # A memória percorre a árvore: só sob demanda
+        gauges = snapshot['gauges']
+        operations = "  ".join(
+            f"{name}: {h['count']} ({h['mean'] * 1e6:.0f} µs)"
+            for name, h in snapshot['operations'].items() if not name.startswith(('replay_', 'resolve_'))
+        )
+        self.stats_var.set(
+            f"Journal: {gauges['journal_records']} registros, {gauges['journal_bytes']}/"
+            f"{gauges['journal_capacity_bytes']} bytes, compressão {gauges['journal_compression_ratio']:.2f}x  |  "
+            f"Nós: {gauges['tree_nodes']}\n"
+            f"{operations or 'Nenhuma operação registrada.'}"
+        )
+
+    def update_memory(self):
+        """Mede a memória estimada da árvore e do journal (percorre ambos, por isso só sob demanda)"""
+
+        memory = self.fs.metrics.gauge('memory_estimate_bytes')
+        self.memory_var.set(f"Memória estimada: {memory / 1024:.1f} KiB")
 
     def update_status(self, message):
         """Atualiza a mensagem na barra de status"""
@@ -252,11 +304,7 @@ class NTFSJournalingSimulatorGUI:
             return
         
         # Obtém o diretório atual
-        if self.current_path == "/":
-            current_dir = self.fs.root
-        else:
-            parent_dir, dirname = self.fs._navigate_to_dir(self.current_path)
-            current_dir = parent_dir.find_subdir(dirname) if dirname else parent_dir
+        current_dir = self.fs.find_directory(self.current_path)
         
         file = current_dir.find_file(self.selected_file)
         
@@ -264,7 +312,7 @@ class NTFSJournalingSimulatorGUI:
             messagebox.showerror("Erro", "Arquivo não encontrado")
             return
             
-        if not self.can_write_file(file):
+        if not self.can_write_file(file.name):
             messagebox.showerror("Erro", "Você não tem permissão para editar este arquivo")
             return
 
@@ -310,11 +358,7 @@ class NTFSJournalingSimulatorGUI:
             return
         
         # Obtém o diretório atual
-        if self.current_path == "/":
-            current_dir = self.fs.root
-        else:
-            parent_dir, dirname = self.fs._navigate_to_dir(self.current_path)
-            current_dir = parent_dir.find_subdir(dirname) if dirname else parent_dir
+        current_dir = self.fs.find_directory(self.current_path)
         
         file = current_dir.find_file(self.selected_file)
         
@@ -322,7 +366,7 @@ class NTFSJournalingSimulatorGUI:
             messagebox.showerror("Erro", "Arquivo não encontrado")
             return
             
-        if not self.can_read_file(file):
+        if not self.can_read_file(file.name):
             messagebox.showerror("Erro", "Você não tem permissão para visualizar este arquivo")
             return
 
@@ -364,14 +408,10 @@ class NTFSJournalingSimulatorGUI:
             path = f"{self.current_path.rstrip('/')}/{name}"
             if type_ == "Arquivo":
                 # Verifica permissões antes de excluir
-                if self.current_path == "/":
-                    current_dir = self.fs.root
-                else:
-                    parent_dir, dirname = self.fs._navigate_to_dir(self.current_path)
-                    current_dir = parent_dir.find_subdir(dirname) if dirname else parent_dir
+                current_dir = self.fs.find_directory(self.current_path)
                 
                 file = current_dir.find_file(name)
-                if file and not self.can_write_file(file) and self.current_user != "admin":
+                if file and not self.can_write_file(file.name):
                     messagebox.showerror("Erro", "Você não tem permissão para excluir este arquivo")
                     return
                 self.fs.delete_file(path, user=self.current_user)
@@ -387,7 +427,7 @@ class NTFSJournalingSimulatorGUI:
             messagebox.showerror("Erro", "Nenhum arquivo selecionado")
             return
             
-        if self.current_user != "admin":
+        if self.current_user not in self.fs.permissions.admins:
             messagebox.showerror("Erro", "Apenas o administrador pode alterar permissões")
             return
             
@@ -410,10 +450,11 @@ class NTFSJournalingSimulatorGUI:
         """Simula uma falha no sistema e recuperação usando o journal"""
         
         if messagebox.askyesno("Simular Falha", "Tem certeza que deseja simular uma falha no sistema?"):
-            self.fs.simulate_crash_and_recovery()
+            report = self.fs.simulate_crash_and_recovery()
             self.update_file_list()
             self.update_journal()
-            self.update_status("Sistema recuperado após falha")
+            self.update_status(f"Sistema recuperado após falha: {report.entries_done} registros "
+                               f"em {report.total_time * 1000:.1f} ms")
 
 if __name__ == "__main__":
     root = tk.Tk()
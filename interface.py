@@ -1,4 +1,11 @@
+from datetime import datetime
+
+from bulk_io import export_tree, import_tree
 from filesystem import FileSystem
+from usn_journal import UsnJournalWrapError, format_reason
+
+JOURNAL_PAGE_SIZE = 20  # Registros exibidos por página no comando journal
+USN_BATCH_SIZE = 50     # Mudanças entregues por chamada do comando usn
 
 def interface():
     """
@@ -28,6 +35,22 @@ def interface():
             return current_path + path
         return current_path + "/" + path
 
+    def parse_time(value):
+        """
+        Converte um horário informado pelo usuário em epoch.
+        
+        Args:
+            value (str): Epoch em segundos ou data/hora ISO (ex: 2024-05-01T14:30)
+            
+        Returns:
+            float: Horário em segundos desde a epoch
+        """
+        
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+
     print("Simulador de Sistema de Arquivos - Digite 'help' para ajuda.")
 
     # Loop principal da interface
@@ -53,14 +76,31 @@ def interface():
 mkdir <nome_dir>         - Cria um diretório no caminho atual
 cd <caminho>              - Navega para outro diretório
 ls                        - Lista arquivos e pastas no diretório atual
+tree [dir]                - Lista recursivamente a árvore a partir do diretório
+find <padrão> [dir]       - Busca arquivos e pastas pelo nome (ex: *.txt)
+du [caminho]              - Mostra arquivos, pastas e bytes ocupados
 create <nome_arquivo>    - Cria um arquivo vazio no diretório atual
 read <nome_arquivo>      - Mostra o conteúdo do arquivo
 write <nome_arquivo>     - Escreve ou adiciona conteúdo no arquivo
 delete <nome_arquivo>    - Deleta o arquivo
-chmod <arquivo> <usuario> <perm> - Ajusta permissões no arquivo
-journal                  - Exibe o conteúdo do journal (log) do sistema
+chmod <caminho> <usuario|grupo> <perm> - Ajusta permissões no arquivo
+                           (em diretórios, a permissão é herdada pelo conteúdo)
+group add|del <grupo> <usuario> - Adiciona/remove usuário de um grupo
+group list                - Lista os grupos e seus membros
+journal [--user U] [--path P] [--since T] [--until T] [--page N]
+                         - Exibe o journal (log), com filtros e paginação
+checkpoint               - Registra um checkpoint e libera o log
+import <dir_host> [destino] - Importa em lote uma árvore do disco local
+export <dir_host> [origem]  - Exporta em lote uma árvore para o disco local
+chkdsk                   - Verifica a integridade da árvore pelos hashes de Merkle
+snapshot [create [descrição] | list | release <id>]
+                         - Cria, lista ou libera snapshots da árvore
+snapshot read <id> <arquivo> | ls <id> [dir] | diff <id> [id2]
+                         - Lê um snapshot ou compara com outro (ou com o estado atual)
+usn [consumidor]         - Mostra as mudanças desde a última leitura do consumidor
+stats [json|prom]        - Mostra métricas de desempenho (tabela, JSON ou Prometheus)
 user <nome_usuario>      - Altera o usuário ativo na sessão
-crash                    - Simula falha e recuperação do sistema
+crash [cprofile|tracemalloc] - Simula falha e recuperação, com perfil opcional
 help                     - Mostra esta ajuda
 exit                     - Sai do simulador
 """)
@@ -96,6 +136,50 @@ exit                     - Sai do simulador
         elif comando == "ls":
             fs.list_directory(current_path)
 
+        # Comando tree - Lista recursivamente a árvore
+        elif comando == "tree":
+            if len(args) <= 1:
+                inicio = normalize_path(args[0]) if args else current_path
+                if not fs.directory_exists(inicio):
+                    print(f"Diretório '{inicio}' não encontrado.")
+                    continue
+                base = inicio.rstrip("/").count("/")
+                for caminho, diretorio in fs.walk(inicio):
+                    nivel = caminho.rstrip("/").count("/") - base
+                    print(f"{'  ' * nivel}{diretorio.name}/")
+                    for f in diretorio.files:
+                        print(f"{'  ' * (nivel + 1)}{f.name}")
+            else:
+                print("Comando inválido.")
+
+        # Comando find - Busca arquivos e pastas pelo nome
+        elif comando == "find":
+            if len(args) in (1, 2):
+                inicio = normalize_path(args[1]) if len(args) == 2 else current_path
+                encontrados = 0
+                for caminho, item in fs.find(args[0], inicio):
+                    print(caminho + ("/" if hasattr(item, "subdirectories") else ""))
+                    encontrados += 1
+                print(f"{encontrados} item(ns) encontrado(s).")
+            else:
+                print("Comando inválido.")
+
+        # Comando du - Mostra o espaço ocupado
+        elif comando == "du":
+            if len(args) <= 1:
+                alvo = normalize_path(args[0]) if args else current_path
+                uso = fs.du(alvo)
+                if uso is None:
+                    print(f"'{alvo}' não encontrado.")
+                    continue
+                diretorio = fs.find_directory(alvo)
+                for sub in (diretorio.subdirectories if diretorio else []):
+                    print(f"{sub.total_size:>10} bytes  {sub.total_files:>6} arquivos  {alvo.rstrip('/')}/{sub.name}")
+                arquivos, pastas, tamanho = uso
+                print(f"{tamanho:>10} bytes  {arquivos:>6} arquivos  {alvo} (total, {pastas} pastas)")
+            else:
+                print("Comando inválido.")
+
         # Comando create - Cria novo arquivo
         elif comando == "create":
             if len(args) == 1:
@@ -116,11 +200,10 @@ exit                     - Sai do simulador
         elif comando == "write":
             if len(args) == 1:
                 file_path = normalize_path(args[0])
-                parent_dir, filename = fs._navigate_to_dir(file_path)
-                file = parent_dir.find_file(filename)
+                file = fs.find_file(file_path)
 
                 if not file:
-                    print(f"Arquivo '{filename}' não encontrado.")
+                    print(f"Arquivo '{args[0]}' não encontrado.")
                     continue
 
                 current_content = file.content.strip()
@@ -152,8 +235,31 @@ exit                     - Sai do simulador
         # Comando chmod - Altera permissões
         elif comando == "chmod":
             if len(args) == 3:
-                file_path = normalize_path(args[0])
-                fs.set_file_permission(file_path, args[1], args[2], admin=user)
+                target_path = normalize_path(args[0])
+                if not fs.find_file(target_path) and fs.directory_exists(target_path):
+                    fs.set_directory_permission(target_path, args[1], args[2], admin=user)
+                else:
+                    fs.set_file_permission(target_path, args[1], args[2], admin=user)
+            else:
+                print("Comando inválido.")
+
+        # Comando group - Gerencia grupos de usuários
+        elif comando == "group":
+            if len(args) == 1 and args[0] == "list":
+                if not fs.permissions.groups:
+                    print("Nenhum grupo definido.")
+                for grupo, membros in sorted(fs.permissions.groups.items()):
+                    print(f"{grupo}: {', '.join(sorted(membros))}")
+            elif len(args) == 3 and args[0] in ("add", "del"):
+                if user not in fs.permissions.admins:
+                    print(f"[{user}] Sem permissão para alterar grupos.")
+                elif args[0] == "add":
+                    fs.permissions.add_to_group(args[2], args[1])
+                    print(f"Usuário '{args[2]}' adicionado ao grupo '{args[1]}'.")
+                elif fs.permissions.remove_from_group(args[2], args[1]):
+                    print(f"Usuário '{args[2]}' removido do grupo '{args[1]}'.")
+                else:
+                    print(f"Usuário '{args[2]}' não pertence ao grupo '{args[1]}'.")
             else:
                 print("Comando inválido.")
 
@@ -161,20 +267,172 @@ exit                     - Sai do simulador
         elif comando == "journal":
             if not fs.journal:
                 print("O journal está vazio.")
+                continue
+            filtros = {}
+            pagina = 1
+            try:
+                if len(args) % 2:
+                    raise ValueError("opção sem valor")
+                for opcao, valor in zip(args[::2], args[1::2]):
+                    if opcao == "--user":
+                        filtros["user"] = valor
+                    elif opcao == "--path":
+                        filtros["path"] = normalize_path(valor)
+                    elif opcao in ("--since", "--until"):
+                        filtros[opcao[2:]] = parse_time(valor)
+                    elif opcao == "--page":
+                        pagina = max(1, int(valor))
+                    else:
+                        raise ValueError(f"opção desconhecida '{opcao}'")
+            except ValueError as e:
+                print(f"Comando inválido: {e}")
+                continue
+            offset = (pagina - 1) * JOURNAL_PAGE_SIZE
+            # Busca um registro a mais para saber se existe próxima página
+            entradas = fs.query_journal(offset=offset, limit=JOURNAL_PAGE_SIZE + 1, **filtros)
+            if not entradas:
+                print("Nenhum registro encontrado.")
+                continue
+            print(f"Conteúdo do journal (página {pagina}):")
+            for i, entry in enumerate(entradas[:JOURNAL_PAGE_SIZE], offset + 1):
+                hora = datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{i}. [{hora}] Ação: {entry.action}, Arquivo: {entry.target}, Usuário: {entry.user}, Conteúdo: {entry.preview()}")
+            if len(entradas) > JOURNAL_PAGE_SIZE:
+                print(f"... use '--page {pagina + 1}' para ver mais registros.")
+
+        # Comando checkpoint - Libera os segmentos do log já aplicados
+        elif comando == "checkpoint":
+            fs.checkpoint()
+            log = fs.journal.stats()
+            print(f"Checkpoint registrado. Log: {log['used_bytes']}/{log['capacity_bytes']} bytes em uso.")
+
+        # Comando import - Importa em lote uma árvore do host
+        elif comando == "import":
+            if len(args) in (1, 2):
+                destino = normalize_path(args[1]) if len(args) == 2 else current_path
+                try:
+                    verbose, fs.verbose = fs.verbose, False  # Uma mensagem por lote seria excessiva
+                    relatorio = import_tree(fs, args[0], destino, user=user)
+                except OSError as e:
+                    print(f"Erro ao importar: {e}")
+                else:
+                    print(relatorio.summary())
+                finally:
+                    fs.verbose = verbose
             else:
-                print("Conteúdo do journal:")
-                for i, entry in enumerate(fs.journal, 1):
-                    content_preview = entry.content
-                    if content_preview is not None and len(str(content_preview)) > 20:
-                        content_preview = str(content_preview)[:20] + "..."
-                    print(f"{i}. Ação: {entry.action}, Arquivo: {entry.target}, Usuário: {entry.user}, Conteúdo: {content_preview}")
+                print("Comando inválido.")
+
+        # Comando export - Exporta em lote uma árvore para o host
+        elif comando == "export":
+            if len(args) in (1, 2):
+                origem = normalize_path(args[1]) if len(args) == 2 else current_path
+                try:
+                    relatorio = export_tree(fs, args[0], origem)
+                except OSError as e:
+                    print(f"Erro ao exportar: {e}")
+                else:
+                    if relatorio is None:
+                        print(f"Diretório '{origem}' não encontrado.")
+                    else:
+                        print(relatorio.summary())
+            else:
+                print("Comando inválido.")
+
+        # Comando chkdsk - Recalcula os hashes de Merkle e compara com os armazenados
+        elif comando == "chkdsk":
+            verificados, problemas = fs.check_disk()
+            print(f"{verificados} itens verificados. Hash da raiz: {fs.root.digest:032x}")
+            if not problemas:
+                print("Nenhuma inconsistência encontrada.")
+            for caminho in problemas:
+                print(f"Hash inconsistente: {caminho}")
+
+        # Comando snapshot - Cria, consulta e libera snapshots da árvore
+        elif comando == "snapshot":
+            acao = args[0] if args else "create"
+            try:
+                # Ids de snapshot: um para release/read/ls, até dois para diff
+                ids = [int(arg) for arg in (args[1:3] if acao == "diff" else args[1:2])]
+            except ValueError:
+                ids = []
+            if acao == "create":
+                fs.create_snapshot(" ".join(args[1:]) or None)
+            elif acao == "list" and len(args) == 1:
+                if not fs.snapshots:
+                    print("Nenhum snapshot ativo.")
+                for snap in fs.snapshots.values():
+                    hora = datetime.fromtimestamp(snap.created_at).strftime("%Y-%m-%d %H:%M:%S")
+                    print(f"{snap.id}. [{hora}] {snap.label or ''}")
+            elif acao == "release" and len(args) == 2 and ids:
+                fs.release_snapshot(ids[0])
+            elif acao == "read" and len(args) == 3 and ids:
+                fs.read_file(normalize_path(args[2]), user=user, snapshot=ids[0])
+            elif acao == "ls" and len(args) in (2, 3) and ids:
+                fs.list_directory(normalize_path(args[2]) if len(args) == 3 else current_path, snapshot=ids[0])
+            elif acao == "diff" and len(args) in (2, 3) and len(ids) == len(args) - 1:
+                mudancas = fs.diff_snapshots(*ids)
+                if mudancas is not None:
+                    if not mudancas:
+                        print("Nenhuma diferença.")
+                    nomes = {'added': '+', 'removed': '-', 'modified': '~'}
+                    for mudanca, caminho, diretorio in mudancas:
+                        print(f"{nomes[mudanca]} {caminho}{'/' if diretorio else ''}")
+            else:
+                print("Comando inválido.")
+
+        # Comando usn - Lê o journal de mudanças a partir do cursor do consumidor
+        elif comando == "usn":
+            if len(args) > 1:
+                print("Comando inválido.")
+                continue
+            consumidor = args[0] if args else "cli"
+            if consumidor not in fs.usn.cursors:
+                fs.usn.register(consumidor, fs.usn.first_usn)
+            try:
+                mudancas = list(fs.usn.read(consumidor, max_records=USN_BATCH_SIZE))
+            except UsnJournalWrapError as e:
+                print(f"{e}. Cursor reposicionado; ressincronize a árvore completa.")
+                fs.usn.register(consumidor, fs.usn.first_usn)
+                continue
+            if not mudancas:
+                print(f"Nenhuma mudança nova para '{consumidor}'.")
+            for m in mudancas:
+                tipo = "<DIR>" if m.is_directory else "     "
+                print(f"USN {m.usn}: {tipo} {m.name} (ref {m.file_ref}, pai {m.parent_ref}) - {format_reason(m.reason)}")
+            if fs.usn.cursors[consumidor] < fs.usn.next_usn:
+                print("... execute novamente para ler mais mudanças.")
+
+        # Comando stats - Mostra métricas de desempenho
+        elif comando == "stats":
+            if not args:
+                snapshot = fs.metrics.snapshot()
+                print(f"{'operação':<18}{'qtd':>8}{'média (µs)':>12}{'p50 (µs)':>10}{'p99 (µs)':>10}{'máx (µs)':>10}")
+                for nome, h in snapshot['operations'].items():
+                    print(f"{nome:<18}{h['count']:>8}{h['mean'] * 1e6:>12.1f}{h['p50'] * 1e6:>10.1f}"
+                          f"{h['p99'] * 1e6:>10.1f}{h['max'] * 1e6:>10.1f}")
+                for nome, valor in snapshot['gauges'].items():
+                    print(f"{nome}: {valor:.2f}" if isinstance(valor, float) else f"{nome}: {valor}")
+            elif args == ["json"]:
+                print(fs.metrics.to_json())
+            elif args == ["prom"]:
+                print(fs.metrics.to_prometheus(), end="")
+            else:
+                print("Comando inválido.")
 
         # Comando crash - Simula falha e recuperação
         elif comando == "crash":
+            def mostrar_progresso(p):
+                eta = f", restante ~{p.eta:.1f}s" if p.eta is not None else ""
+                print(f"Recuperação: {p.entries_done}/{p.entries_total} registros "
+                      f"({p.fraction:.0%}){eta}")
+
             try:
-                fs.simulate_crash_and_recovery()
+                relatorio = fs.simulate_crash_and_recovery(
+                    progress=mostrar_progresso if len(fs.journal) >= 1000 else None,
+                    profile=args[0] if args else None)
                 print("💥 Falha simulada com sucesso!")
                 print("🔁 Sistema recuperado automaticamente com base no journal.")
+                print(relatorio.summary())
             except Exception as e:
                 print(f"Erro na simulação de falha: {str(e)}")
         
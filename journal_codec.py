@@ -0,0 +1,192 @@
+""" Codificação compacta das cargas do journal (delta + compressão) """
+import lzma
+import struct
+import time
+import zlib
+
+# Bits do campo de flags de uma carga codificada
+FLAG_DELTA = 0x01      # Carga é um delta em relação à versão anterior
+FLAG_ZLIB = 0x02       # Carga comprimida com zlib
+FLAG_LZMA = 0x04       # Carga comprimida com lzma
+FLAG_NONE = 0x80       # Conteúdo ausente (None)
+
+ALGORITHMS = ('none', 'zlib', 'lzma')
+
+_DELTA_HEADER = struct.Struct('>II')  # (tamanho do prefixo comum, tamanho do sufixo comum)
+
+
+def _common_prefix_len(a, b):
+    """
+    Calcula o tamanho do prefixo comum entre duas strings
+    Args:
+        a (str): Primeira string
+        b (str): Segunda string
+    Returns:
+        int: Número de caracteres iniciais iguais
+    """
+
+    # Busca binária comparando fatias (as comparações rodam em C)
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a, b, limit):
+    """
+    Calcula o tamanho do sufixo comum entre duas strings
+    Args:
+        a (str): Primeira string
+        b (str): Segunda string
+        limit (int): Tamanho máximo do sufixo (evita sobrepor o prefixo)
+    Returns:
+        int: Número de caracteres finais iguais
+    """
+
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def decode_payload(flags, payload, base=None):
+    """
+    Decodifica uma carga produzida por JournalCodec.encode
+    Args:
+        flags (int): Flags da carga
+        payload (bytes): Carga codificada
+        base (str): Conteúdo anterior do arquivo (obrigatório para deltas)
+    Returns:
+        str: Conteúdo original (ou None se o conteúdo era ausente)
+    Raises:
+        ValueError: Se a carga for um delta e a base não for informada
+    """
+
+    if flags & FLAG_NONE:
+        return None
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    elif flags & FLAG_LZMA:
+        payload = lzma.decompress(payload)
+    if not flags & FLAG_DELTA:
+        return payload.decode('utf-8')
+    if base is None:
+        raise ValueError("Delta do journal requer o conteúdo anterior do arquivo")
+    prefix, suffix = _DELTA_HEADER.unpack_from(payload)
+    middle = payload[_DELTA_HEADER.size:].decode('utf-8')
+    return base[:prefix] + middle + base[len(base) - suffix:]
+
+
+def delta_inserted_length(flags, payload):
+    """
+    Retorna quantos caracteres novos um delta insere (usado em prévias)
+    Args:
+        flags (int): Flags da carga
+        payload (bytes): Carga codificada
+    Returns:
+        int: Número de caracteres inseridos pelo delta
+    """
+
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    elif flags & FLAG_LZMA:
+        payload = lzma.decompress(payload)
+    return len(payload[_DELTA_HEADER.size:].decode('utf-8'))
+
+
+class JournalCodec:
+    """Codifica o conteúdo das entradas do journal como delta e/ou comprimido"""
+
+    def __init__(self, algorithm='zlib', level=6, threshold=256, delta=True):
+        """
+        Inicializa o codificador
+        Args:
+            algorithm (str): Algoritmo de compressão ('none', 'zlib' ou 'lzma')
+            level (int): Nível de compressão (0-9)
+            threshold (int): Tamanho mínimo (bytes) para tentar comprimir
+            delta (bool): Se escritas devem ser gravadas como delta quando menor
+        Raises:
+            ValueError: Se o algoritmo ou o nível forem inválidos
+        """
+
+        if algorithm not in ALGORITHMS:
+            raise ValueError("Algoritmo inválido. Use 'none', 'zlib' ou 'lzma'")
+        if not 0 <= level <= 9:
+            raise ValueError("Nível de compressão deve estar entre 0 e 9")
+        self.algorithm = algorithm
+        self.level = level
+        self.threshold = threshold
+        self.delta = delta
+
+        # Estatísticas acumuladas
+        self.raw_bytes = 0       # Bytes que seriam gravados sem codificação
+        self.encoded_bytes = 0   # Bytes efetivamente gravados
+        self.delta_count = 0     # Cargas gravadas como delta
+        self.compressed_count = 0  # Cargas comprimidas
+        self.encode_time = 0.0   # Tempo de CPU gasto codificando (s)
+
+    def _compress(self, data):
+        """Comprime os bytes com o algoritmo configurado"""
+        if self.algorithm == 'zlib':
+            return zlib.compress(data, self.level), FLAG_ZLIB
+        return lzma.compress(data, preset=self.level), FLAG_LZMA
+
+    def encode(self, content, base=None):
+        """
+        Codifica um conteúdo para gravação no journal
+        Args:
+            content (str): Conteúdo a ser gravado (ou None)
+            base (str): Conteúdo anterior do arquivo, para codificação delta (opcional)
+        Returns:
+            tuple: (int: flags, bytes: carga codificada)
+        """
+
+        if content is None:
+            return FLAG_NONE, b''
+
+        start = time.process_time()
+        data = content.encode('utf-8')
+        flags = 0
+        encoded = data
+
+        if self.delta and base is not None:
+            prefix = _common_prefix_len(base, content)
+            limit = min(len(base), len(content)) - prefix
+            suffix = _common_suffix_len(base, content, limit)
+            middle = content[prefix:len(content) - suffix]
+            delta = _DELTA_HEADER.pack(prefix, suffix) + middle.encode('utf-8')
+            if len(delta) < len(encoded):
+                encoded = delta
+                flags |= FLAG_DELTA
+                self.delta_count += 1
+
+        if self.algorithm != 'none' and len(encoded) >= self.threshold:
+            compressed, algorithm_flag = self._compress(encoded)
+            if len(compressed) < len(encoded):
+                encoded = compressed
+                flags |= algorithm_flag
+                self.compressed_count += 1
+
+        self.encode_time += time.process_time() - start
+        self.raw_bytes += len(data)
+        self.encoded_bytes += len(encoded)
+        return flags, encoded
+
+    def compression_ratio(self):
+        """
+        Calcula a razão entre bytes originais e bytes gravados
+        Returns:
+            float: Razão de compressão (1.0 se nada foi gravado)
+        """
+
+        if not self.encoded_bytes:
+            return 1.0
+        return self.raw_bytes / self.encoded_bytes
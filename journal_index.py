@@ -0,0 +1,183 @@
+""" Índices secundários sobre o journal: por usuário, por caminho (trie) e por tempo """
+import bisect
+
+
+class _PathNode:
+    """Nó da trie de caminhos"""
+
+    __slots__ = ('children', 'lsns')
+
+    def __init__(self):
+        self.children = {}  # Componente do caminho -> _PathNode
+        self.lsns = []      # LSNs (ordenados) dos registros cujo alvo está nesta subárvore
+
+
+class JournalIndex:
+    """
+    Índices dos registros ativos do journal.
+
+    Os registros chegam em ordem de LSN e de tempo, então cada lista de LSNs
+    já nasce ordenada: o índice de tempo é uma busca binária que converte um
+    intervalo de horários em um intervalo de LSNs, e os índices por usuário e
+    por prefixo de caminho são listas ordenadas recortadas por esse intervalo.
+    Cada nó da trie guarda os LSNs de toda a sua subárvore (a raiz usa a
+    própria lista do índice de tempo), então uma consulta por prefixo não
+    precisa intercalar uma lista por caminho antes do primeiro resultado.
+    """
+
+    def __init__(self, resolve):
+        """
+        Inicializa índices vazios
+        Args:
+            resolve (callable): Função que devolve o registro de um LSN (ex: CircularLog.find)
+        """
+        self.resolve = resolve
+        self.by_user = {}          # Usuário -> lista ordenada de LSNs
+        self.paths = _PathNode()   # Trie de caminhos dos alvos
+        self.times = []            # Horários (não decrescentes) dos registros
+        self.lsns = []             # LSNs correspondentes a self.times
+
+    def __len__(self):
+        return len(self.lsns)
+
+    @staticmethod
+    def _split(path):
+        """Divide um caminho em componentes"""
+        return [part for part in path.strip("/").split("/") if part]
+
+    def add(self, entry):
+        """
+        Indexa um registro recém-gravado
+        Args:
+            entry (JournalEntry): Registro com lsn e timestamp definidos
+        """
+
+        lsn = entry.lsn
+        timestamp = entry.timestamp
+        if self.times and timestamp < self.times[-1]:
+            timestamp = self.times[-1]  # Mantém o índice de tempo ordenado se o relógio recuar
+        self.times.append(timestamp)
+        self.lsns.append(lsn)
+        self.by_user.setdefault(entry.user, []).append(lsn)
+
+        node = self.paths
+        for part in self._split(entry.target):
+            node = node.children.setdefault(part, _PathNode())
+            node.lsns.append(lsn)
+
+    def prune(self, min_lsn):
+        """
+        Remove dos índices os registros anteriores ao LSN informado
+        Args:
+            min_lsn (int): Menor LSN ainda ativo no journal
+        """
+
+        cut = bisect.bisect_left(self.lsns, min_lsn)
+        del self.times[:cut]
+        del self.lsns[:cut]
+        for user in list(self.by_user):
+            lsns = self.by_user[user]
+            del lsns[:bisect.bisect_left(lsns, min_lsn)]
+            if not lsns:
+                del self.by_user[user]
+
+        # Percorre a trie descartando LSNs antigos; um nó vazio leva junto a subárvore
+        stack = [self.paths]
+        while stack:
+            node = stack.pop()
+            for name in list(node.children):
+                child = node.children[name]
+                del child.lsns[:bisect.bisect_left(child.lsns, min_lsn)]
+                if child.lsns:
+                    stack.append(child)
+                else:
+                    del node.children[name]
+
+    def lsn_range(self, since=None, until=None):
+        """
+        Converte um intervalo de horários em um intervalo de LSNs
+        Args:
+            since (float): Horário inicial (inclusivo, epoch em segundos)
+            until (float): Horário final (exclusivo, epoch em segundos)
+        Returns:
+            tuple: (int: menor LSN, int: maior LSN exclusivo) ou None se vazio
+        """
+
+        start = 0 if since is None else bisect.bisect_left(self.times, since)
+        end = len(self.times) if until is None else bisect.bisect_left(self.times, until)
+        if start >= end:
+            return None
+        return self.lsns[start], self.lsns[end - 1] + 1
+
+    def _path_lsns(self, path):
+        """
+        Localiza os LSNs da subárvore de um prefixo de caminho
+        Returns:
+            list: LSNs ordenados (None se nenhum registro ativo tiver o prefixo)
+        """
+
+        node = self.paths
+        for part in self._split(path):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node.lsns if node is not self.paths else self.lsns
+
+    @staticmethod
+    def _slice(lsns, low, high, reverse):
+        """Itera sobre os LSNs de uma lista ordenada dentro de [low, high)"""
+        start = bisect.bisect_left(lsns, low)
+        end = bisect.bisect_left(lsns, high)
+        indexes = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        return (lsns[i] for i in indexes)
+
+    def query(self, user=None, path=None, since=None, until=None, reverse=False):
+        """
+        Gera os LSNs dos registros que atendem a todos os filtros
+        Args:
+            user (str): Usuário responsável pelo registro (opcional)
+            path (str): Prefixo de caminho do alvo (opcional)
+            since (float): Horário inicial, inclusivo (opcional)
+            until (float): Horário final, exclusivo (opcional)
+            reverse (bool): Se True, do registro mais recente para o mais antigo
+        Yields:
+            int: LSNs em ordem crescente (ou decrescente, com reverse)
+        """
+
+        bounds = self.lsn_range(since, until)
+        if bounds is None:
+            return
+        low, high = bounds
+
+        user_lsns = None
+        if user is not None:
+            user_lsns = self.by_user.get(user)
+            if not user_lsns:
+                return
+        path_lsns = None
+        if path is not None:
+            path_lsns = self._path_lsns(path)
+            if not path_lsns:
+                return
+
+        # Percorre o índice mais seletivo e confere os demais filtros no próprio registro
+        user_size = len(user_lsns) if user_lsns is not None else float('inf')
+        path_size = len(path_lsns) if path_lsns is not None else float('inf')
+        if user_lsns is None and path_lsns is None:
+            yield from self._slice(self.lsns, low, high, reverse)
+        elif user_size <= path_size:
+            candidates = self._slice(user_lsns, low, high, reverse)
+            if path_lsns is None:
+                yield from candidates
+            else:
+                prefix = "/" + "/".join(self._split(path))
+                for lsn in candidates:
+                    target = "/" + "/".join(self._split(self.resolve(lsn).target))
+                    if target == prefix or target.startswith(prefix + "/") or prefix == "/":
+                        yield lsn
+        else:
+            candidates = self._slice(path_lsns, low, high, reverse)
+            if user_lsns is None:
+                yield from candidates
+            else:
+                yield from (lsn for lsn in candidates if self.resolve(lsn).user == user)
@@ -0,0 +1,186 @@
+""" Gerador de carga: muitos usuários simulados acessando o servidor do simulador """
+import argparse
+import asyncio
+import math
+import random
+import threading
+import time
+
+from benchmark import random_text
+from client import ClientPool, RemoteError
+from server import FileSystemServer
+
+
+def start_local_server():
+    """
+    Inicia um servidor em uma thread do próprio processo
+    Returns:
+        tuple: (host, porta) em que o servidor está ouvindo
+    """
+
+    ready = threading.Event()
+    address = []
+
+    def run():
+        async def serve():
+            server = FileSystemServer()
+            address.append(await server.start())
+            ready.set()
+            await server.serve_forever()
+
+        asyncio.run(serve())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return address[0]
+
+
+def percentile(values, q):
+    """
+    Percentil exato (método do posto mais próximo) de uma lista ordenada
+    Args:
+        values (list): Amostras em ordem crescente
+        q (float): Quantil desejado (0-1)
+    Returns:
+        float: Menor amostra com pelo menos q das amostras até ela (0.0 se vazia)
+    """
+
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+class LoadReport:
+    """Vazão e latências observadas pelos usuários simulados"""
+
+    def __init__(self):
+        self.latencies = []  # Latência de cada chamada ao servidor (amostras brutas)
+        self.operations = 0  # Operações executadas (cada item de um lote conta)
+        self.errors = 0      # Operações que falharam no servidor
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, operations, errors=0):
+        """Registra uma chamada ao servidor"""
+        with self._lock:
+            self.latencies.append(seconds)
+            self.operations += operations
+            self.errors += errors
+
+    def summary(self, users, connections, waits):
+        """
+        Formata o relatório para exibição
+        Returns:
+            str: Texto com vazão e latências
+        """
+
+        latencies = sorted(self.latencies)
+        calls = len(latencies)
+        mean = sum(latencies) / calls if calls else 0.0
+        return "\n".join([
+            f"{users} usuários, {connections} conexões, {self.elapsed:.2f} s",
+            f"  operações: {self.operations} ({self.operations / self.elapsed:.0f} ops/s), erros: {self.errors}",
+            f"  chamadas: {calls} ({calls / self.elapsed:.0f}/s), esperas por conexão livre: {waits}",
+            f"  latência: média {mean * 1000:.2f} ms, p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+            f"p99.9 {percentile(latencies, 0.999) * 1000:.2f} ms, "
+            f"máx {(latencies[-1] if latencies else 0.0) * 1000:.2f} ms",
+        ])
+
+
+def simulated_user(pool, report, index, deadline, batch, seed):
+    """
+    Laço de um usuário simulado: cria seus arquivos e depois lê, escreve e lista até o prazo
+    Args:
+        pool (ClientPool): Pool de conexões compartilhado
+        report (LoadReport): Relatório onde as chamadas são registradas
+        index (int): Número do usuário (define seu diretório)
+        deadline (float): Instante (time.perf_counter) em que o usuário para
+        batch (int): Operações por chamada (1 desativa os lotes)
+        seed (int): Semente do gerador pseudoaleatório
+    """
+
+    rng = random.Random(seed + index)
+    base = f"/usuarios/u{index}"
+    paths = [f"{base}/arq{i}.txt" for i in range(10)]
+    with pool.connection() as client:
+        client.batch([('create_file', path, random_text(rng, 20)) for path in paths])
+
+    while time.perf_counter() < deadline:
+        requests = []
+        for _ in range(batch):
+            roll = rng.random()
+            path = rng.choice(paths)
+            if roll < 0.6:
+                requests.append(('read_file', path))
+            elif roll < 0.8:
+                requests.append(('append_to_file', path, " " + random_text(rng, 3)))
+            elif roll < 0.95:
+                requests.append(('write_file', path, random_text(rng, 20)))
+            else:
+                requests.append(('listing', base))
+
+        start = time.perf_counter()
+        with pool.connection() as client:
+            if batch == 1:
+                try:
+                    client.call(*requests[0])
+                    errors = 0
+                except RemoteError:
+                    errors = 1
+            else:
+                try:
+                    client.batch(requests)
+                    errors = 0
+                except RemoteError:
+                    errors = len(requests)
+        report.record(time.perf_counter() - start, len(requests), errors)
+
+
+def run_load(address, users, connections, seconds, batch, seed):
+    """
+    Executa a carga e imprime o relatório
+    Args:
+        address (str | tuple): Endereço do servidor
+        users (int): Usuários simulados (threads)
+        connections (int): Tamanho do pool de conexões
+        seconds (float): Duração da carga
+        batch (int): Operações por chamada
+        seed (int): Semente do gerador pseudoaleatório
+    Returns:
+        LoadReport: Vazão e latências observadas
+    """
+
+    pool = ClientPool(address, connections)
+    report = LoadReport()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=simulated_user, args=(pool, report, i, deadline, batch, seed))
+               for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.elapsed = time.perf_counter() - start
+    print(report.summary(users, connections, pool.waits))
+    pool.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga para o servidor do simulador")
+    parser.add_argument("--address", help="Servidor: host:porta ou caminho de socket Unix "
+                                          "(padrão: inicia um servidor local neste processo)")
+    parser.add_argument("--users", type=int, default=200, help="Usuários simulados simultâneos")
+    parser.add_argument("--connections", type=int, default=32, help="Conexões no pool")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duração da carga")
+    parser.add_argument("--batch", type=int, default=1, help="Operações por chamada")
+    parser.add_argument("--seed", type=int, default=42, help="Semente pseudoaleatória")
+    args = parser.parse_args()
+
+    address = args.address or start_local_server()
+    run_load(address, args.users, args.connections, args.seconds, args.batch, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+""" Log circular de tamanho fixo, dividido em segmentos (como o $LogFile do NTFS) """
+import bisect
+import os
+import struct
+import time
+
+
+class LogFullError(Exception):
+    """Registro não cabe no log nem após um checkpoint forçado"""
+
+
+class CircularLog:
+    """
+    Journal circular formado por segmentos de tamanho fixo.
+
+    Cada registro recebe um LSN (Log Sequence Number) igual à sua posição em
+    bytes no fluxo lógico do log. Os segmentos anteriores ao último checkpoint
+    são recuperados automaticamente e, quando o log se aproxima da capacidade,
+    um checkpoint é forçado antes de aceitar novos registros.
+    """
+
+    _RESTART = struct.Struct('>4sQQ')  # (assinatura, LSN do checkpoint, próximo LSN)
+    RESTART_AREA_SIZE = 512            # Bytes reservados no início do arquivo de log
+
+    def __init__(self, segment_size=64 * 1024, segment_count=16, force_threshold=0.75,
+                 on_pressure=None, path=None):
+        """
+        Inicializa o log circular
+        Args:
+            segment_size (int): Tamanho de cada segmento em bytes
+            segment_count (int): Número de segmentos do log
+            force_threshold (float): Ocupação (0-1) que dispara um checkpoint forçado
+            on_pressure (callable): Função chamada para forçar um checkpoint (opcional)
+            path (str): Arquivo de tamanho fixo onde os registros são gravados (opcional)
+        Raises:
+            ValueError: Se a configuração for inválida
+        """
+
+        if segment_size <= 0 or segment_count < 2:
+            raise ValueError("O log precisa de pelo menos 2 segmentos de tamanho positivo")
+        if not 0 < force_threshold <= 1:
+            raise ValueError("force_threshold deve estar entre 0 e 1")
+        self.segment_size = segment_size
+        self.segment_count = segment_count
+        self.capacity = segment_size * segment_count
+        self.force_threshold = force_threshold
+        self.on_pressure = on_pressure
+
+        self.segments = [[] for _ in range(segment_count)]  # Registros por segmento
+        self.next_lsn = 0        # LSN do próximo registro (bytes já gravados)
+        self.oldest_lsn = 0      # Início do segmento ativo mais antigo
+        self.checkpoint_lsn = 0  # LSN do último checkpoint
+        self._count = 0          # Registros ativos (posteriores ao checkpoint)
+        self.flushed_lsn = 0     # Registros com LSN menor que este já são duráveis
+
+        # Métricas de ocupação e contrapressão
+        self.high_water = 0          # Maior ocupação observada (bytes)
+        self.checkpoints = 0         # Checkpoints realizados
+        self.forced_checkpoints = 0  # Checkpoints forçados pela ocupação do log
+        self.stalls = 0              # Gravações que encontraram o log cheio
+        self.pressure_time = 0.0     # Tempo gasto em checkpoints forçados (s)
+        self.reclaimed_bytes = 0     # Bytes liberados por checkpoints
+        self.reclaimed_records = 0   # Registros liberados por checkpoints
+        self.forces = 0              # Gravações forçadas pela regra do WAL
+
+        self.path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, 'w+b')
+            self._file.truncate(self.RESTART_AREA_SIZE + self.capacity)
+            self._write_restart_area()
+
+    def __len__(self):
+        """Número de registros ativos no log"""
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __iter__(self):
+        """Itera sobre os registros ativos (posteriores ao último checkpoint) em ordem de LSN"""
+        return self.entries_since(self.checkpoint_lsn)
+
+    @property
+    def used_bytes(self):
+        """Bytes ocupados pelos segmentos ativos"""
+        return self.next_lsn - self.oldest_lsn
+
+    @property
+    def max_record_size(self):
+        """Maior registro que sempre cabe no log (após um checkpoint o segmento atual continua ativo)"""
+        return self.capacity - self.segment_size
+
+    def _segment_index(self, lsn):
+        """Segmento que contém o LSN informado"""
+        return (lsn // self.segment_size) % self.segment_count
+
+    def entries_since(self, lsn):
+        """
+        Gera os registros retidos com LSN maior ou igual ao informado
+        Args:
+            lsn (int): LSN inicial
+        Yields:
+            JournalEntry: Registros em ordem de LSN
+        """
+
+        start = max(lsn, self.oldest_lsn)
+        if start >= self.next_lsn:
+            return
+        first = start // self.segment_size
+        last = (self.next_lsn - 1) // self.segment_size
+        for number in range(first, last + 1):
+            segment = self.segments[number % self.segment_count]
+            pos = bisect.bisect_left(segment, start, key=lambda entry: entry.lsn) if number == first else 0
+            for entry in segment[pos:]:
+                yield entry
+
+    def find(self, lsn):
+        """
+        Localiza um registro retido pelo LSN
+        Args:
+            lsn (int): LSN do registro
+        Returns:
+            JournalEntry: Registro encontrado, ou None se já foi recuperado
+        """
+
+        if not self.oldest_lsn <= lsn < self.next_lsn:
+            return None
+        segment = self.segments[self._segment_index(lsn)]
+        pos = bisect.bisect_left(segment, lsn, key=lambda entry: entry.lsn)
+        if pos < len(segment) and segment[pos].lsn == lsn:
+            return segment[pos]
+        return None
+
+    def append(self, entry):
+        """
+        Acrescenta um registro ao log, forçando um checkpoint se necessário
+        Args:
+            entry (JournalEntry): Registro a ser gravado
+        Returns:
+            int: LSN atribuído ao registro
+        Raises:
+            LogFullError: Se o registro não couber no log mesmo após um checkpoint
+        """
+
+        size = entry.size
+        if self.used_bytes + size > self.capacity:
+            self.stalls += 1
+            self._relieve_pressure()
+        elif self.used_bytes + size > self.capacity * self.force_threshold:
+            self._relieve_pressure()
+        if self.used_bytes + size > self.capacity:
+            raise LogFullError(f"Registro de {size} bytes não cabe no log ({self.capacity} bytes)")
+
+        entry.lsn = self.next_lsn
+        self.segments[self._segment_index(entry.lsn)].append(entry)
+        if self._file is not None:
+            self._write_record(entry.lsn, entry.to_bytes())
+        self.next_lsn += size
+        self._count += 1
+        self.high_water = max(self.high_water, self.used_bytes)
+        return entry.lsn
+
+    def _relieve_pressure(self):
+        """Dispara um checkpoint forçado para liberar segmentos"""
+        if self.on_pressure is None:
+            return
+        start = time.perf_counter()
+        self.forced_checkpoints += 1
+        self.on_pressure()
+        self.pressure_time += time.perf_counter() - start
+
+    def checkpoint(self, lsn=None):
+        """
+        Registra um checkpoint e libera os segmentos anteriores a ele
+        Args:
+            lsn (int): LSN a partir do qual os registros ainda são necessários
+                       (padrão: próximo LSN, ou seja, todo o log foi aplicado)
+        """
+
+        lsn = self.next_lsn if lsn is None else lsn
+        self.checkpoints += 1
+        self._count = sum(1 for _ in self.entries_since(lsn))
+        self.checkpoint_lsn = lsn
+
+        new_oldest = lsn - lsn % self.segment_size
+        first = self.oldest_lsn // self.segment_size
+        last = new_oldest // self.segment_size
+        for number in range(first, min(last, first + self.segment_count)):
+            segment = self.segments[number % self.segment_count]
+            self.reclaimed_records += len(segment)
+            segment.clear()
+        self.reclaimed_bytes += new_oldest - self.oldest_lsn
+        self.oldest_lsn = new_oldest
+        if self._file is not None:
+            self._write_restart_area()
+
+    def _write_record(self, lsn, data):
+        """Grava um registro serializado na posição circular correspondente do arquivo"""
+        offset = lsn % self.capacity
+        head = data[:self.capacity - offset]
+        self._file.seek(self.RESTART_AREA_SIZE + offset)
+        self._file.write(head)
+        if len(head) < len(data):
+            self._file.seek(self.RESTART_AREA_SIZE)
+            self._file.write(data[len(head):])
+
+    def _write_restart_area(self):
+        """Grava a área de reinício com o LSN do checkpoint e o próximo LSN"""
+        self._file.seek(0)
+        self._file.write(self._RESTART.pack(b'RSTR', self.checkpoint_lsn, self.next_lsn))
+
+    def flush(self):
+        """Força a gravação do arquivo de log em disco"""
+        lsn = self.next_lsn  # Lido antes da gravação: registros posteriores não são cobertos
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.flushed_lsn = max(self.flushed_lsn, lsn)
+
+    def force(self, lsn):
+        """
+        Garante que o registro informado (e todos os anteriores) seja durável,
+        gravando o log em disco somente se ainda não foi (regra do WAL)
+        Args:
+            lsn (int): LSN do registro
+        """
+
+        if lsn >= self.flushed_lsn:
+            self.forces += 1
+            self.flush()
+
+    def close(self):
+        """Fecha o arquivo de log, se houver"""
+        if self._file is not None:
+            self._write_restart_area()
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        """
+        Retorna as métricas de ocupação e contrapressão do log
+        Returns:
+            dict: Métricas do log
+        """
+
+        return {
+            'capacity_bytes': self.capacity,
+            'used_bytes': self.used_bytes,
+            'usage': self.used_bytes / self.capacity,
+            'high_water_bytes': self.high_water,
+            'active_records': self._count,
+            'checkpoints': self.checkpoints,
+            'forced_checkpoints': self.forced_checkpoints,
+            'stalls': self.stalls,
+            'pressure_time': self.pressure_time,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'reclaimed_records': self.reclaimed_records,
+            'flushed_lsn': self.flushed_lsn,
+            'forces': self.forces,
+        }
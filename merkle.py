@@ -0,0 +1,99 @@
+""" Hashes de Merkle dos nós da árvore, para comparação e verificação rápidas """
+import hashlib
+
+DIGEST_SIZE = 16               # Bytes de cada hash (128 bits)
+MOD = 1 << (DIGEST_SIZE * 8)   # Módulo da soma dos hashes dos filhos
+
+
+def _hash(*parts):
+    """Calcula o hash (inteiro) de uma sequência de partes em bytes"""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        h.update(len(part).to_bytes(8, 'big'))
+        h.update(part)
+    return int.from_bytes(h.digest(), 'big')
+
+
+def _acl_bytes(acl):
+    """Serializa uma ACL de forma canônica"""
+    return ";".join(f"{principal}={mask}" for principal, mask in sorted(acl.items())).encode('utf-8')
+
+
+def file_digest(name, content, acl):
+    """
+    Calcula o hash de um arquivo
+    Args:
+        name (str): Nome do arquivo
+        content (str): Conteúdo do arquivo
+        acl (dict): ACL explícita do arquivo
+    Returns:
+        int: Hash do arquivo
+    """
+
+    return _hash(b'F', name.encode('utf-8'), content.encode('utf-8'), _acl_bytes(acl))
+
+
+def directory_digest(name, acl, children_sum):
+    """
+    Calcula o hash de um diretório a partir da soma dos hashes dos filhos.
+
+    A soma (módulo 2^128) não depende da ordem dos filhos e pode ser
+    atualizada em O(1) quando um único filho muda: basta subtrair o hash
+    antigo e somar o novo.
+    Args:
+        name (str): Nome do diretório
+        acl (dict): ACL herdável do diretório
+        children_sum (int): Soma dos hashes dos arquivos e subdiretórios
+    Returns:
+        int: Hash do diretório
+    """
+
+    return _hash(b'D', name.encode('utf-8'), _acl_bytes(acl), children_sum.to_bytes(DIGEST_SIZE, 'big'))
+
+
+def verify_tree(root):
+    """
+    Recalcula todos os hashes e agregados da árvore e compara com os mantidos nos nós
+    Args:
+        root (Directory): Raiz da árvore
+    Returns:
+        tuple: (int: nós verificados, list: caminhos cujo hash ou agregado armazenado diverge do recalculado)
+    """
+
+    checked = 0
+    problems = []
+    computed = {}  # id(diretório) -> (hash, arquivos, diretórios, bytes) recalculados
+    stack = [(root, "", False)]
+    while stack:
+        directory, path, visited = stack.pop()
+        if not visited:
+            stack.append((directory, path, True))
+            for subdir in directory.subdirectories:
+                stack.append((subdir, f"{path}/{subdir.name}", False))
+            continue
+
+        children_sum = files = dirs = size = 0
+        for file in directory.files:
+            checked += 1
+            digest = file_digest(file.name, file.content, file.acl)
+            file_size = len(file.content.encode('utf-8'))
+            if digest != file.digest or file_size != file.size:
+                problems.append(f"{path}/{file.name}")
+            children_sum += digest
+            files += 1
+            size += file_size
+        for subdir in directory.subdirectories:
+            sub_digest, sub_files, sub_dirs, sub_size = computed.pop(id(subdir))
+            children_sum += sub_digest
+            files += sub_files
+            dirs += sub_dirs + 1
+            size += sub_size
+        children_sum %= MOD
+
+        checked += 1
+        digest = directory_digest(directory.name, directory.acl, children_sum)
+        if (digest != directory.digest or children_sum != directory.children_sum
+                or (files, dirs, size) != (directory.total_files, directory.total_dirs, directory.total_size)):
+            problems.append(path or "/")
+        computed[id(directory)] = (digest, files, dirs, size)
+    return checked, problems
@@ -0,0 +1,228 @@
+""" Métricas de operações do simulador: contadores, histogramas de latência e medidores """
+import bisect
+import functools
+import json
+import time
+
+# Limites superiores (em segundos) dos baldes dos histogramas de latência
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Histograma de latências com baldes fixos"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Inicializa um histograma vazio
+        Args:
+            buckets (tuple): Limites superiores dos baldes em segundos
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Último balde: acima do maior limite
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Registra uma observação
+        Args:
+            value (float): Duração em segundos
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estima um quantil a partir dos baldes
+        Args:
+            q (float): Quantil desejado (0-1)
+        Returns:
+            float: Limite superior do balde que contém o quantil
+        """
+
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        """Converte o histograma em dicionário serializável"""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': {str(le): c for le, c in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+
+class Metrics:
+    """Registro de contadores, histogramas e medidores do sistema de arquivos"""
+
+    def __init__(self, enabled=True):
+        """
+        Inicializa o registro de métricas
+        Args:
+            enabled (bool): Se as operações devem ser medidas
+        """
+
+        self.enabled = enabled
+        self.counters = {}    # Nome -> valor
+        self.histograms = {}  # Nome da operação -> Histogram
+        self._gauges = {}     # Nome -> função que calcula o valor atual
+        self._on_demand = set()  # Medidores caros, omitidos das leituras frequentes
+
+    def increment(self, name, amount=1):
+        """
+        Incrementa um contador
+        Args:
+            name (str): Nome do contador
+            amount (int): Valor a somar
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        """
+        Registra a latência de uma operação
+        Args:
+            name (str): Nome da operação
+            seconds (float): Duração em segundos
+        """
+
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def register_gauge(self, name, function, on_demand=False):
+        """
+        Registra um medidor calculado no momento da leitura
+        Args:
+            name (str): Nome do medidor
+            function (callable): Função sem argumentos que retorna o valor
+            on_demand (bool): Se o cálculo é caro e só deve ser feito quando pedido explicitamente
+        """
+
+        self._gauges[name] = function
+        if on_demand:
+            self._on_demand.add(name)
+        else:
+            self._on_demand.discard(name)
+
+    def reset(self):
+        """Zera contadores e histogramas (os medidores continuam registrados)"""
+        self.counters.clear()
+        self.histograms.clear()
+
+    def gauges(self, on_demand=True):
+        """
+        Calcula o valor atual dos medidores
+        Args:
+            on_demand (bool): Se False, omite os medidores caros (ex: painéis atualizados a cada operação)
+        Returns:
+            dict: Nome do medidor -> valor
+        """
+
+        return {name: function() for name, function in sorted(self._gauges.items())
+                if on_demand or name not in self._on_demand}
+
+    def gauge(self, name):
+        """
+        Calcula o valor atual de um medidor
+        Args:
+            name (str): Nome do medidor
+        Returns:
+            Valor do medidor
+        """
+
+        return self._gauges[name]()
+
+    def snapshot(self, on_demand=True):
+        """
+        Retorna uma fotografia de todas as métricas
+        Args:
+            on_demand (bool): Se False, omite os medidores caros
+        Returns:
+            dict: {'operations': ..., 'counters': ..., 'gauges': ...}
+        """
+
+        return {
+            'enabled': self.enabled,
+            'operations': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            'counters': dict(sorted(self.counters.items())),
+            'gauges': self.gauges(on_demand),
+        }
+
+    def to_json(self, indent=2):
+        """
+        Exporta as métricas em JSON
+        Args:
+            indent (int): Indentação do JSON
+        Returns:
+            str: Documento JSON
+        """
+
+        return json.dumps(self.snapshot(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix='ntfs_sim'):
+        """
+        Exporta as métricas no formato texto do Prometheus
+        Args:
+            prefix (str): Prefixo dos nomes das métricas
+        Returns:
+            str: Métricas no formato de exposição do Prometheus
+        """
+
+        lines = [f"# TYPE {prefix}_operation_seconds histogram"]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for le, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_operation_seconds_bucket{{op="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_operation_seconds_sum{{op="{name}"}} {histogram.sum}')
+            lines.append(f'{prefix}_operation_seconds_count{{op="{name}"}} {histogram.count}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in self.gauges().items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def timed(name):
+    """
+    Decorador que mede a latência de um método do FileSystem
+    Args:
+        name (str): Nome da operação nas métricas
+    Returns:
+        callable: Decorador
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if not metrics.enabled:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
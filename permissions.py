@@ -0,0 +1,188 @@
+""" Modelo de permissões com máscaras de bits, grupos e herança de diretórios """
+
+# Bits de permissão
+NONE = 0x0
+READ = 0x1
+WRITE = 0x2
+FULL = READ | WRITE
+
+_MASKS = {'none': NONE, 'r': READ, 'w': WRITE, 'rw': FULL}
+_NAMES = {mask: name for name, mask in _MASKS.items()}
+
+
+def parse_permission(permission):
+    """
+    Converte uma permissão textual ou numérica em máscara de bits
+    Args:
+        permission (str | int): Permissão ('rw', 'r', 'w', 'none') ou máscara
+    Returns:
+        int: Máscara de bits da permissão
+    Raises:
+        ValueError: Se a permissão for inválida
+    """
+
+    if isinstance(permission, int) and permission in _NAMES:
+        return permission
+    if isinstance(permission, str) and permission.lower() in _MASKS:
+        return _MASKS[permission.lower()]
+    raise ValueError("Permissão inválida. Use 'rw', 'r', 'w' ou 'none'")
+
+
+def format_permission(mask):
+    """
+    Converte uma máscara de bits na permissão textual
+    Args:
+        mask (int): Máscara de bits
+    Returns:
+        str: Permissão ('rw', 'r', 'w' ou 'none')
+    """
+
+    return _NAMES[mask & FULL]
+
+
+class PermissionModel:
+    """
+    Resolve permissões efetivas de usuários sobre arquivos e diretórios.
+
+    A ACL explícita do próprio nó tem prioridade; na falta dela vale a ACL
+    herdada do diretório ancestral mais próximo que tenha uma entrada para o
+    usuário ou para um de seus grupos (como a herança de ACEs do NTFS). O
+    resultado é guardado em cache por (usuário, nó) e descartado sempre que
+    uma ACL ou a associação a grupos muda.
+    """
+
+    def __init__(self, admins=('admin',), max_cache_entries=100_000):
+        """
+        Inicializa o modelo de permissões
+        Args:
+            admins (iterable): Usuários com acesso total a todos os nós
+            max_cache_entries (int): Tamanho máximo do cache de permissões efetivas
+        """
+
+        self.admins = set(admins)
+        self.groups = {}        # Grupo -> conjunto de usuários
+        self._memberships = {}  # Usuário -> tupla de principais (usuário + grupos)
+        self._cache = {}        # (usuário, ref do nó) -> máscara efetiva
+        self.max_cache_entries = max_cache_entries
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def invalidate(self):
+        """Descarta o cache de permissões efetivas (chamado em toda mudança de ACL)"""
+        self._cache.clear()
+
+    def add_to_group(self, user, group):
+        """
+        Adiciona um usuário a um grupo (criando o grupo se necessário)
+        Args:
+            user (str): Nome do usuário
+            group (str): Nome do grupo
+        """
+
+        self.groups.setdefault(group, set()).add(user)
+        self._memberships.pop(user, None)
+        self.invalidate()
+
+    def remove_from_group(self, user, group):
+        """
+        Remove um usuário de um grupo
+        Args:
+            user (str): Nome do usuário
+            group (str): Nome do grupo
+        Returns:
+            bool: True se o usuário fazia parte do grupo
+        """
+
+        members = self.groups.get(group)
+        if not members or user not in members:
+            return False
+        members.discard(user)
+        if not members:
+            del self.groups[group]
+        self._memberships.pop(user, None)
+        self.invalidate()
+        return True
+
+    def principals(self, user):
+        """
+        Retorna o usuário seguido dos grupos dos quais ele faz parte
+        Args:
+            user (str): Nome do usuário
+        Returns:
+            tuple: Principais que representam o usuário nas ACLs
+        """
+
+        principals = self._memberships.get(user)
+        if principals is None:
+            groups = sorted(g for g, members in self.groups.items() if user in members)
+            principals = self._memberships[user] = (user, *groups)
+        return principals
+
+    def _match(self, acl, principals):
+        """
+        Combina as entradas de uma ACL aplicáveis aos principais
+        Returns:
+            int: Máscara combinada, ou None se nenhuma entrada se aplica
+        """
+
+        # A entrada do próprio usuário prevalece sobre as dos grupos
+        if principals[0] in acl:
+            return acl[principals[0]]
+        mask = None
+        for group in principals[1:]:
+            if group in acl:
+                mask = (mask or NONE) | acl[group]
+        return mask
+
+    def effective(self, user, node, ancestors, cached=True):
+        """
+        Calcula a permissão efetiva de um usuário sobre um nó
+        Args:
+            user (str): Nome do usuário
+            node (File | Directory): Nó acessado
+            ancestors (list): Diretórios da raiz até o pai do nó
+            cached (bool): Se False, ignora o cache (ex: nós de um snapshot, cujas
+                           ACLs podem diferir das atuais com a mesma referência)
+        Returns:
+            int: Máscara de bits efetiva
+        """
+
+        key = (user, node.ref)
+        mask = self._cache.get(key) if cached else None
+        if mask is not None:
+            self.cache_hits += 1
+            return mask
+
+        self.cache_misses += 1
+        if user in self.admins:
+            mask = FULL
+        else:
+            principals = self.principals(user)
+            mask = self._match(node.acl, principals)
+            for directory in reversed(ancestors):
+                if mask is not None:
+                    break
+                mask = self._match(directory.acl, principals)
+            mask = mask or NONE
+
+        if not cached:
+            return mask
+        if len(self._cache) >= self.max_cache_entries:
+            self._cache.clear()
+        self._cache[key] = mask
+        return mask
+
+    def allowed(self, user, node, ancestors, required, cached=True):
+        """
+        Verifica se o usuário possui todos os bits de permissão exigidos
+        Args:
+            user (str): Nome do usuário
+            node (File | Directory): Nó acessado
+            ancestors (list): Diretórios da raiz até o pai do nó
+            required (int): Máscara exigida (READ, WRITE ou FULL)
+            cached (bool): Se False, ignora o cache de permissões efetivas
+        Returns:
+            bool: True se o acesso é permitido
+        """
+
+        return self.effective(user, node, ancestors, cached) & required == required
@@ -0,0 +1,166 @@
+""" Protocolo binário com quadros (frames) usado entre o servidor e os clientes do simulador """
+import struct
+
+# Cabeçalho de cada quadro: (tamanho do corpo, id da requisição, código da operação ou status)
+HEADER = struct.Struct('>IIB')
+MAX_FRAME = 64 * 1024 * 1024  # Maior corpo aceito, em bytes
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Operações do protocolo: nome -> código (o lote executa várias operações em um único quadro)
+OPCODES = {
+    'create_file': 1,
+    'delete_file': 2,
+    'read_file': 3,
+    'write_file': 4,
+    'append_to_file': 5,
+    'create_directory': 6,
+    'listing': 7,
+    'directory_exists': 8,
+    'access_mask': 9,
+    'du': 10,
+    'set_file_permission': 11,
+    'set_directory_permission': 12,
+    'checkpoint': 13,
+    'batch': 14,
+}
+OPNAMES = {code: name for name, code in OPCODES.items()}
+
+_LENGTH = struct.Struct('>I')
+_INT = struct.Struct('>q')
+_FLOAT = struct.Struct('>d')
+
+
+class ProtocolError(Exception):
+    """Quadro malformado ou valor que não pode ser codificado"""
+
+
+def _encode_value(value, out):
+    """Codifica um valor (None, bool, int, float, str, bytes, lista ou tupla) com uma etiqueta de tipo"""
+    if value is None:
+        out.append(b'N')
+    elif isinstance(value, bool):
+        out.append(b'T' if value else b'F')
+    elif isinstance(value, int):
+        out.append(b'I' + _INT.pack(value))
+    elif isinstance(value, float):
+        out.append(b'D' + _FLOAT.pack(value))
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out.append(b'S' + _LENGTH.pack(len(data)))
+        out.append(data)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(b'B' + _LENGTH.pack(len(value)))
+        out.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(b'L' + _LENGTH.pack(len(value)))
+        for item in value:
+            _encode_value(item, out)
+    else:
+        raise ProtocolError(f"Tipo não suportado pelo protocolo: {type(value).__name__}")
+
+
+def encode_value(value):
+    """
+    Codifica um valor no formato do protocolo
+    Args:
+        value: None, bool, int, float, str, bytes ou listas desses valores
+    Returns:
+        bytes: Valor codificado
+    Raises:
+        ProtocolError: Se o tipo não for suportado
+    """
+
+    out = []
+    _encode_value(value, out)
+    return b''.join(out)
+
+
+def decode_value(data, offset=0):
+    """
+    Decodifica um valor no formato do protocolo
+    Args:
+        data (bytes): Buffer com o valor codificado
+        offset (int): Posição inicial do valor
+    Returns:
+        tuple: (valor decodificado, int: posição após o valor)
+    Raises:
+        ProtocolError: Se o valor estiver malformado
+    """
+
+    try:
+        tag = bytes(data[offset:offset + 1])
+        offset += 1
+        if tag == b'N':
+            return None, offset
+        if tag == b'T':
+            return True, offset
+        if tag == b'F':
+            return False, offset
+        if tag == b'I':
+            return _INT.unpack_from(data, offset)[0], offset + _INT.size
+        if tag == b'D':
+            return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+        if tag in (b'S', b'B'):
+            length = _LENGTH.unpack_from(data, offset)[0]
+            start = offset + _LENGTH.size
+            raw = bytes(data[start:start + length])
+            if len(raw) != length:
+                raise ProtocolError("Valor incompleto")
+            return (raw.decode('utf-8') if tag == b'S' else raw), start + length
+        if tag == b'L':
+            count = _LENGTH.unpack_from(data, offset)[0]
+            offset += _LENGTH.size
+            items = []
+            for _ in range(count):
+                item, offset = decode_value(data, offset)
+                items.append(item)
+            return items, offset
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ProtocolError(f"Valor malformado: {e}") from e
+    raise ProtocolError(f"Etiqueta de tipo desconhecida: {tag!r}")
+
+
+def encode_frame(request_id, code, value):
+    """
+    Monta um quadro completo
+    Args:
+        request_id (int): Id da requisição (a resposta repete o id do pedido)
+        code (int): Código da operação (pedido) ou status (resposta)
+        value: Argumentos da operação ou resultado
+    Returns:
+        bytes: Quadro serializado
+    """
+
+    body = encode_value(value)
+    return HEADER.pack(len(body), request_id, code) + body
+
+
+def decode_frames(buffer):
+    """
+    Extrai os quadros completos de um buffer de recepção
+    Args:
+        buffer (bytearray): Bytes recebidos; os quadros extraídos são removidos dele
+    Returns:
+        list: Tuplas (id da requisição, código, valor)
+    Raises:
+        ProtocolError: Se um quadro exceder MAX_FRAME ou estiver malformado
+    """
+
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size:
+        length, request_id, code = HEADER.unpack_from(buffer, offset)
+        if length > MAX_FRAME:
+            raise ProtocolError(f"Quadro de {length} bytes excede o limite")
+        end = offset + HEADER.size + length
+        if len(buffer) < end:
+            break
+        value, consumed = decode_value(bytes(buffer[offset + HEADER.size:end]))
+        if consumed != length:
+            raise ProtocolError("Corpo do quadro com bytes sobrando")
+        frames.append((request_id, code, value))
+        offset = end
+    del buffer[:offset]
+    return frames
@@ -0,0 +1,210 @@
+""" Relatório de desempenho da recuperação: tempos por fase, progresso e captura de perfil """
+import contextlib
+import cProfile
+import time
+import tracemalloc
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+PROFILE_PATHS = {'cprofile': "recovery.prof", 'tracemalloc': "recovery_tracemalloc.txt"}  # Arquivos padrão
+
+
+class RecoveryProgress:
+    """Andamento da recuperação entregue à função de progresso"""
+
+    def __init__(self, entries_done, entries_total, bytes_done, bytes_total, elapsed):
+        """
+        Inicializa o andamento
+        Args:
+            entries_done (int): Registros já reexecutados
+            entries_total (int): Total de registros a reexecutar
+            bytes_done (int): Bytes de journal já reexecutados
+            bytes_total (int): Total de bytes de journal a reexecutar
+            elapsed (float): Tempo decorrido em segundos
+        """
+
+        self.entries_done = entries_done
+        self.entries_total = entries_total
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self):
+        """Fração concluída (por bytes de journal)"""
+        if not self.bytes_total:
+            return 1.0
+        return self.bytes_done / self.bytes_total
+
+    @property
+    def eta(self):
+        """Tempo restante estimado em segundos"""
+        if not self.bytes_done:
+            return None
+        return self.elapsed * (self.bytes_total - self.bytes_done) / self.bytes_done
+
+
+class RecoveryReport:
+    """Tempos por fase de uma recuperação a partir do journal"""
+
+    def __init__(self, entries_total, bytes_total):
+        """
+        Inicializa um relatório vazio
+        Args:
+            entries_total (int): Total de registros a reexecutar
+            bytes_total (int): Total de bytes de journal a reexecutar
+        """
+
+        self.entries_total = entries_total
+        self.bytes_total = bytes_total
+        self.entries_done = 0
+        self.bytes_done = 0
+        self.reset_time = 0.0     # Restauração da imagem do checkpoint
+        self.resolve_time = 0.0   # Resolução de caminhos
+        self.content_time = 0.0   # Decodificação do conteúdo das cargas
+        self.total_time = 0.0
+        self.actions = {}         # Ação -> [quantidade, segundos]
+        self.profile_path = None  # Arquivo com o perfil capturado (se houver)
+        self.peak_memory = None   # Pico de memória medido pelo tracemalloc (bytes)
+        self.expected_digest = None   # Hash de Merkle da árvore antes da falha
+        self.recovered_digest = None  # Hash de Merkle da árvore recuperada
+        self.differences = []     # Diferenças (mudança, caminho, é diretório) se os hashes divergirem
+        self.lost_buffers = None  # Buffers sujos do cache perdidos na falha (se houver cache)
+        self.torn_bytes = 0       # Bytes finais do log descartados (registro incompleto ou corrompido)
+
+    @property
+    def consistent(self):
+        """Se a árvore recuperada é idêntica à anterior à falha"""
+        return self.expected_digest == self.recovered_digest
+
+    def record_action(self, action, seconds, size):
+        """
+        Contabiliza a reexecução de um registro
+        Args:
+            action (str): Ação do registro
+            seconds (float): Tempo gasto reexecutando o registro
+            size (int): Tamanho do registro em bytes
+        """
+
+        stats = self.actions.setdefault(action, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        self.entries_done += 1
+        self.bytes_done += size
+
+    def to_dict(self):
+        """Converte o relatório em dicionário serializável"""
+        return {
+            'entries': self.entries_done,
+            'bytes': self.bytes_done,
+            'total_time': self.total_time,
+            'reset_time': self.reset_time,
+            'resolve_time': self.resolve_time,
+            'content_time': self.content_time,
+            'actions': {action: {'count': c, 'time': t} for action, (c, t) in sorted(self.actions.items())},
+            'profile_path': self.profile_path,
+            'peak_memory': self.peak_memory,
+            'consistent': self.consistent,
+            'differences': [list(change) for change in self.differences],
+            'lost_buffers': self.lost_buffers,
+            'torn_bytes': self.torn_bytes,
+        }
+
+    def summary(self):
+        """
+        Formata o relatório para exibição
+        Returns:
+            str: Texto com os tempos por fase e por ação
+        """
+
+        ms = lambda seconds: f"{seconds * 1000:.2f} ms"
+        lines = [
+            f"Registros reexecutados: {self.entries_done} ({self.bytes_done} bytes) em {ms(self.total_time)}",
+            f"  restauração da árvore: {ms(self.reset_time)}",
+            f"  resolução de caminhos: {ms(self.resolve_time)}",
+            f"  conteúdo (decodificação): {ms(self.content_time)}",
+        ]
+        for action, (count, seconds) in sorted(self.actions.items()):
+            lines.append(f"  {action}: {count} registros, {ms(seconds)}")
+        if self.consistent:
+            lines.append("  verificação (hash de Merkle): estado idêntico ao anterior à falha")
+        else:
+            lines.append(f"  verificação (hash de Merkle): {len(self.differences)} diferença(s) em relação ao estado anterior")
+            for change, path, _ in self.differences[:10]:
+                lines.append(f"    {change}: {path}")
+        if self.torn_bytes:
+            lines.append(f"  registro final interrompido: {self.torn_bytes} bytes descartados")
+        if self.lost_buffers is not None:
+            lines.append(f"  cache de buffers: {self.lost_buffers} buffers sujos perdidos, refeitos a partir do journal")
+        if self.peak_memory is not None:
+            lines.append(f"  pico de memória: {self.peak_memory / 1024:.1f} KiB")
+        if self.profile_path:
+            lines.append(f"  perfil gravado em: {self.profile_path}")
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def capture_profile(report, mode, path=None):
+    """
+    Captura um perfil de CPU (cProfile) ou de memória (tracemalloc) durante o bloco
+    Args:
+        report (RecoveryReport): Relatório que receberá o caminho do artefato
+        mode (str): 'cprofile', 'tracemalloc' ou None (sem captura)
+        path (str): Arquivo de saída (padrão: recovery.prof ou recovery_tracemalloc.txt)
+    Raises:
+        ValueError: Se o modo for inválido
+    """
+
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError("Modo de perfil inválido. Use 'cprofile' ou 'tracemalloc'")
+
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report.profile_path = path or PROFILE_PATHS[mode]
+            profiler.dump_stats(report.profile_path)
+        return
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        report.peak_memory = tracemalloc.get_traced_memory()[1]
+        if not already_tracing:
+            tracemalloc.stop()
+        report.profile_path = path or PROFILE_PATHS[mode]
+        with open(report.profile_path, 'w', encoding='utf-8') as output:
+            output.write(f"Pico de memória: {report.peak_memory} bytes\n")
+            for stat in snapshot.statistics('lineno')[:30]:
+                output.write(f"{stat}\n")
+
+
+def progress_tracker(report, callback, every, start):
+    """
+    Cria a função que notifica o progresso a cada `every` registros
+    Args:
+        report (RecoveryReport): Relatório em preenchimento
+        callback (callable): Função que recebe um RecoveryProgress (ou None)
+        every (int): Intervalo de notificação em registros
+        start (float): Instante de início (time.perf_counter)
+    Returns:
+        callable: Função notify(force=False)
+    """
+
+    def notify(force=False):
+        if callback is None:
+            return
+        if force or report.entries_done % every == 0:
+            callback(RecoveryProgress(report.entries_done, report.entries_total, report.bytes_done,
+                                      report.bytes_total, time.perf_counter() - start))
+    return notify
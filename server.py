@@ -0,0 +1,165 @@
+""" Servidor local que expõe o FileSystem a vários clientes simultâneos por socket """
+import argparse
+import asyncio
+import os
+
+from filesystem import FileSystem
+from protocol import (OPCODES, OPNAMES, STATUS_ERROR, STATUS_OK, ProtocolError, decode_frames,
+                      encode_frame)
+
+
+class FileSystemServer:
+    """
+    Servidor assíncrono (asyncio) de um único FileSystem.
+
+    As operações são executadas no laço de eventos, uma de cada vez, então o
+    sistema de arquivos não precisa de bloqueios. Os clientes podem enviar
+    vários pedidos sem esperar respostas (pipelining): todos os quadros
+    completos recebidos de uma vez são executados em sequência e suas
+    respostas enviadas em uma única escrita no socket.
+    """
+
+    def __init__(self, fs=None):
+        """
+        Inicializa o servidor
+        Args:
+            fs (FileSystem): Sistema de arquivos servido (padrão: um novo, sem mensagens)
+        """
+
+        self.fs = fs or FileSystem(verbose=False)
+        self.connections = 0  # Conexões abertas
+        self.requests = 0     # Operações executadas (cada item de um lote conta)
+        self._server = None
+        self._handlers = {
+            'create_file': self.fs.create_file,
+            'delete_file': self.fs.delete_file,
+            'read_file': self.fs.read_file,
+            'write_file': self.fs.write_file,
+            'append_to_file': self.fs.append_to_file,
+            'create_directory': self.fs.create_directory,
+            'listing': self.fs.listing,
+            'directory_exists': self.fs.directory_exists,
+            'access_mask': self.fs.access_mask,
+            'du': self.fs.du,
+            'set_file_permission': self.fs.set_file_permission,
+            'set_directory_permission': self.fs.set_directory_permission,
+            'checkpoint': self.fs.checkpoint,
+        }
+
+    def execute(self, code, args):
+        """
+        Executa uma operação do protocolo
+        Args:
+            code (int): Código da operação
+            args (list): Argumentos da operação (no lote: pares [código, argumentos])
+        Returns:
+            Resultado da operação (no lote: lista de resultados)
+        Raises:
+            ProtocolError: Se a operação for desconhecida
+        """
+
+        name = OPNAMES.get(code)
+        if name == 'batch':
+            return [self.execute(op, op_args) for op, op_args in args]
+        if name is None:
+            raise ProtocolError(f"Operação desconhecida: {code}")
+        self.requests += 1
+        return self._handlers[name](*args)
+
+    def _connection_made(self):
+        self.connections += 1
+
+    def _connection_lost(self):
+        self.connections -= 1
+
+    def protocol_factory(self):
+        """Cria o protocolo asyncio de uma nova conexão"""
+        return _Connection(self)
+
+    async def start(self, host='127.0.0.1', port=0, unix_path=None):
+        """
+        Começa a aceitar conexões
+        Args:
+            host (str): Endereço TCP local
+            port (int): Porta TCP (0 escolhe uma livre)
+            unix_path (str): Caminho de um socket Unix (substitui host/porta)
+        Returns:
+            str | tuple: Caminho do socket Unix ou (host, porta) efetivamente usados
+        """
+
+        loop = asyncio.get_running_loop()
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self._server = await loop.create_unix_server(self.protocol_factory, unix_path)
+            return unix_path
+        self._server = await loop.create_server(self.protocol_factory, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Atende conexões até o servidor ser fechado"""
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Deixa de aceitar conexões"""
+        if self._server is not None:
+            self._server.close()
+
+
+class _Connection(asyncio.Protocol):
+    """Conexão de um cliente: acumula bytes, executa os quadros completos e responde em lote"""
+
+    def __init__(self, server):
+        self.server = server
+        self.buffer = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server._connection_made()
+
+    def connection_lost(self, exc):
+        self.server._connection_lost()
+
+    def data_received(self, data):
+        self.buffer += data
+        try:
+            frames = decode_frames(self.buffer)
+        except ProtocolError as e:
+            self.transport.write(encode_frame(0, STATUS_ERROR, str(e)))
+            self.transport.close()
+            return
+
+        replies = []
+        for request_id, code, args in frames:
+            try:
+                result = self.server.execute(code, args or [])
+                replies.append(encode_frame(request_id, STATUS_OK, result))
+            except Exception as e:
+                replies.append(encode_frame(request_id, STATUS_ERROR, f"{type(e).__name__}: {e}"))
+        if replies:
+            self.transport.write(b''.join(replies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor do simulador de sistema de arquivos")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço TCP local")
+    parser.add_argument("--port", type=int, default=8765, help="Porta TCP")
+    parser.add_argument("--unix", help="Caminho de um socket Unix (no lugar de TCP)")
+    args = parser.parse_args()
+
+    async def run():
+        server = FileSystemServer()
+        address = await server.start(args.host, args.port, args.unix)
+        print(f"Servidor ouvindo em {address} ({len(OPCODES)} operações disponíveis)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,617 @@
+""" Particionamento do namespace entre processos (shards), com um roteador local """
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+
+from filesystem import Directory, FileSystem
+from recovery_profiler import PROFILE_PATHS
+
+
+def _find(fs, pattern, path, snapshot=None):
+    """Resultados de uma busca em forma serializável: (caminho, é diretório)"""
+    return [(found, isinstance(node, Directory)) for found, node in fs.find(pattern, path, snapshot)]
+
+
+def _walk(fs, path, snapshot=None):
+    """Percurso de uma subárvore em forma serializável: (caminho, subdiretórios, arquivos)"""
+    return [(dir_path, [d.name for d in directory.subdirectories], [f.name for f in directory.files])
+            for dir_path, directory in fs.walk(path, snapshot)]
+
+
+def _usn(fs, action, consumer, value=None):
+    """
+    Operações sobre o cursor de um consumidor no journal de mudanças do shard
+    Args:
+        action (str): 'register', 'unregister', 'peek' (lê sem avançar) ou 'advance'
+        consumer (str): Nome do consumidor
+        value (int): USN inicial ('register'), máximo de registros ('peek') ou novo cursor ('advance')
+    """
+
+    if action == 'register':
+        return fs.usn.register(consumer, value)
+    if action == 'unregister':
+        return fs.usn.unregister(consumer)
+    if action == 'peek':
+        return list(itertools.islice(fs.usn.changes_since(fs.usn.cursors[consumer]), value))
+    fs.usn.cursors[consumer] = value
+
+
+def _group(fs, action, group, user):
+    """Adiciona ou remove um usuário de um grupo no modelo de permissões do shard"""
+    if action == 'add':
+        fs.permissions.add_to_group(user, group)
+        return True
+    return fs.permissions.remove_from_group(user, group)
+
+
+def _metrics(fs):
+    """Fotografia das métricas do shard"""
+    return fs.metrics.snapshot()
+
+
+# Operações executadas no processo do shard que não são métodos públicos do FileSystem
+_HELPERS = {'find': _find, 'walk': _walk, 'usn': _usn, 'group': _group, 'metrics': _metrics}
+
+
+def _shard_main(conn, options):
+    """
+    Laço principal de um processo shard: recebe chamadas pelo pipe e devolve os resultados
+    Args:
+        conn (Connection): Extremidade do pipe do shard
+        options (dict): Argumentos repassados ao FileSystem do shard
+    """
+
+    fs = FileSystem(**options)
+
+    def run(method, args, kwargs):
+        if method in _HELPERS:
+            return _HELPERS[method](fs, *args, **kwargs)
+        if method.startswith("_"):
+            raise AttributeError(f"Operação '{method}' não permitida")
+        return getattr(fs, method)(*args, **kwargs)
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        kind, payload = message
+        try:
+            if kind == 'batch':
+                result = [run(*call) for call in payload]
+            else:
+                result = run(*payload)
+        except Exception as e:
+            try:
+                conn.send(('error', e))
+            except Exception:  # Exceções que não podem ser serializadas
+                conn.send(('error', RuntimeError(repr(e))))
+        else:
+            conn.send(('ok', result))
+    conn.close()
+
+
+class _ShardedUsnJournal:
+    """
+    Cursores do journal de mudanças (USN) sobre todos os shards, com a interface de
+    UsnJournal para registrar, ler e remover consumidores. Cada shard numera seus
+    próprios USNs, então o cursor de um consumidor é um USN por shard; as mudanças
+    lidas são intercaladas pelo horário e acompanhadas do shard de origem
+    """
+
+    def __init__(self, router):
+        """
+        Inicializa os cursores
+        Args:
+            router (ShardedFileSystem): Roteador dos shards
+        """
+
+        self.router = router
+
+    def register(self, consumer, start_usn=None):
+        """
+        Registra um consumidor em todos os shards
+        Args:
+            consumer (str): Nome do consumidor
+            start_usn (int | list): USN inicial em todos os shards, ou um por shard
+                                    (padrão: apenas mudanças futuras)
+        Returns:
+            list: USN inicial do cursor em cada shard
+        """
+
+        if not isinstance(start_usn, (list, tuple)):
+            start_usn = [start_usn] * len(self.router)
+        return self.router._scatter('usn', [(('register', consumer, usn), {}) for usn in start_usn])
+
+    def unregister(self, consumer):
+        """
+        Remove o cursor de um consumidor em todos os shards
+        Args:
+            consumer (str): Nome do consumidor
+        """
+
+        self.router._broadcast('usn', 'unregister', consumer)
+
+    def read(self, consumer, max_records=None):
+        """
+        Gera as mudanças desde o cursor do consumidor em todos os shards. Os cursores
+        avançam apenas até a última mudança entregue, quando a leitura termina
+        Args:
+            consumer (str): Nome do consumidor registrado
+            max_records (int): Máximo de registros entregues nesta leitura (opcional)
+        Yields:
+            tuple: (int: shard, UsnRecord: mudança) em ordem de horário
+        Raises:
+            KeyError: Se o consumidor não estiver registrado
+            UsnJournalWrapError: Se o cursor de algum shard aponta para registros descartados
+        """
+
+        pages = self.router._broadcast('usn', 'peek', consumer, max_records)
+        streams = [[(shard, change) for change in page] for shard, page in enumerate(pages)]
+        delivered = {}  # Shard -> próximo USN a ler
+        try:
+            for shard, change in itertools.islice(heapq.merge(*streams, key=lambda item: item[1].timestamp),
+                                                  max_records):
+                delivered[shard] = change.usn + 1
+                yield shard, change
+        finally:
+            for shard, usn in delivered.items():
+                self.router._call(shard, 'usn', 'advance', consumer, usn)
+
+
+class ShardedFileSystem:
+    """
+    Roteador que distribui o namespace entre processos, cada um com sua árvore e seu journal.
+
+    Cada diretório (ou arquivo) de primeiro nível pertence a um único shard,
+    escolhido pelo hash do seu nome; assim toda a subárvore, inclusive as ACLs
+    herdadas, fica em um mesmo processo. Operações que envolvem a raiz
+    (listagem, ACL da raiz, grupos, checkpoint, recuperação) são enviadas a
+    todos os shards e seus resultados combinados.
+
+    Diferenças em relação ao FileSystem, impostas pela separação em processos:
+    find_file e find_directory devolvem cópias desconectadas dos nós (a raiz,
+    que não pertence a nenhum shard, não pode ser obtida assim); walk e find
+    devolvem nomes e caminhos em vez de nós; LSNs e USNs são numerados por
+    shard (a leitura de mudanças informa o shard de cada registro); a recuperação
+    não aceita função de progresso; e fork não é suportado.
+    """
+
+    def __init__(self, shards=None, **options):
+        """
+        Inicia os processos dos shards
+        Args:
+            shards (int): Número de shards (padrão: número de CPUs)
+            **options: Argumentos repassados ao FileSystem de cada shard (verbose=False por padrão)
+        Raises:
+            ValueError: Se o número de shards não for positivo
+        """
+
+        shards = shards or multiprocessing.cpu_count()
+        if shards <= 0:
+            raise ValueError("O número de shards deve ser positivo")
+        options.setdefault('verbose', False)
+        self._snapshot_ids = itertools.count(1)
+        self._snapshots = {}  # Id do snapshot no roteador -> id correspondente em cada shard
+        self.usn = _ShardedUsnJournal(self)  # Cursores de mudanças sobre todos os shards
+        self._conns = []
+        self._locks = []
+        self._processes = []
+        for _ in range(shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_main, args=(child_conn, options), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._locks.append(threading.Lock())
+            self._processes.append(process)
+
+    def __len__(self):
+        return len(self._conns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Encerra os processos dos shards"""
+        for conn, lock, process in zip(self._conns, self._locks, self._processes):
+            with lock:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            process.join()
+            conn.close()
+        self._conns = []
+
+    def shard_of(self, path):
+        """
+        Calcula o shard responsável por um caminho
+        Args:
+            path (str): Caminho completo
+        Returns:
+            int: Índice do shard, ou None para a própria raiz (presente em todos)
+        """
+
+        top = path.strip("/").split("/", 1)[0]
+        if not top:
+            return None
+        return zlib.crc32(top.encode('utf-8')) % len(self._conns)
+
+    @staticmethod
+    def _unwrap(reply):
+        """Devolve o resultado de uma resposta do shard ou relança o erro ocorrido nele"""
+        status, result = reply
+        if status == 'error':
+            raise result
+        return result
+
+    def _call(self, shard, method, *args, **kwargs):
+        """Executa uma operação em um shard e aguarda o resultado"""
+        with self._locks[shard]:
+            self._conns[shard].send(('call', (method, args, kwargs)))
+            return self._unwrap(self._conns[shard].recv())
+
+    def _broadcast(self, method, *args, **kwargs):
+        """
+        Executa uma operação em todos os shards em paralelo
+        Returns:
+            list: Resultado de cada shard, na ordem dos shards
+        """
+
+        return self._scatter(method, [(args, kwargs)] * len(self._conns))
+
+    def _scatter(self, method, calls):
+        """
+        Executa uma operação em todos os shards em paralelo, com argumentos próprios para cada um.
+        Todos os shards ficam bloqueados até a última resposta, então o conjunto dos
+        resultados corresponde a um mesmo instante para os demais usuários do roteador
+        Args:
+            method (str): Nome da operação
+            calls (list): Tuplas (args, kwargs) de cada shard, na ordem dos shards
+        Returns:
+            list: Resultado de cada shard, na ordem dos shards
+        """
+
+        # Os bloqueios são sempre adquiridos na mesma ordem, evitando impasses
+        for lock, conn, (args, kwargs) in zip(self._locks, self._conns, calls):
+            lock.acquire()
+            conn.send(('call', (method, args, kwargs)))
+        replies = []
+        for lock, conn in zip(self._locks, self._conns):
+            try:
+                replies.append(conn.recv())
+            finally:
+                lock.release()
+        return [self._unwrap(reply) for reply in replies]
+
+    def _route(self, method, path, *args, **kwargs):
+        """Executa uma operação no shard dono do caminho"""
+        return self._call(self.shard_of(path) or 0, method, path, *args, **kwargs)
+
+    def _snapshot_ids_for(self, snapshot):
+        """
+        Traduz um id de snapshot do roteador para os ids locais de cada shard
+        Args:
+            snapshot (int): Id do snapshot no roteador (None para a árvore atual)
+        Returns:
+            list: Id em cada shard (None para a árvore atual), ou None se o snapshot não existir
+        """
+
+        if snapshot is None:
+            return [None] * len(self._conns)
+        return self._snapshots.get(snapshot)
+
+    def _route_snapshot(self, method, path, snapshot, *args):
+        """Executa uma leitura no shard dono do caminho, na árvore atual ou em um snapshot"""
+        ids = self._snapshot_ids_for(snapshot)
+        if ids is None:
+            return None
+        shard = self.shard_of(path) or 0
+        return self._call(shard, method, path, *args, snapshot=ids[shard])
+
+    def execute(self, operations):
+        """
+        Executa um lote de operações sobre arquivos, enviando uma única mensagem
+        por shard e processando os shards em paralelo (pipelining)
+        Args:
+            operations (list): Tuplas (método, caminho, *argumentos)
+        Returns:
+            list: Resultados na ordem das operações
+        """
+
+        by_shard = {}
+        for position, (method, path, *args) in enumerate(operations):
+            by_shard.setdefault(self.shard_of(path) or 0, []).append((position, (method, (path, *args), {})))
+
+        shards = sorted(by_shard)
+        for shard in shards:
+            self._locks[shard].acquire()
+            self._conns[shard].send(('batch', [call for _, call in by_shard[shard]]))
+        results = [None] * len(operations)
+        replies = {}
+        for shard in shards:
+            try:
+                replies[shard] = self._conns[shard].recv()
+            finally:
+                self._locks[shard].release()
+        for shard in shards:
+            for (position, _), result in zip(by_shard[shard], self._unwrap(replies[shard])):
+                results[position] = result
+        return results
+
+    # Operações com a mesma interface do FileSystem
+    def create_file(self, path, content='', user='root'):
+        """Cria um arquivo no shard dono do caminho"""
+        return self._route('create_file', path, content, user)
+
+    def delete_file(self, path, user='root'):
+        """Remove um arquivo no shard dono do caminho"""
+        return self._route('delete_file', path, user)
+
+    def read_file(self, path, user='root', snapshot=None):
+        """Lê um arquivo (na árvore atual ou em um snapshot) no shard dono do caminho"""
+        return self._route_snapshot('read_file', path, snapshot, user)
+
+    def find_file(self, path, snapshot=None):
+        """
+        Localiza um arquivo no shard dono do caminho
+        Returns:
+            File: Cópia desconectada do arquivo (alterá-la não afeta o shard), ou None
+        """
+
+        return self._route_snapshot('find_file', path, snapshot)
+
+    def find_directory(self, path, snapshot=None):
+        """
+        Localiza um diretório no shard dono do caminho
+        Returns:
+            Directory: Cópia desconectada do diretório e de toda a sua subárvore, ou None
+        Raises:
+            ValueError: Se o caminho for a raiz, que é dividida entre os shards
+        """
+
+        if self.shard_of(path) is None:
+            raise ValueError("A raiz é dividida entre os shards: use listing ou walk")
+        return self._route_snapshot('find_directory', path, snapshot)
+
+    def write_file(self, path, new_content, user='root'):
+        """Sobrescreve um arquivo no shard dono do caminho"""
+        return self._route('write_file', path, new_content, user)
+
+    def append_to_file(self, path, additional_content, user='root'):
+        """Acrescenta conteúdo a um arquivo no shard dono do caminho"""
+        return self._route('append_to_file', path, additional_content, user)
+
+    def set_file_permission(self, path, user_alvo, permission, admin='root'):
+        """Altera a ACL de um arquivo no shard dono do caminho"""
+        return self._route('set_file_permission', path, user_alvo, permission, admin)
+
+    def set_directory_permission(self, path, user_alvo, permission, admin='root'):
+        """Altera a ACL herdável de um diretório; a ACL da raiz é gravada em todos os shards"""
+        if self.shard_of(path) is None:
+            return self._broadcast('set_directory_permission', path, user_alvo, permission, admin)[0]
+        return self._route('set_directory_permission', path, user_alvo, permission, admin)
+
+    def create_directory(self, path):
+        """Cria um diretório no shard dono do caminho"""
+        return self._route('create_directory', path)
+
+    def access_mask(self, path, user):
+        """Permissão efetiva de um usuário, calculada no shard dono do caminho"""
+        return self._route('access_mask', path, user)
+
+    def directory_exists(self, path):
+        """Verifica se um diretório existe"""
+        if self.shard_of(path) is None:
+            return True
+        return self._route('directory_exists', path)
+
+    def du(self, path="/", snapshot=None):
+        """Uso de espaço; na raiz, soma os agregados de todos os shards"""
+        if self.shard_of(path) is not None:
+            return self._route_snapshot('du', path, snapshot)
+        ids = self._snapshot_ids_for(snapshot)
+        if ids is None:
+            return None
+        usages = self._scatter('du', [((path,), {'snapshot': sid}) for sid in ids])
+        files, dirs, size = (sum(column) for column in zip(*usages))
+        return files, dirs, size
+
+    def find(self, pattern, path="/", snapshot=None):
+        """
+        Busca arquivos e diretórios pelo nome
+        Returns:
+            list: Tuplas (caminho, é diretório)
+        """
+
+        ids = self._snapshot_ids_for(snapshot)
+        if ids is None:
+            return []
+        shard = self.shard_of(path)
+        if shard is not None:
+            return self._call(shard, 'find', pattern, path, ids[shard])
+        found = self._scatter('find', [((pattern, path, sid), {}) for sid in ids])
+        # A raiz existe em todos os shards: mantém uma única ocorrência
+        return sorted({item for items in found for item in items})
+
+    def walk(self, path="/", snapshot=None):
+        """
+        Percorre a subárvore em pré-ordem; na raiz, o primeiro item combina os shards
+        Args:
+            path (str): Diretório inicial
+            snapshot (int): Id do snapshot a percorrer (padrão: árvore atual)
+        Yields:
+            tuple: (str: caminho do diretório, list: subdiretórios, list: arquivos)
+        """
+
+        ids = self._snapshot_ids_for(snapshot)
+        if ids is None:
+            return
+        shard = self.shard_of(path)
+        if shard is not None:
+            yield from self._call(shard, 'walk', path, ids[shard])
+            return
+        walks = self._scatter('walk', [((path, sid), {}) for sid in ids])
+        yield ("/", [name for items in walks for name in items[0][1]],
+               [name for items in walks for name in items[0][2]])
+        for items in walks:
+            yield from items[1:]
+
+    def listing(self, path, snapshot=None):
+        """
+        Nomes do conteúdo de um diretório, combinando os shards quando for a raiz
+        Returns:
+            tuple: (list: subdiretórios, list: arquivos), ou None se não existir
+        """
+
+        if self.shard_of(path) is not None:
+            return self._route_snapshot('listing', path, snapshot)
+        ids = self._snapshot_ids_for(snapshot)
+        if ids is None:
+            return None
+        listings = [listing for listing in self._scatter('listing', [((path,), {'snapshot': sid}) for sid in ids])
+                    if listing]
+        return (sorted({name for dirs, _ in listings for name in dirs}),
+                sorted({name for _, files in listings for name in files}))
+
+    def list_directory(self, path, snapshot=None):
+        """Lista o conteúdo de um diretório, combinando os shards quando for a raiz"""
+        if snapshot is not None and snapshot not in self._snapshots:
+            print(f"Snapshot '{snapshot}' não encontrado.")
+            return
+        listing = self.listing(path, snapshot)
+        if listing is None:
+            print(f"Diretório '{path}' não encontrado.")
+            return
+        print(f"Conteúdo de '{path}':")
+        for name in sorted(listing[0]):
+            print(f"  <DIR> {name}")
+        for name in sorted(listing[1]):
+            print(f"       {name}")
+
+    def import_batch(self, base, items, user='root'):
+        """
+        Cria um lote de diretórios e arquivos; na raiz, o lote é dividido entre os shards
+        pelo primeiro componente de cada caminho relativo
+        Returns:
+            int: Número de itens criados, ou None se o registro do lote não coube no
+                 journal de algum shard (os itens desse shard não são criados)
+        """
+
+        if self.shard_of(base) is not None:
+            return self._route('import_batch', base, items, user)
+        by_shard = {}
+        for item in items:
+            by_shard.setdefault(self.shard_of(item[1]), []).append(item)
+        created = [self._call(shard, 'import_batch', base, shard_items, user)
+                   for shard, shard_items in sorted(by_shard.items())]
+        return None if None in created else sum(created)
+
+    def query_journal(self, user=None, path=None, since=None, until=None, offset=0, limit=None,
+                      reverse=False):
+        """
+        Consulta os journals dos shards; fora de um único shard, os resultados de todos
+        são intercalados pelo horário dos registros
+        Returns:
+            list: Registros (JournalEntry, com LSNs locais ao shard de cada um)
+        """
+
+        shard = self.shard_of(path) if path is not None else None
+        if shard is not None:
+            return self._call(shard, 'query_journal', user, path, since, until, offset, limit, reverse)
+        stop = None if limit is None else offset + limit
+        pages = self._broadcast('query_journal', user, path, since, until, 0, stop, reverse)
+        merged = heapq.merge(*pages, key=lambda entry: entry.timestamp, reverse=reverse)
+        return list(itertools.islice(merged, offset, stop))
+
+    def create_snapshot(self, label=None):
+        """
+        Cria um snapshot em todos os shards; como o roteador bloqueia todos durante a
+        criação, o conjunto corresponde a um mesmo instante para os seus usuários
+        Returns:
+            int: Id do snapshot no roteador
+        """
+
+        snapshot_id = next(self._snapshot_ids)
+        self._snapshots[snapshot_id] = self._broadcast('create_snapshot', label)
+        return snapshot_id
+
+    def release_snapshot(self, snapshot_id):
+        """
+        Libera um snapshot em todos os shards
+        Returns:
+            bool: True se o snapshot existia
+        """
+
+        ids = self._snapshots.pop(snapshot_id, None)
+        if ids is None:
+            return False
+        return all(self._scatter('release_snapshot', [((sid,), {}) for sid in ids]))
+
+    def diff_snapshots(self, old_id, new_id=None):
+        """
+        Compara dois snapshots (ou um snapshot e a árvore atual) em todos os shards
+        Returns:
+            list: Tuplas (mudança, caminho, é diretório) ordenadas por caminho,
+                  ou None se algum snapshot não existir
+        """
+
+        old_ids = self._snapshot_ids_for(old_id)
+        new_ids = self._snapshot_ids_for(new_id)
+        if old_ids is None or new_ids is None:
+            return None
+        diffs = self._scatter('diff_snapshots', [((old, new), {}) for old, new in zip(old_ids, new_ids)])
+        # Uma mudança na ACL da raiz aparece em todos os shards: mantém uma única ocorrência
+        return sorted({change for diff in diffs for change in diff}, key=lambda change: change[1])
+
+    def add_to_group(self, user, group):
+        """Adiciona um usuário a um grupo em todos os shards"""
+        self._broadcast('group', 'add', group, user)
+
+    def remove_from_group(self, user, group):
+        """Remove um usuário de um grupo em todos os shards"""
+        return any(self._broadcast('group', 'del', group, user))
+
+    def checkpoint(self):
+        """Registra um checkpoint em todos os shards"""
+        self._broadcast('checkpoint')
+
+    def simulate_crash_and_recovery(self, progress=None, profile=None, profile_path=None, **options):
+        """
+        Simula uma falha e recupera todos os shards em paralelo
+        Args:
+            progress (callable): Não suportado: a recuperação ocorre em outros processos
+            profile (str): Captura de perfil em cada shard ('cprofile' ou 'tracemalloc', opcional)
+            profile_path (str): Arquivo base do perfil; cada shard grava o seu com o sufixo .shardN
+            **options: Demais argumentos de FileSystem.simulate_crash_and_recovery
+        Returns:
+            list: RecoveryReport de cada shard
+        Raises:
+            ValueError: Se uma função de progresso for informada
+        """
+
+        if progress is not None:
+            raise ValueError("Função de progresso não suportada com shards: use os relatórios devolvidos")
+        calls = []
+        for shard in range(len(self._conns)):
+            path = None
+            if profile is not None:
+                stem, extension = os.path.splitext(profile_path or PROFILE_PATHS.get(profile, "recovery.prof"))
+                path = f"{stem}.shard{shard}{extension}"
+            calls.append(((), dict(options, profile=profile, profile_path=path)))
+        return self._scatter('simulate_crash_and_recovery', calls)
+
+    def check_disk(self):
+        """Verifica a integridade de todos os shards (nós verificados, caminhos inconsistentes)"""
+        results = self._broadcast('check_disk')
+        return sum(checked for checked, _ in results), [path for _, problems in results for path in problems]
+
+    def metrics(self):
+        """Fotografias das métricas de cada shard"""
+        return self._broadcast('metrics')
@@ -0,0 +1,65 @@
+""" Snapshots copy-on-write da árvore de diretórios e comparação entre versões """
+import time
+
+
+class Snapshot:
+    """Visão imutável da árvore em um instante, compartilhando nós com a árvore atual"""
+
+    def __init__(self, snapshot_id, root, gen, label=None):
+        """
+        Inicializa um snapshot
+        Args:
+            snapshot_id (int): Identificador do snapshot
+            root (Directory): Raiz da árvore no instante do snapshot
+            gen (int): Geração congelada pelo snapshot (nós com gen <= ela são compartilhados)
+            label (str): Descrição opcional
+        """
+
+        self.id = snapshot_id
+        self.root = root
+        self.gen = gen
+        self.label = label
+        self.created_at = time.time()
+
+
+def diff_trees(old, new, path=""):
+    """
+    Compara duas árvores e gera as diferenças, descendo apenas nos diretórios
+    cujos hashes de Merkle diferem (subárvores com o mesmo hash são idênticas)
+    Args:
+        old (Directory): Diretório na versão antiga
+        new (Directory): Diretório na versão nova
+        path (str): Caminho do diretório comparado
+    Yields:
+        tuple: (str: 'added' | 'removed' | 'modified', str: caminho, bool: é diretório)
+    """
+
+    stack = [(old, new, path)]
+    while stack:
+        old_dir, new_dir, dir_path = stack.pop()
+        if old_dir is new_dir or old_dir.digest == new_dir.digest:
+            continue
+        if old_dir.acl != new_dir.acl:
+            yield ('modified', dir_path or "/", True)
+
+        old_files = {f.name: f for f in old_dir.files}
+        new_files = {f.name: f for f in new_dir.files}
+        for name, file in new_files.items():
+            previous = old_files.get(name)
+            if previous is None:
+                yield ('added', f"{dir_path}/{name}", False)
+            elif previous.digest != file.digest:
+                yield ('modified', f"{dir_path}/{name}", False)
+        for name in old_files.keys() - new_files.keys():
+            yield ('removed', f"{dir_path}/{name}", False)
+
+        old_dirs = {d.name: d for d in old_dir.subdirectories}
+        new_dirs = {d.name: d for d in new_dir.subdirectories}
+        for name, directory in new_dirs.items():
+            previous = old_dirs.get(name)
+            if previous is None:
+                yield ('added', f"{dir_path}/{name}", True)
+            else:
+                stack.append((previous, directory, f"{dir_path}/{name}"))
+        for name in old_dirs.keys() - new_dirs.keys():
+            yield ('removed', f"{dir_path}/{name}", True)
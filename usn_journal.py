@@ -0,0 +1,184 @@
+""" Journal de mudanças no estilo $UsnJrnl do NTFS, com cursores de consumidores """
+import time
+
+# Motivos de mudança (mesmos valores dos USN_REASON_* do NTFS)
+USN_REASON_DATA_OVERWRITE = 0x00000001
+USN_REASON_DATA_EXTEND = 0x00000002
+USN_REASON_DATA_TRUNCATION = 0x00000004
+USN_REASON_FILE_CREATE = 0x00000100
+USN_REASON_FILE_DELETE = 0x00000200
+USN_REASON_SECURITY_CHANGE = 0x00000800
+
+REASON_NAMES = {
+    USN_REASON_DATA_OVERWRITE: 'DATA_OVERWRITE',
+    USN_REASON_DATA_EXTEND: 'DATA_EXTEND',
+    USN_REASON_DATA_TRUNCATION: 'DATA_TRUNCATION',
+    USN_REASON_FILE_CREATE: 'FILE_CREATE',
+    USN_REASON_FILE_DELETE: 'FILE_DELETE',
+    USN_REASON_SECURITY_CHANGE: 'SECURITY_CHANGE',
+}
+
+
+def format_reason(reason):
+    """
+    Converte uma máscara de motivos em texto
+    Args:
+        reason (int): Máscara de motivos USN_REASON_*
+    Returns:
+        str: Nomes dos motivos separados por '|'
+    """
+
+    return "|".join(name for bit, name in REASON_NAMES.items() if reason & bit)
+
+
+class UsnJournalWrapError(Exception):
+    """O cursor aponta para registros que já foram descartados pela retenção"""
+
+
+class UsnRecord:
+    """Registro compacto de mudança em um arquivo ou diretório"""
+
+    __slots__ = ('usn', 'file_ref', 'parent_ref', 'name', 'reason', 'is_directory', 'timestamp')
+
+    def __init__(self, usn, file_ref, parent_ref, name, reason, is_directory=False):
+        """
+        Inicializa um registro de mudança
+        Args:
+            usn (int): Número de sequência da mudança
+            file_ref (int): Número de referência do arquivo/diretório alterado
+            parent_ref (int): Número de referência do diretório pai
+            name (str): Nome do item alterado
+            reason (int): Máscara de motivos USN_REASON_*
+            is_directory (bool): Se o item é um diretório
+        """
+
+        self.usn = usn
+        self.file_ref = file_ref
+        self.parent_ref = parent_ref
+        self.name = name
+        self.reason = reason
+        self.is_directory = is_directory
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        return (f"UsnRecord(usn={self.usn}, file_ref={self.file_ref}, parent_ref={self.parent_ref}, "
+                f"name={self.name!r}, reason={format_reason(self.reason)})")
+
+
+class UsnJournal:
+    """
+    Journal de mudanças separado do log de recuperação.
+
+    Cada mudança recebe um USN crescente. Consumidores mantêm cursores com o
+    próximo USN que desejam ler e puxam apenas o que mudou desde então; a
+    retenção é limitada a max_records registros, e um consumidor que ficar
+    para trás recebe UsnJournalWrapError e precisa ressincronizar.
+    """
+
+    def __init__(self, max_records=100_000):
+        """
+        Inicializa o journal de mudanças
+        Args:
+            max_records (int): Número máximo de registros retidos
+        Raises:
+            ValueError: Se max_records não for positivo
+        """
+
+        if max_records <= 0:
+            raise ValueError("max_records deve ser positivo")
+        self.max_records = max_records
+        self._records = []   # Registros retidos (a partir de self._head)
+        self._head = 0       # Posição do registro mais antigo em self._records
+        self.first_usn = 0   # USN do registro mais antigo retido
+        self.next_usn = 0    # USN do próximo registro
+        self.cursors = {}    # Consumidor -> próximo USN a ler
+
+    def __len__(self):
+        return self.next_usn - self.first_usn
+
+    def record(self, file_ref, parent_ref, name, reason, is_directory=False):
+        """
+        Registra uma mudança
+        Args:
+            file_ref (int): Número de referência do item alterado
+            parent_ref (int): Número de referência do diretório pai
+            name (str): Nome do item
+            reason (int): Máscara de motivos USN_REASON_*
+            is_directory (bool): Se o item é um diretório
+        Returns:
+            int: USN atribuído à mudança
+        """
+
+        usn = self.next_usn
+        self._records.append(UsnRecord(usn, file_ref, parent_ref, name, reason, is_directory))
+        self.next_usn += 1
+        if len(self) > self.max_records:
+            self._head += 1
+            self.first_usn += 1
+            # Compacta a lista quando metade dela já foi descartada
+            if self._head > len(self._records) // 2:
+                del self._records[:self._head]
+                self._head = 0
+        return usn
+
+    def changes_since(self, usn):
+        """
+        Gera as mudanças a partir de um USN, sem alterar cursores
+        Args:
+            usn (int): Primeiro USN desejado
+        Yields:
+            UsnRecord: Mudanças em ordem de USN
+        Raises:
+            UsnJournalWrapError: Se o USN já foi descartado pela retenção
+        """
+
+        if usn < self.first_usn:
+            raise UsnJournalWrapError(f"USN {usn} já foi descartado (mais antigo retido: {self.first_usn})")
+        while usn < self.next_usn:
+            if usn < self.first_usn:
+                raise UsnJournalWrapError(f"USN {usn} foi descartado durante a leitura")
+            yield self._records[self._head + usn - self.first_usn]
+            usn += 1
+
+    def register(self, consumer, start_usn=None):
+        """
+        Registra um consumidor com cursor próprio
+        Args:
+            consumer (str): Nome do consumidor
+            start_usn (int): USN inicial (padrão: apenas mudanças futuras)
+        Returns:
+            int: USN inicial do cursor
+        """
+
+        self.cursors[consumer] = self.next_usn if start_usn is None else start_usn
+        return self.cursors[consumer]
+
+    def unregister(self, consumer):
+        """
+        Remove o cursor de um consumidor
+        Args:
+            consumer (str): Nome do consumidor
+        """
+
+        self.cursors.pop(consumer, None)
+
+    def read(self, consumer, max_records=None):
+        """
+        Gera as mudanças desde o cursor do consumidor, avançando o cursor a cada registro entregue
+        Args:
+            consumer (str): Nome do consumidor registrado
+            max_records (int): Máximo de registros entregues nesta leitura (opcional)
+        Yields:
+            UsnRecord: Mudanças em ordem de USN
+        Raises:
+            KeyError: Se o consumidor não estiver registrado
+            UsnJournalWrapError: Se o cursor aponta para registros descartados
+        """
+
+        delivered = 0
+        for change in self.changes_since(self.cursors[consumer]):
+            if max_records is not None and delivered >= max_records:
+                return
+            self.cursors[consumer] = change.usn + 1
+            delivered += 1
+            yield change